@@ -7,7 +7,10 @@ from .models import (
     Muscle,
     TrainingSession,
     Exercise,
-    MuscleFatigue
+    MuscleFatigue,
+    TrainingMuscleSummary,
+    ProcessingJob,
+    ExerciseFeatureVector,
 )
 
 admin.site.site_header = "🏋️‍♂️ Sport monitoring tizimi"
@@ -121,3 +124,50 @@ class MuscleFatigueAdmin(admin.ModelAdmin):
     )
     list_filter = ("muscle__shortname",)
     autocomplete_fields = ("muscle", "exercise")
+
+
+@admin.register(TrainingMuscleSummary)
+class TrainingMuscleSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "training",
+        "muscle",
+        "avg_fatigue",
+        "k_adapt_load",
+        "exercise_count",
+        "version",
+    )
+    search_fields = ("training__title", "muscle__shortname")
+    list_filter = ("muscle__shortname",)
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(ExerciseFeatureVector)
+class ExerciseFeatureVectorAdmin(admin.ModelAdmin):
+    list_display = (
+        "training",
+        "muscle",
+        "first_count",
+        "last_count",
+        "fs",
+        "version",
+        "created_at",
+    )
+    search_fields = ("training__title", "muscle__shortname")
+    list_filter = ("muscle__shortname", "version")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "kind",
+        "training",
+        "status",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("kind", "status")
+    search_fields = ("training__title",)
+    readonly_fields = ("created_at", "started_at", "finished_at")
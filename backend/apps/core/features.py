@@ -0,0 +1,204 @@
+import numpy as np
+from django.conf import settings
+
+from apps.utils.emg_features import (
+    FEATURE_NAMES,
+    FEATURE_VERSION,
+    estimator_key,
+    signal_features,
+)
+from apps.utils.functions.signal_cache import open_signal_cache, source_signature
+from .models import ExerciseFeatureVector, MuscleFatigue, TrainingSession
+
+
+def source_key(training: TrainingSession) -> str:
+    """EMT fayl imzosi (nomi, hajmi, o‘zgartirilgan vaqti) satr ko‘rinishida."""
+    sig = source_signature(training.file_EMT.path)
+    return f"{sig['name']}:{sig['size']}:{sig['mtime_ns']}"
+
+
+def resolve_estimator(estimator: str = None) -> str:
+    """Baholovchi: argument yoki settings.FEATURE_ESTIMATOR, to‘liq ko‘rinishda."""
+    return estimator_key(estimator or getattr(settings, "FEATURE_ESTIMATOR", "fft"))
+
+
+def model_estimator(estimator: str = None) -> str:
+    """
+    Bashorat uchun baholovchi. Scaler va modellar
+    settings.MODEL_FEATURE_ESTIMATOR (standart 'fft') xususiyatlarida
+    o‘qitilgan; boshqa baholovchi (masalan, welch — boshqa PSD masshtabi)
+    ularga o‘qitish taqsimotidan tashqari kirish beradi, shuning uchun rad
+    etiladi. settings.FEATURE_ESTIMATOR bu yerda ishlatilmaydi.
+    """
+    declared = estimator_key(getattr(settings, "MODEL_FEATURE_ESTIMATOR", "fft"))
+    if estimator is None:
+        return declared
+    if estimator_key(estimator) != declared:
+        raise ValueError(
+            f"Modellar '{declared}' xususiyatlarida o‘qitilgan, "
+            f"'{estimator_key(estimator)}' bilan bashorat qilib bo‘lmaydi.")
+    return declared
+
+
+def _to_json(features: np.ndarray) -> list:
+    """JSON uchun: NaN/inf (masalan, tekis kanal) null sifatida saqlanadi."""
+    return [float(v) if np.isfinite(v) else None for v in features]
+
+
+def _from_json(features: list) -> np.ndarray:
+    """Saqlangan vektor: null qiymatlar NaN ga qaytariladi."""
+    return np.array([np.nan if v is None else v for v in features], dtype=float)
+
+
+def load_signal_features(
+    training: TrainingSession,
+    windows: list[tuple[int, int]],
+    muscles: list,
+    fs: int = 1000,
+    cache=None,
+    estimator: str = None,
+) -> np.ndarray:
+    """
+    Mashq oynalari × mushaklar uchun signal xususiyatlari.
+    Saqlangan (va eskirmagan) vektorlar bitta so‘rov bilan o‘qiladi,
+    yetishmaganlari signal_features bilan hisoblanib, bazaga yoziladi.
+
+    windows: [(first_count, last_count), ...]
+    estimator: spektral baholovchi (resolve_estimator), kalitning bir qismi
+    Qaytadi: (len(windows), len(muscles), len(FEATURE_NAMES)) massiv
+    """
+    result = np.full((len(windows), len(muscles), len(FEATURE_NAMES)), np.nan)
+    if not windows or not muscles:
+        return result
+
+    unique = list(dict.fromkeys(tuple(w) for w in windows))
+    if len(unique) < len(windows):
+        # Takroriy oynalar bir marta hisoblanadi va barcha o‘rinlariga tarqatiladi
+        features = load_signal_features(training, unique, muscles, fs, cache, estimator)
+        w_pos = {w: i for i, w in enumerate(unique)}
+        return features[[w_pos[tuple(w)] for w in windows]]
+
+    source = source_key(training)
+    estimator = resolve_estimator(estimator)
+    w_pos = {tuple(w): i for i, w in enumerate(windows)}
+    m_pos = {m.id: j for j, m in enumerate(muscles)}
+    stored = ExerciseFeatureVector.objects.filter(
+        training=training,
+        muscle_id__in=m_pos,
+        first_count__in={w[0] for w in windows},
+        fs=fs,
+        version=FEATURE_VERSION,
+        estimator=estimator,
+        source=source,
+    ).values_list('first_count', 'last_count', 'muscle_id', 'features')
+    missing = np.ones(result.shape[:2], dtype=bool)
+    for first, last, muscle_id, features in stored:
+        i = w_pos.get((first, last))
+        if i is not None and len(features) == len(FEATURE_NAMES):
+            result[i, m_pos[muscle_id]] = _from_json(features)
+            missing[i, m_pos[muscle_id]] = False
+
+    if not missing.any():
+        return result
+
+    if cache is None:
+        cache = open_signal_cache(training.id, training.file_EMT.path)
+    read = cache.window if cache is not None else training.emt_channel_window
+
+    new_rows = []
+    for i in np.flatnonzero(missing.any(axis=1)):
+        first, last = windows[i]
+        cols = np.flatnonzero(missing[i])
+        signals = np.vstack([
+            np.asarray(read(muscles[j].shortname, first, last + 1), dtype=float)
+            for j in cols
+        ])
+        feats = signal_features(
+            np.nan_to_num(signals, nan=0.0), fs=fs, estimator=estimator)
+        result[i, cols] = feats
+        new_rows += [
+            ExerciseFeatureVector(
+                training=training, muscle=muscles[j], first_count=first,
+                last_count=last, fs=fs, version=FEATURE_VERSION,
+                estimator=estimator, source=source, features=_to_json(f),
+            )
+            for j, f in zip(cols, feats)
+        ]
+
+    # Eskirgan (boshqa imzoli) yozuvlar shu kalit bo‘yicha almashtiriladi
+    ExerciseFeatureVector.objects.bulk_create(
+        new_rows,
+        update_conflicts=True,
+        unique_fields=["training", "muscle", "first_count", "last_count",
+                       "fs", "version", "estimator"],
+        update_fields=["source", "features"],
+    )
+    return result
+
+
+# Model kirishidagi ustunlar: signal xususiyatlari + BMI, signal uzunligi, yurak urishi
+DATASET_COLUMNS = [*FEATURE_NAMES, "bmi", "signal_length", "hrate"]
+
+
+def fatigue_rows(training: TrainingSession, muscle_shortnames: list[str] = None) -> list:
+    """Mashg‘ulotning MuscleFatigue qatorlari (mashq, mushak bilan; shu tartibda)."""
+    rows = MuscleFatigue.objects.filter(
+        exercise__training=training).select_related('exercise', 'muscle')
+    if muscle_shortnames:
+        rows = rows.filter(muscle__shortname__in=muscle_shortnames)
+    return list(rows.order_by('exercise_id', 'muscle_id'))
+
+
+def feature_matrix(
+    training: TrainingSession,
+    rows: list,
+    fs: int = 1000,
+    estimator: str = None,
+    bmi: float = None,
+) -> np.ndarray:
+    """
+    MuscleFatigue qatorlari uchun model kirish matritsasi (n, len(DATASET_COLUMNS)).
+    Mashq oynalari × mushaklar xususiyatlari bitta load_signal_features
+    chaqiruvi bilan (signal keshi bir marta ochiladi) olinadi.
+    bmi berilmasa — sportchining oxirgi parametrlaridan (yo‘q bo‘lsa NaN).
+    """
+    exercises = list({r.exercise_id: r.exercise for r in rows}.values())
+    muscles = list({r.muscle_id: r.muscle for r in rows}.values())
+    e_pos = {e.id: i for i, e in enumerate(exercises)}
+    m_pos = {m.id: j for j, m in enumerate(muscles)}
+    if bmi is None:
+        params = training.athlete.params.last() if rows else None
+        bmi = params.bmi if params is not None else np.nan
+
+    signal_feats = load_signal_features(
+        training, [(e.first_count, e.last_count) for e in exercises], muscles,
+        fs=fs, cache=training.signal_cache() if rows else None, estimator=estimator,
+    )
+    return np.array([
+        [*signal_feats[e_pos[r.exercise_id], m_pos[r.muscle_id]],
+         bmi, r.exercise.signal_length, r.exercise.hrate]
+        for r in rows
+    ], dtype=float).reshape(len(rows), len(DATASET_COLUMNS))
+
+
+def training_dataset(
+    training: TrainingSession,
+    muscle_shortnames: list[str] = None,
+    fs: int = 1000,
+    estimator: str = None,
+) -> dict:
+    """
+    Mashg‘ulotdagi MuscleFatigue yozuvlaridan o‘qitish to‘plami qatorlari.
+    Signal mashg‘ulot keshidan (memmap) bir marta ochiladi, barcha mashq
+    oynalari × mushaklar shu keshdan o‘qiladi — oraliq fayllarsiz.
+
+    Qaytadi: {"X": (n, len(DATASET_COLUMNS)), "y": (n,), "training", "exercise", "muscle"}
+    """
+    rows = fatigue_rows(training, muscle_shortnames)
+    return {
+        "X": feature_matrix(training, rows, fs=fs, estimator=estimator),
+        "y": np.array([r.fatigue for r in rows], dtype=float),
+        "training": np.full(len(rows), training.id, dtype=np.int64),
+        "exercise": np.array([r.exercise_id for r in rows], dtype=np.int64),
+        "muscle": np.array([r.muscle_id for r in rows], dtype=np.int64),
+    }
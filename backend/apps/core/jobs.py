@@ -0,0 +1,127 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import JobKind, JobStatus, ProcessingJob, TrainingSession
+
+
+def ingest_training(training: TrainingSession) -> None:
+    """
+    Yuklangan EMT fayldan hosilaviy ma'lumotlarni quradi:
+    signal keshi, ko‘p darajali piramida, EMT satrlar indeksi, spektrogramma,
+    davomiylik. Yurak urishi ECG fayl bo‘lmasa analitik rampadan olinadi
+    (TrainingSession.heart_rate). Qayta ishga tushirilsa ham natija o‘zgarmaydi
+    (idempotent).
+    """
+    rows_count = training.signal_cache().rows
+    training.signal_pyramid()
+    training.emt_line_index()
+    training.spectrogram()
+    if training.file_ECG:
+        # Qurilma ECG fayli — prefiks indeksi oldindan quriladi
+        training.ecg_index()
+    # Fayllar qurilgach faqat yakuniy yozuv tranzaksiyada — SQLite yozish
+    # qulfi fayllarni qayta ishlash davomida ushlab turilmaydi
+    with transaction.atomic():
+        training.duration = rows_count or 0
+        training.save(update_fields=["duration"])
+
+
+HANDLERS = {
+    JobKind.INGEST_TRAINING: lambda job: ingest_training(job.training),
+}
+
+
+def enqueue(kind: str, training: TrainingSession = None) -> ProcessingJob:
+    """
+    Vazifani navbatga qo‘yadi. settings.JOBS_ASYNC o‘chirilgan bo‘lsa,
+    vazifa shu zahoti (so‘rov ichida) bajariladi.
+    """
+    job = ProcessingJob.objects.create(kind=kind, training=training)
+    if not getattr(settings, "JOBS_ASYNC", True):
+        # Sinxron rejimda worker yo‘q — xatolik qayta navbatga qo‘yilmaydi
+        run_job(job, requeue=False)
+    return job
+
+
+def claim_next_job():
+    """
+    Navbatdagi vazifani band qiladi (bir nechta worker uchun xavfsiz).
+    Qayta urinish vaqti (not_before) kelmagan vazifalar o‘tkazib yuboriladi.
+    """
+    ready = ProcessingJob.objects.filter(status=JobStatus.PENDING).filter(
+        Q(not_before__isnull=True) | Q(not_before__lte=timezone.now()))
+    for job in ready[:10]:
+        claimed = ProcessingJob.objects.filter(
+            id=job.id, status=JobStatus.PENDING
+        ).update(status=JobStatus.RUNNING, started_at=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Eksponensial kechikish: JOBS_RETRY_DELAY * 2^(urinish-1)."""
+    base = getattr(settings, "JOBS_RETRY_DELAY", 30)
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def run_job(job: ProcessingJob, requeue: bool = True) -> ProcessingJob:
+    """
+    Vazifani bajaradi; xatolikda urinishlar tugaguncha eksponensial
+    kechikish bilan (not_before) qayta navbatga qo‘yadi.
+    requeue=False — xatolikda vazifa darhol FAILED (sinxron rejim).
+    """
+    job.status = JobStatus.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    job.attempts += 1
+    try:
+        HANDLERS[job.kind](job)
+    except Exception:
+        job.error = traceback.format_exc()
+        if requeue and job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.not_before = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = JobStatus.FAILED
+    else:
+        job.error = None
+        job.status = JobStatus.DONE
+        job.not_before = None
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def stale_before():
+    """Shu vaqtdan oldin boshlangan RUNNING vazifalar to‘xtab qolgan hisoblanadi."""
+    return timezone.now() - timedelta(seconds=getattr(settings, "JOBS_STALE_AFTER", 600))
+
+
+def retry_job(job: ProcessingJob) -> bool:
+    """
+    Vazifani qo‘lda qayta ishga tushiradi: FAILED, navbatda kutayotgan
+    (PENDING, jumladan kechikishdagi) yoki to‘xtab qolgan RUNNING vazifa
+    urinishlari nolga tushirilib, darhol navbatga qo‘yiladi.
+    Sinxron rejimda vazifa shu zahoti bajariladi. Qaytadi: qayta qo‘yildimi.
+    """
+    retryable = Q(status__in=[JobStatus.FAILED, JobStatus.PENDING]) | Q(
+        status=JobStatus.RUNNING, started_at__lt=stale_before())
+    reset = ProcessingJob.objects.filter(retryable, id=job.id).update(
+        status=JobStatus.PENDING, attempts=0, not_before=None)
+    job.refresh_from_db()
+    if reset and not getattr(settings, "JOBS_ASYNC", True):
+        run_job(job, requeue=False)
+    return bool(reset)
+
+
+def requeue_stale_jobs(older_than) -> int:
+    """Worker to‘xtab qolgan (uzoq vaqt RUNNING) vazifalarni qayta navbatga qo‘yadi."""
+    return ProcessingJob.objects.filter(
+        status=JobStatus.RUNNING, started_at__lt=timezone.now() - older_than
+    ).update(status=JobStatus.PENDING)
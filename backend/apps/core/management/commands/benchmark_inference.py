@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.utils.ai import inference
+from apps.utils.ai.batching import MicroBatcher
+from apps.utils.ai.calculate_fatigue import current_dir
+
+
+class Command(BaseCommand):
+    help = "Keras va NumPy backendlarining bitta qator va paketli bashorat kechikishini o‘lchaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", default="model_LBBCL.keras",
+            help="apps/utils/ai dagi model fayli.")
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1, 64, 1024],
+            help="Paket o‘lchamlari.")
+        parser.add_argument(
+            "--repeat", type=int, default=50,
+            help="Har bir o‘lcham uchun takrorlar soni.")
+        parser.add_argument(
+            "--backend", nargs="+", choices=inference.BACKENDS,
+            default=list(inference.BACKENDS))
+        parser.add_argument(
+            "--concurrency", type=int, default=0,
+            help="Shuncha parallel oqimdan bitta qatorli so‘rovlar MicroBatcher "
+                 "orqali yuboriladi va erishilgan paket o‘lchamlari chiqariladi.")
+
+    def handle(self, *args, **options):
+        model_path = os.path.join(current_dir, options["model"])
+        rng = np.random.default_rng(0)
+        self.stdout.write(f"{'backend':<8} {'rows':>6} {'p50, ms':>10} {'p99, ms':>10} {'qator/s':>12}")
+        for backend in options["backend"]:
+            # birinchi chaqiruv: yuklash va tracing o‘lchovga kirmaydi
+            inference.predict(model_path, rng.normal(size=(1, 18)), backend=backend)
+            for rows in options["rows"]:
+                X = rng.normal(size=(rows, 18))
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    inference.predict(model_path, X, backend=backend)
+                    timings.append(time.perf_counter() - started)
+                p50, p99 = np.percentile(timings, [50, 99]) * 1000
+                self.stdout.write(
+                    f"{backend:<8} {rows:>6} {p50:>10.3f} {p99:>10.3f} "
+                    f"{rows / np.median(timings):>12.0f}")
+            if options["concurrency"] > 0:
+                self._benchmark_batcher(model_path, backend, options)
+
+    def _benchmark_batcher(self, model_path, backend, options):
+        """Parallel bitta qatorli so‘rovlar: o‘tkazuvchanlik va paket o‘lchamlari."""
+        batcher = MicroBatcher(
+            max_batch_size=getattr(settings, "INFERENCE_BATCH_MAX_SIZE", 64),
+            max_wait_ms=getattr(settings, "INFERENCE_BATCH_MAX_WAIT_MS", 5.0),
+            log_interval=0,
+        )
+        X = np.random.default_rng(1).normal(size=(1, 18))
+        requests = options["concurrency"] * options["repeat"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(
+                lambda _: batcher.predict(model_path, X, backend=backend),
+                range(requests)))
+        elapsed = time.perf_counter() - started
+
+        stats = batcher.stats()
+        self.stdout.write(
+            f"{backend:<8} paketlash: {options['concurrency']} oqim, {requests} so‘rov, "
+            f"{requests / elapsed:.0f} so‘rov/s — {stats['batches']} paket, "
+            f"o‘rtacha {stats['mean_batch_size']:.1f}, maksimal {stats['max_batch_size']} qator")
+        self.stdout.write(f"{'':<8} paket o‘lchamlari: {stats['histogram']}")
@@ -0,0 +1,114 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.management.parallel import (
+    add_training_arguments,
+    run_per_training,
+    training_ids,
+)
+from apps.utils.emg_features import FEATURE_VERSION
+
+FORMATS = ("npz", "parquet")
+
+
+def _build(training_id, muscles, fs, estimator):
+    """Bitta mashg‘ulot qatorlari: (training_id, dataset, xatolik)."""
+    from apps.core.features import training_dataset
+    from apps.core.models import TrainingSession
+
+    try:
+        training = TrainingSession.objects.get(id=training_id)
+        return training_id, training_dataset(
+            training, muscle_shortnames=muscles, fs=fs, estimator=estimator), None
+    except Exception as e:
+        return training_id, None, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Belgilangan mashq oynalari va MuscleFatigue qiymatlaridan modelni qayta "
+        "o‘qitish uchun xususiyatlar to‘plamini (npz yoki Parquet) yig‘adi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Natija fayli (.npz yoki .parquet).")
+        parser.add_argument(
+            "--format", choices=FORMATS,
+            help="Fayl formati (standart — kengaytmadan aniqlanadi).")
+        add_training_arguments(parser)
+        parser.add_argument("--fs", type=int, default=1000, help="Diskretlash chastotasi.")
+        parser.add_argument(
+            "--estimator",
+            help="Spektral baholovchi: 'fft' yoki 'welch[:segment[:overlap]]' "
+                 "(standart — settings.FEATURE_ESTIMATOR).")
+
+    def handle(self, *args, **options):
+        # Modellar shu yerda import qilinadi: spawn worker bu modulni
+        # django.setup() dan oldin yuklaydi
+        from apps.core.features import DATASET_COLUMNS, resolve_estimator
+
+        output = options["output"]
+        fmt = options["format"] or ("parquet" if output.endswith(".parquet") else "npz")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError("Parquet uchun pyarrow o‘rnatilmagan (--format npz dan foydalaning).")
+        try:
+            estimator = resolve_estimator(options["estimator"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        ids = training_ids(options, with_fatigue=True)
+
+        parts, failed = {}, 0
+        total = len(ids)
+        started = time.monotonic()
+        args = (options["muscle"], options["fs"], estimator)
+        for i, (training_id, part, error) in enumerate(
+                run_per_training(_build, ids, args, options["workers"]), start=1):
+            if error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(
+                    f"[{i}/{total}] ⚠️ mashg‘ulot {training_id}: {error}"))
+                continue
+            parts[training_id] = part
+            self.stdout.write(f"[{i}/{total}] mashg‘ulot {training_id}: {len(part['y'])} ta qator")
+
+        # Natija tartibi workerlar tugash tartibiga bog‘liq bo‘lmasin
+        parts = [parts[tid] for tid in sorted(parts)]
+        dataset = {
+            key: np.concatenate([p[key] for p in parts]) if parts else np.empty(0)
+            for key in ("X", "y", "training", "exercise", "muscle")
+        }
+        if not parts:
+            dataset["X"] = np.empty((0, len(DATASET_COLUMNS)))
+        self._write(output, fmt, dataset, DATASET_COLUMNS, estimator)
+
+        elapsed = time.monotonic() - started
+        rows = len(dataset["y"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {rows} ta qator ({len(parts)} ta mashg‘ulot) → {output} — "
+            f"{elapsed:.1f} s, {rows / elapsed if elapsed else 0.0:.1f} qator/s"
+            + (f", {failed} ta mashg‘ulotda xatolik" if failed else "")))
+
+    @staticmethod
+    def _write(output, fmt, dataset, columns, estimator):
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if fmt == "npz":
+            np.savez_compressed(
+                output, columns=np.array(columns), feature_version=FEATURE_VERSION,
+                estimator=estimator, **dataset)
+            return
+
+        import pandas as pd
+
+        frame = pd.DataFrame(dataset["X"], columns=columns)
+        frame["fatigue"] = dataset["y"]
+        for key in ("training", "exercise", "muscle"):
+            frame[f"{key}_id"] = dataset[key]
+        frame.attrs = {"feature_version": FEATURE_VERSION, "estimator": estimator}
+        frame.to_parquet(output, index=False)
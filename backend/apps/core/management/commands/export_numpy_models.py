@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Muscle
+from apps.utils.ai.calculate_fatigue import current_dir
+from apps.utils.ai.inference import load_model_cached
+from apps.utils.ai.numpy_model import export_model, npz_path_for
+
+
+class Command(BaseCommand):
+    help = (
+        "apps/utils/ai dagi va Muscle.model_url dagi Keras modellarini "
+        "NumPy backendi uchun .npz fayllarga eksport qiladi."
+    )
+
+    def handle(self, *args, **options):
+        model_urls = sorted(
+            {name for name in os.listdir(current_dir) if name.endswith(".keras")}
+            | set(Muscle.objects.exclude(model_url="").values_list("model_url", flat=True))
+        )
+        for model_url in model_urls:
+            model_path = os.path.join(current_dir, model_url)
+            if not os.path.exists(model_path):
+                self.stdout.write(self.style.WARNING(f"⚠️ Model topilmadi: {model_url}"))
+                continue
+            npz_path = npz_path_for(model_path)
+            info = export_model(load_model_cached(model_path), npz_path)
+            shape = " -> ".join(
+                f"{layer['units']} ({layer['activation']})" for layer in info["layers"])
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {model_url} -> {os.path.basename(npz_path)}: {shape}"))
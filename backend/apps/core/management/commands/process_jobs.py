@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.jobs import claim_next_job, requeue_stale_jobs, run_job
+from apps.core.models import JobStatus
+from apps.utils.ai.calculate_fatigue import preload_inference
+
+
+class Command(BaseCommand):
+    help = "Fon vazifalari navbatini bajaruvchi worker (tashqi broker kerak emas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Navbatdagi barcha vazifalarni bajarib, chiqib ketish.")
+        parser.add_argument(
+            "--sleep", type=float, default=2.0,
+            help="Navbat bo‘sh bo‘lganda kutish (sekund).")
+        parser.add_argument(
+            "--stale-after", type=int, default=settings.JOBS_STALE_AFTER,
+            help="Shuncha sekunddan beri RUNNING bo‘lgan vazifalar qayta navbatga qo‘yiladi.")
+
+    def handle(self, *args, **options):
+        preload_inference()
+        stale_after = timedelta(seconds=options["stale_after"])
+        requeued = requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(f"♻️ {requeued} ta to‘xtab qolgan vazifa qayta navbatga qo‘yildi")
+
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            job = run_job(job)
+            elapsed = time.monotonic() - started
+            if job.status == JobStatus.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {job} — {elapsed:.2f} s"))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {job} — urinish {job.attempts}/{job.max_attempts}"))
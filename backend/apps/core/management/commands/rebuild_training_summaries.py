@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.summaries import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "TrainingMuscleSummary jadvalini MuscleFatigue yozuvlaridan qayta quradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--training", type=int, nargs="*",
+            help="Faqat shu mashg‘ulot ID lari uchun.")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        count = rebuild_all(options["training"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {count} ta mashg‘ulot ko‘rsatkichlari qayta qurildi"))
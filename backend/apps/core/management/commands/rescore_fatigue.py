@@ -0,0 +1,145 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.management.parallel import (
+    add_training_arguments,
+    run_per_training,
+    training_ids,
+)
+
+CHECKPOINT_NAME = "rescore_fatigue.checkpoint.json"
+# "database is locked" bo‘lsa mashg‘ulot shuncha marta qayta urinadi
+LOCK_RETRIES = 3
+LOCK_RETRY_DELAY = 1.0
+
+
+def _write_json(path: str, data: dict) -> None:
+    """JSON faylni atomar yozadi (vaqtinchalik fayl + os.replace)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _rescore(training_id, muscles, batch_size, backend, estimator):
+    """Bitta mashg‘ulotni qayta hisoblaydi: (training_id, mashqlar soni, xatolik)."""
+    from django.db import OperationalError
+
+    from apps.core.models import TrainingSession
+    from apps.utils.ai.calculate_fatigue import rescore_training
+
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            training = TrainingSession.objects.get(id=training_id)
+            return training_id, rescore_training(
+                training, muscle_shortnames=muscles, batch_size=batch_size,
+                backend=backend, estimator=estimator), None
+        except OperationalError as e:
+            # SQLite: boshqa yozuvchi qulfni ushlab tursa, qayta urinamiz
+            # (qayta hisoblash idempotent)
+            if "locked" not in str(e) or attempt == LOCK_RETRIES:
+                return training_id, 0, str(e)
+            time.sleep(LOCK_RETRY_DELAY * 2 ** attempt)
+        except Exception as e:
+            return training_id, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mavjud MuscleFatigue yozuvlarini joriy model va scaler bilan qayta hisoblaydi "
+        "(mashg‘ulotlar bo‘yicha jarayonlar puliga bo‘linadi)."
+    )
+
+    def add_arguments(self, parser):
+        add_training_arguments(parser)
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="bulk_update bo‘lagi hajmi.")
+        parser.add_argument(
+            "--backend", choices=["keras", "numpy"],
+            help="Bashorat backendi (standart — settings.INFERENCE_BACKEND).")
+        parser.add_argument(
+            "--estimator",
+            help="Spektral baholovchi (standart va yagona ruxsat etilgani — modellar "
+                 "o‘qitilgan settings.MODEL_FEATURE_ESTIMATOR).")
+        parser.add_argument(
+            "--checkpoint", default=os.path.join(settings.MEDIA_ROOT, CHECKPOINT_NAME),
+            help="Bajarilgan mashg‘ulotlar saqlanadigan fayl (davom ettirish uchun).")
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Checkpoint ni e'tiborsiz qoldirib, boshidan boshlash.")
+
+    def handle(self, *args, **options):
+        # Modellar shu yerda import qilinadi: spawn worker bu modulni
+        # django.setup() dan oldin yuklaydi
+        from apps.core.features import model_estimator
+
+        try:
+            model_estimator(options["estimator"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        ids = training_ids(options)
+
+        params = {
+            "athlete": options["athlete"],
+            "since": str(options["since"]) if options["since"] else None,
+            "muscle": options["muscle"],
+            "estimator": options["estimator"],
+        }
+        checkpoint = options["checkpoint"]
+        done = set() if options["restart"] else self._load_checkpoint(checkpoint, params)
+        pending = [tid for tid in ids if tid not in done]
+        if done:
+            self.stdout.write(
+                f"↪️ Checkpoint: {len(ids) - len(pending)} ta mashg‘ulot o‘tkazib yuborildi")
+
+        total, exercises, failed = len(pending), 0, 0
+        started = time.monotonic()
+        args = (options["muscle"], options["batch_size"], options["backend"],
+                options["estimator"])
+        for i, (training_id, count, error) in enumerate(
+                run_per_training(_rescore, pending, args, options["workers"]), start=1):
+            elapsed = time.monotonic() - started
+            if error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(
+                    f"[{i}/{total}] ⚠️ mashg‘ulot {training_id}: {error}"))
+                continue
+            exercises += count
+            done.add(training_id)
+            self._save_checkpoint(checkpoint, params, done)
+            self.stdout.write(
+                f"[{i}/{total}] mashg‘ulot {training_id}: {count} ta mashq "
+                f"({exercises / elapsed:.1f} mashq/s)")
+
+        elapsed = time.monotonic() - started
+        rate = exercises / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {exercises} ta mashq qayta hisoblandi — {elapsed:.1f} s, "
+            f"{rate:.1f} mashq/s"
+            + (f", {failed} ta mashg‘ulotda xatolik" if failed else "")))
+        if not failed and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    @staticmethod
+    def _load_checkpoint(path, params) -> set:
+        if not os.path.exists(path):
+            return set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if data.get("params") != params:
+            return set()
+        return set(data.get("done", []))
+
+    @staticmethod
+    def _save_checkpoint(path, params, done) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _write_json(path, {"params": params, "done": sorted(done)})
@@ -0,0 +1,78 @@
+"""
+Mashg‘ulotlar bo‘yicha ishlaydigan buyruqlar (rescore_fatigue,
+build_feature_dataset) uchun umumiy qismlar: mashg‘ulot filtrlari va
+spawn jarayonlar puli.
+
+Modellar faqat funksiyalar ichida import qilinadi: spawn worker bu
+modulni django.setup() dan oldin yuklaydi.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+
+def add_training_arguments(parser) -> None:
+    """--athlete, --since, --muscle va --workers argumentlari."""
+    parser.add_argument(
+        "--athlete", type=int, nargs="*",
+        help="Faqat shu sportchi ID lari uchun.")
+    parser.add_argument(
+        "--since", type=date.fromisoformat,
+        help="Shu sanadan (YYYY-MM-DD) beri yaratilgan mashg‘ulotlar.")
+    parser.add_argument(
+        "--muscle", nargs="*",
+        help="Faqat shu mushak qisqa nomlari (masalan, LBBCL RPM).")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Parallel jarayonlar soni (1 — joriy jarayonda).")
+
+
+def training_ids(options, with_fatigue: bool = False) -> list[int]:
+    """
+    EMT fayli bor mashg‘ulotlar ID lari (sportchi, sana va mushak bo‘yicha
+    filtrlangan). with_fatigue — faqat MuscleFatigue yozuvlari borlari.
+    """
+    from apps.core.models import TrainingSession
+
+    trainings = TrainingSession.objects.exclude(file_EMT="").order_by("id")
+    if options["athlete"]:
+        trainings = trainings.filter(athlete_id__in=options["athlete"])
+    if options["since"]:
+        trainings = trainings.filter(created_at__date__gte=options["since"])
+    if with_fatigue:
+        trainings = trainings.filter(execise__muscle_fatigue__isnull=False)
+    if options["muscle"]:
+        trainings = trainings.filter(
+            execise__muscle_fatigue__muscle__shortname__in=options["muscle"])
+    return list(trainings.values_list("id", flat=True).distinct())
+
+
+def _init_worker():
+    """Worker jarayonida Django ni sozlaydi (har bir worker modellarni bir marta yuklaydi)."""
+    import django
+    from django.db import connections
+
+    django.setup()
+    connections.close_all()
+
+
+def run_per_training(func, ids, args, workers: int = 1):
+    """
+    func(training_id, *args) ni har bir mashg‘ulot uchun bajaradi va
+    natijalarni tugash tartibida qaytaradi. workers > 1 bo‘lsa — spawn
+    jarayonlar puli (har bir worker toza jarayon: TensorFlow fork bilan
+    xavfsiz emas). func modul darajasidagi funksiya bo‘lishi kerak.
+    """
+    if workers <= 1:
+        for training_id in ids:
+            yield func(training_id, *args)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        futures = [pool.submit(func, tid, *args) for tid in ids]
+        for future in as_completed(futures):
+            yield future.result()
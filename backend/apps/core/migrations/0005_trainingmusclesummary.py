@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_processingjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingMuscleSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('avg_fatigue', models.FloatField(default=0, verbose_name='O‘rtacha charchoq')),
+                ('total_load', models.FloatField(default=0, verbose_name='Umumiy yuklama')),
+                ('k_adapt_load', models.FloatField(blank=True, null=True, verbose_name='Yuklamaga moslashish koeffitsiyenti')),
+                ('exercise_count', models.PositiveIntegerField(default=0, verbose_name='Mashqlar soni')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Versiya')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('muscle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_summaries', to='core.muscle')),
+                ('training', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='muscle_summaries', to='core.trainingsession')),
+            ],
+            options={
+                'verbose_name': 'Mashg‘ulot mushak ko‘rsatkichi',
+                'verbose_name_plural': 'Mashg‘ulot mushak ko‘rsatkichlari',
+                'constraints': [models.UniqueConstraint(fields=('training', 'muscle'), name='unique_training_muscle_summary')],
+            },
+        ),
+    ]
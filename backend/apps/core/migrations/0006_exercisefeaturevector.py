@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_trainingmusclesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseFeatureVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_count', models.PositiveIntegerField(verbose_name="Boshlang'ich vaqt")),
+                ('last_count', models.PositiveIntegerField(verbose_name='Yakuniy vaqt')),
+                ('fs', models.PositiveIntegerField(default=1000, verbose_name='Diskretlash chastotasi')),
+                ('version', models.PositiveSmallIntegerField(verbose_name='Algoritm versiyasi')),
+                ('source', models.CharField(max_length=255, verbose_name='EMT fayl imzosi')),
+                ('features', models.JSONField(default=list, verbose_name='Xususiyatlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('muscle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feature_vectors', to='core.muscle')),
+                ('training', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feature_vectors', to='core.trainingsession')),
+            ],
+            options={
+                'verbose_name': 'Mashq xususiyatlari',
+                'verbose_name_plural': 'Mashq xususiyatlari',
+                'constraints': [models.UniqueConstraint(fields=('training', 'muscle', 'first_count', 'last_count', 'fs', 'version'), name='unique_exercise_feature_vector')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_exercisefeaturevector'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='exercisefeaturevector',
+            name='unique_exercise_feature_vector',
+        ),
+        migrations.AddField(
+            model_name='exercisefeaturevector',
+            name='estimator',
+            field=models.CharField(default='fft', max_length=32, verbose_name='Spektral baholovchi'),
+        ),
+        migrations.AddField(
+            model_name='musclefatigue',
+            name='estimator',
+            field=models.CharField(default='fft', max_length=32, verbose_name='Spektral baholovchi'),
+        ),
+        migrations.AddConstraint(
+            model_name='exercisefeaturevector',
+            constraint=models.UniqueConstraint(fields=('training', 'muscle', 'first_count', 'last_count', 'fs', 'version', 'estimator'), name='unique_exercise_feature_vector'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def backfill_summaries(apps, schema_editor):
+    """Mavjud MuscleFatigue yozuvlaridan TrainingMuscleSummary jadvalini to‘ldiradi."""
+    from apps.core import summaries
+
+    summaries.rebuild_all(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_spectral_estimator'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
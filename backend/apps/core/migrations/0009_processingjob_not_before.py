@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_backfill_training_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='not_before',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Keyingi urinish vaqti'),
+        ),
+    ]
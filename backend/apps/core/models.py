@@ -1,7 +1,35 @@
 from django.db import models
-from django.db.models.functions import Lower
 import pandas as pd
 import numpy as np
+from apps.utils.functions.emt_index import (
+    EMTLineIndex,
+    open_line_index,
+    write_line_index,
+)
+from apps.utils.functions.emt_parser import read_emt, read_ecg
+from apps.utils.functions.heart_rate import HeartRateRamp
+from apps.utils.functions.muscle_index import get_muscle_index
+from apps.utils.functions.range_index import RangeIndex
+from apps.utils.functions.signal_pyramid import (
+    SignalPyramid,
+    build_pyramid,
+    open_pyramid,
+)
+from apps.utils.functions.spectrogram import (
+    DEFAULT_HOP_MS,
+    DEFAULT_WINDOW_MS,
+    SessionSpectrogram,
+    build_spectrogram,
+    compute_spectrogram,
+    open_spectrogram,
+)
+from apps.utils.functions.signal_cache import (
+    SignalCache,
+    open_ecg_index,
+    open_signal_cache,
+    write_ecg_index,
+    write_signal_cache,
+)
 
 
 class Athlete(models.Model):
@@ -139,91 +167,173 @@ class TrainingSession(models.Model):
     created_at = models.DateTimeField("Yaratilgan sana", auto_now_add=True)
     updated_at = models.DateTimeField("Yangilangan sana", auto_now=True)
 
-    def emt_muscles_to_df(self) -> pd.DataFrame:
+    def _parse_emt(self) -> tuple[list[dict], int]:
         """
-        EMT fayldan faqat mushak (EMG) ustunlarini o‘qiydi.
-        'Frame' yoki 'Time' kabi texnik ustunlarni tashlab ketadi.
+        EMT faylni oqim bilan o‘qib, kanallarni raqamli massivlarga aylantiradi.
+        'Frame' va 'Time' ustunlari tashlab ketiladi, 'Time' dan fs aniqlanadi.
+        """
+        emt = read_emt(self.file_EMT.path)
+
+        # Ustun nomi -> Muscle.shortname (jarayon darajasidagi indeksdan, so‘rovsiz)
+        muscles = get_muscle_index()
+        channels = []
+        for col, data in emt.columns.items():
+            shortname = muscles.shortname(col)
+            channels.append({
+                'name': shortname or col,
+                'column': col,
+                'shortname': shortname,
+                'data': data,
+            })
+        return channels, emt.fs
+
+    def signal_cache(self) -> SignalCache:
+        """
+        EMT signallarining memmap keshini qaytaradi.
+        Kesh yo‘q bo‘lsa yoki file_EMT o‘zgargan bo‘lsa — qayta quriladi.
         """
-        # path o'qish va data_start_idx ni topish qismi o'zgarishsiz qoladi
         path = self.file_EMT.path
-        rows = []
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines: list[str] = f.readlines()
-
-        for line in lines[10:]:
-            rows.append([item.strip()
-                        for item in line.replace('\n', '').split('\t')])
-
-        cols = rows[0]
-        data = rows[1:]
-        columns_to_drop = ['Frame', 'Time']
-
-        df = pd.DataFrame(data=data, columns=cols)
-        df = df.drop(columns=columns_to_drop, axis=1)
-        cols = df.columns.tolist()
-        col_ids = Muscle.objects.annotate(name_lower=Lower('name')).filter(
-            name_lower__in=[c.lower() for c in cols]
-        ).values_list('shortname', flat=True)
-
-        len(cols)
-        len(col_ids)
-        columns = dict(
-            zip(cols, col_ids)
-        )
-        return df.rename(columns=columns)
+        cache = open_signal_cache(self.id, path)
+        if cache is None:
+            channels, fs = self._parse_emt()
+            cache = write_signal_cache(self.id, path, channels, fs)
+        return cache
+
+    def signal_pyramid(self) -> SignalPyramid:
+        """Ko‘p darajali min/max/mean piramida (yo‘q bo‘lsa — quriladi)."""
+        cache = self.signal_cache()
+        return open_pyramid(cache) or build_pyramid(cache)
+
+    def spectrogram(self, window_ms=DEFAULT_WINDOW_MS, hop_ms=DEFAULT_HOP_MS) -> SessionSpectrogram:
+        """
+        Siljuvchi oyna (window_ms, qadam hop_ms) bo‘yicha har bir kanalning
+        MDF/MNF/RMS/diapazon nisbati. Faqat standart variant diskka
+        keshlanadi, qolganlari har safar xotirada hisoblanadi.
+        """
+        cache = self.signal_cache()
+        window = max(int(window_ms * cache.fs // 1000), 2)
+        hop = max(int(hop_ms * cache.fs // 1000), 1)
+        if (window_ms, hop_ms) != (DEFAULT_WINDOW_MS, DEFAULT_HOP_MS):
+            return compute_spectrogram(cache, window, hop)
+        return (open_spectrogram(cache, window, hop)
+                or build_spectrogram(cache, window, hop))
+
+    def emt_line_index(self) -> EMTLineIndex:
+        """EMT matn faylining satrlar indeksi (yo‘q yoki eskirgan bo‘lsa — quriladi)."""
+        path = self.file_EMT.path
+        return open_line_index(self.id, path) or write_line_index(self.id, path)
 
-    def ecg_to_dataframe(self):
+    def emt_channel_window(self, muscle_shortname, start, stop) -> np.ndarray:
+        """
+        Bitta kanalning [start, stop) oralig‘i. Signal keshi tayyor bo‘lsa —
+        memmap dan, aks holda satrlar indeksi orqali matn fayldan faqat
+        shu oyna satrlari o‘qiladi.
+        """
+        cache = open_signal_cache(self.id, self.file_EMT.path)
+        if cache is not None:
+            return cache.window(muscle_shortname, start, stop)
+
+        index = self.emt_line_index()
+        wanted = {muscle_shortname.lower()}
+        name = get_muscle_index().name_by_shortname.get(muscle_shortname)
+        if name is not None:
+            wanted.add(name.lower())
+        column = next((c for c in index.names if c.lower() in wanted), None)
+        if column is None:
+            raise KeyError(f"Kanal topilmadi: {muscle_shortname}")
+        return index.read_window(
+            self.file_EMT.path, start, stop, channels=[column]).columns[column]
+
+    def ecg_index(self) -> RangeIndex:
+        """
+        ECG qatori ustidagi prefiks yig‘indilar indeksi.
+        Indeks yo‘q yoki file_ECG o‘zgargan bo‘lsa — qayta quriladi.
+        """
         path = self.file_ECG.path
-        rows = []
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines: list[str] = f.readlines()
-
-        for line in lines:
-            rows.append(
-                [
-                    item.strip()
-                    for item in line.replace('\n', '').split('\t')
-                ]
-            )
+        index = open_ecg_index(self.id, path)
+        if index is None:
+            index = write_ecg_index(self.id, path, read_ecg(path))
+        return index
+
+    def ingest_in_progress(self) -> bool:
+        """Fayl qayta ishlash vazifasi hali tugamagan (navbatda yoki bajarilmoqda)."""
+        return self.jobs.filter(
+            kind=JobKind.INGEST_TRAINING,
+            status__in=[JobStatus.PENDING, JobStatus.RUNNING],
+        ).exists()
+
+    def heart_rate(self) -> RangeIndex | HeartRateRamp:
+        """
+        Yurak urishi qatori. Qurilma ECG fayli biriktirilgan bo‘lsa — uning
+        prefiks indeksi, aks holda pre/post qiymatlaridan analitik rampa
+        (fayl yozilmaydi, uzunlik EMT keshidan olinadi).
+        """
+        if self.file_ECG:
+            return self.ecg_index()
+        return HeartRateRamp(
+            self.pre_heart_rate, self.post_heart_rate, self.signal_cache().rows)
 
-        columns_to_drop = ['Data']
+    def emt_muscles_to_df(self) -> pd.DataFrame:
+        """
+        EMT fayldan faqat mushak (EMG) ustunlarini o‘qiydi (float32, keshdan).
+        'Frame' yoki 'Time' kabi texnik ustunlarni tashlab ketadi.
+        """
+        return self.signal_cache().to_dataframe()
 
-        return pd.DataFrame(data=rows, columns=columns_to_drop)
+    def ecg_to_dataframe(self) -> pd.DataFrame:
+        """ECG faylni (yo‘q bo‘lsa — rampa qiymatlarini) 'Data' ustunli DataFrame ga o‘qiydi."""
+        if not self.file_ECG:
+            return pd.DataFrame({'Data': self.heart_rate().values()})
+        return pd.DataFrame({'Data': read_ecg(self.file_ECG.path)})
 
-    def calculate_k_adapt_load(self, muscle_shortname, time_from=None, time_to=None):
+    @classmethod
+    def calculate_k_adapt_loads(cls, trainings, muscle_shortname) -> dict:
+        """
+        Bir nechta mashg‘ulot uchun k_adapt_load ni bitta so‘rov bilan hisoblaydi.
+        (training_id, signal_length, fatigue) qatorlari bir marta olinadi,
+        so‘ng mashg‘ulotlar bo‘yicha guruhlab vektorli hisoblanadi.
 
-        muscle_fatigues = MuscleFatigue.objects.filter(
+        Qaytadi: {training_id: k_adapt_load} (charchoq yozuvi yo‘q bo‘lsa 0)
+        """
+        trainings = list(trainings)
+        result = {t.id: 0 for t in trainings}
+        rows = MuscleFatigue.objects.filter(
             muscle__shortname=muscle_shortname,
-            exercise__training=self
-        ).order_by('exercise__training__id')
-
-        if muscle_fatigues.count() == 0:
-            return {
-                'k_adapt_load': 0,
-                'name': self.title,
-                'created_at': self.created_at
-            }
-        times = muscle_fatigues.values_list(
-            'exercise__signal_length', flat=True
+            exercise__training__in=[t.id for t in trainings]
+        ).order_by('exercise__training_id', 'id').values_list(
+            'exercise__training_id', 'exercise__signal_length', 'fatigue'
         )
+        if not rows:
+            return result
 
-        fatigues = muscle_fatigues.values_list('fatigue', flat=True)
-        # o‘rtacha qiymatlar
+        ids, times, fatigues = zip(*rows)
+        ids = np.array(ids)
         v_time = np.array(times, dtype=int)
         v_fatigue = np.array(fatigues, dtype=float)
-        print(v_time, times)
-        t_max = np.max(v_time)
-        t_norm = v_time / t_max
 
-        # 3. Umumiy yuklama
-        L_total = np.sum(v_fatigue * t_norm)
-        dHR = self.post_heart_rate - self.pre_heart_rate
+        # Guruh chegaralari (qatorlar training_id bo‘yicha saralangan)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        t_max = np.maximum.reduceat(v_time, starts)
+        sizes = np.diff(np.r_[starts, len(ids)])
+        t_norm = v_time / np.repeat(t_max, sizes)
+
+        # 3. Umumiy yuklama (har bir mashg‘ulot uchun)
+        weighted = v_fatigue * t_norm
+        by_id = {t.id: t for t in trainings}
+        for start, size in zip(starts, sizes):
+            training = by_id[int(ids[start])]
+            L_total = np.sum(weighted[start:start + size])
+            dHR = training.post_heart_rate - training.pre_heart_rate
+            # 5. S koeffitsienti
+            K = L_total / dHR
+            result[training.id] = K.tolist()
+        return result
 
-        # 5. S koeffitsienti
-        K = L_total / dHR
+    def calculate_k_adapt_load(self, muscle_shortname, time_from=None, time_to=None):
 
         return {
-            'k_adapt_load': K.tolist(),
+            'k_adapt_load': self.calculate_k_adapt_loads(
+                [self], muscle_shortname)[self.id],
             'name': self.title,
             'created_at': self.created_at
         }
@@ -276,91 +386,36 @@ class Exercise(models.Model):
     updated_at = models.DateTimeField("Yangilangan sana", auto_now=True)
 
     def calculate_hrate(self):
-        df = self.training.ecg_to_dataframe()
-        subset = df.iloc[self.first_count:self.last_count + 1]
-
-        if subset.empty:
+        """Mashq oynasidagi o‘rtacha yurak urishi (ECG indeksi yoki rampadan, O(1))."""
+        mean_val = self.training.heart_rate().mean(
+            self.first_count, self.last_count + 1
+        )
+        if mean_val is None:
             return None
+        return float(round(mean_val))
 
-        mean_val = subset.astype("Int64").mean(skipna=True)
-        return float(round(mean_val['Data']))
-
-    def calculate_emg_features(self, muscle_shortname,  fs=1000):
+    def calculate_emg_features(self, muscle_shortname,  fs=1000, cache=None, bmi=None,
+                               estimator=None):
         """
         signal: numpy array yoki list (EMG signal)
         fs: int (sampling frequency, default = 1000 Hz)
+        cache, bmi: bir nechta mushak uchun qayta ishlatiladigan (ixtiyoriy)
+        signal keshi va sportchi BMI qiymati
+        estimator: spektral baholovchi (None — settings.FEATURE_ESTIMATOR)
+        Signal xususiyatlari ExerciseFeatureVector jadvalidan o‘qiladi
+        (yo‘q bo‘lsa — hisoblanib, saqlanadi).
         """
-        # signalni numpy array shakliga keltiramiz
-        df: pd.DataFrame = self.training.emt_muscles_to_df()
-        df = df.iloc[self.first_count:self.last_count+1]
-        signal = df[muscle_shortname].astype(float).to_numpy()
-
-        # Agar NaN qiymatlar bo‘lsa, ularni 0 bilan almashtiramiz
-        if np.any(np.isnan(signal)):
-            signal = np.nan_to_num(signal, nan=0.0)
-
-        # ======= FREQUENCY FEATURES =======
-        N = len(signal)
-        X = np.fft.rfft(signal)
-        freqs = np.fft.rfftfreq(N, d=1.0/fs)
-        PSD_fft = np.abs(X)**2 / N
-
-        m0 = np.sum(PSD_fft)
-        MNF = np.sum(freqs * PSD_fft) / m0 if m0 != 0 else 0
-        amplitude = np.abs(X)
-        spectral_centroid = np.sum(
-            freqs * amplitude) / np.sum(amplitude) if np.sum(amplitude) != 0 else 0
-
-        cumulative_power = np.cumsum(PSD_fft)
-        MDF_idx = np.where(cumulative_power >= m0 / 2.0)[0][0]
-        MDF = freqs[MDF_idx]
-
-        spectral_variance = np.sum(
-            ((freqs - MNF)**2) * PSD_fft) / m0 if m0 != 0 else 0
-        spectral_variance = spectral_variance / (len(signal) - 1)
-        bandwidth = np.sqrt(spectral_variance)
-
-        eps = 1e-8
-        valid = freqs > 0
-        slope, _ = np.polyfit(freqs[valid], np.log10(
-            amplitude[valid] + eps), 1) if np.sum(valid) > 0 else (0, 0)
-
-        low_band = (freqs >= 20) & (freqs < 60)
-        high_band = (freqs >= 60) & (freqs <= 500)
-        low_power = np.sum(PSD_fft[low_band])
-        high_power = np.sum(PSD_fft[high_band])
-        band_power_ratio = low_power / high_power if high_power != 0 else np.nan
-
-        # ======= AMPLITUDE FEATURES =======
-        RMS = np.sqrt(np.mean(signal**2))
-        MAV = np.mean(np.abs(signal))
-        var_val = np.var(signal)
-        WL = np.sum(np.abs(np.diff(signal)))
-
-        # Dinamik threshold
-        signal_range = np.ptp(signal)
-        threshold_ssc = 0.01 * signal_range if signal_range > 0 else 0.01
-
-        ssc = 0
-        for i in range(1, len(signal) - 1):
-            diff1 = signal[i] - signal[i - 1]
-            diff2 = signal[i + 1] - signal[i]
-            if diff1 * diff2 < 0 and (abs(diff1) > threshold_ssc or abs(diff2) > threshold_ssc):
-                ssc += 1
-        ssc = ssc / (len(signal) - 1)
-
-        zc = np.where(np.diff(np.sign(signal)))[0]
-        ZCR = len(zc)
-
-        MAD = np.median(np.abs(signal - np.median(signal)))
-        wamp = np.sum(np.abs(np.diff(signal)) > threshold_ssc)
-
-        # Natija sifatida barcha xususiyatlarni ro‘yxatda qaytaramiz
-        return [
-            MDF, MNF, spectral_centroid, spectral_variance, bandwidth, slope,
-            band_power_ratio, RMS, MAV, var_val, WL, ssc, ZCR, MAD, wamp,
-            self.training.athlete.params.last().bmi, self.signal_length, self.hrate
-        ]
+        from apps.core.features import load_signal_features
+
+        if bmi is None:
+            bmi = self.training.athlete.params.last().bmi
+
+        muscle = Muscle.objects.get(shortname=muscle_shortname)
+        feats = load_signal_features(
+            self.training, [(self.first_count, self.last_count)], [muscle],
+            fs=fs, cache=cache, estimator=estimator,
+        )[0, 0]
+        return [*feats.tolist(), bmi, self.signal_length, self.hrate]
 
     def __str__(self):
         return f"{self.training.title} - {self.first_count} - {self.last_count}"
@@ -382,6 +437,10 @@ class MuscleFatigue(models.Model):
         related_name='fatigues'
     )
     fatigue = models.FloatField("Charchoq qiymati", default=0)
+    # Xususiyatlar qaysi spektral baholovchi bilan hisoblangani (masalan, 'fft'
+    # yoki 'welch:256:0.5') — natijani qayta hosil qilish uchun
+    estimator = models.CharField(
+        "Spektral baholovchi", max_length=32, default="fft")
 
     def __str__(self):
         return f"{self.fatigue} - {self.muscle} - {self.exercise}"
@@ -389,3 +448,130 @@ class MuscleFatigue(models.Model):
     class Meta:
         verbose_name = "Muskul charchog'i"
         verbose_name_plural = "Muskul charchoqlari"
+
+
+class TrainingMuscleSummary(models.Model):
+    """
+    Mashg‘ulot × mushak bo‘yicha oldindan hisoblangan ko‘rsatkichlar.
+    MuscleFatigue/Exercise yozuvlari o‘zgarganda yangilanadi (signals.py),
+    grafiklar to‘g‘ridan-to‘g‘ri shu jadvaldan o‘qiydi.
+    """
+    training = models.ForeignKey(
+        'TrainingSession',
+        on_delete=models.CASCADE,
+        related_name='muscle_summaries'
+    )
+    muscle = models.ForeignKey(
+        'Muscle',
+        on_delete=models.CASCADE,
+        related_name='training_summaries'
+    )
+    avg_fatigue = models.FloatField("O‘rtacha charchoq", default=0)
+    total_load = models.FloatField("Umumiy yuklama", default=0)
+    k_adapt_load = models.FloatField(
+        "Yuklamaga moslashish koeffitsiyenti", blank=True, null=True)
+    exercise_count = models.PositiveIntegerField("Mashqlar soni", default=0)
+    version = models.PositiveIntegerField("Versiya", default=0)
+    updated_at = models.DateTimeField("Yangilangan sana", auto_now=True)
+
+    def __str__(self):
+        return f"{self.training.title} - {self.muscle.shortname}"
+
+    class Meta:
+        verbose_name = "Mashg‘ulot mushak ko‘rsatkichi"
+        verbose_name_plural = "Mashg‘ulot mushak ko‘rsatkichlari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["training", "muscle"], name="unique_training_muscle_summary"
+            )
+        ]
+
+
+class ExerciseFeatureVector(models.Model):
+    """
+    Mashq oynasi bo‘yicha hisoblangan EMG signal xususiyatlari (FEATURE_NAMES).
+    Kalit: mashg‘ulot, mushak, [first_count, last_count], fs, algoritm versiyasi
+    va spektral baholovchi.
+    `source` — EMT fayl imzosi: fayl almashtirilsa, yozuv eskirgan hisoblanadi.
+    """
+    training = models.ForeignKey(
+        'TrainingSession',
+        on_delete=models.CASCADE,
+        related_name='feature_vectors'
+    )
+    muscle = models.ForeignKey(
+        'Muscle',
+        on_delete=models.CASCADE,
+        related_name='feature_vectors'
+    )
+    first_count = models.PositiveIntegerField("Boshlang'ich vaqt")
+    last_count = models.PositiveIntegerField("Yakuniy vaqt")
+    fs = models.PositiveIntegerField("Diskretlash chastotasi", default=1000)
+    version = models.PositiveSmallIntegerField("Algoritm versiyasi")
+    estimator = models.CharField(
+        "Spektral baholovchi", max_length=32, default="fft")
+    source = models.CharField("EMT fayl imzosi", max_length=255)
+    features = models.JSONField("Xususiyatlar", default=list)
+    created_at = models.DateTimeField("Yaratilgan sana", auto_now_add=True)
+
+    def __str__(self):
+        return (f"{self.training_id} - {self.muscle.shortname} "
+                f"[{self.first_count}, {self.last_count}]")
+
+    class Meta:
+        verbose_name = "Mashq xususiyatlari"
+        verbose_name_plural = "Mashq xususiyatlari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["training", "muscle", "first_count", "last_count",
+                        "fs", "version", "estimator"],
+                name="unique_exercise_feature_vector"
+            )
+        ]
+
+
+class JobStatus(models.TextChoices):
+    PENDING = "pending", "Navbatda"
+    RUNNING = "running", "Bajarilmoqda"
+    DONE = "done", "Tugallandi"
+    FAILED = "failed", "Xatolik"
+
+
+class JobKind(models.TextChoices):
+    INGEST_TRAINING = "ingest_training", "Mashg‘ulot faylini qayta ishlash"
+
+
+class ProcessingJob(models.Model):
+    kind = models.CharField(
+        "Vazifa turi", max_length=32, choices=JobKind.choices
+    )
+    training = models.ForeignKey(
+        'TrainingSession',
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        blank=True,
+        null=True,
+    )
+    status = models.CharField(
+        "Holati", max_length=16,
+        choices=JobStatus.choices, default=JobStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField("Urinishlar soni", default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        "Maksimal urinishlar", default=3)
+    error = models.TextField("Xatolik matni", blank=True, null=True)
+    # Xatolikdan keyin qayta urinish shu vaqtdan oldin boshlanmaydi
+    not_before = models.DateTimeField(
+        "Keyingi urinish vaqti", blank=True, null=True)
+
+    created_at = models.DateTimeField("Yaratilgan sana", auto_now_add=True)
+    started_at = models.DateTimeField("Boshlangan vaqt", blank=True, null=True)
+    finished_at = models.DateTimeField("Tugagan vaqt", blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.status})"
+
+    class Meta:
+        verbose_name = "Fon vazifasi"
+        verbose_name_plural = "Fon vazifalari"
+        ordering = ["created_at"]
@@ -0,0 +1,116 @@
+import io
+import json
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Ixtiyoriy kutubxonalar: o‘rnatilmagan bo‘lsa, mos format o‘chiriladi
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class SignalFrame:
+    """
+    Binar rendererlar uchun signal ma'lumoti: kanal nomi -> float32 massiv.
+    Massivlar Python obyektlariga aylantirilmasdan to‘g‘ridan-to‘g‘ri yoziladi.
+    """
+
+    def __init__(self, columns: dict, meta: dict = None):
+        self.columns = {
+            name: np.ascontiguousarray(values, dtype="<f4")
+            for name, values in columns.items()
+        }
+        self.meta = meta or {}
+
+    @property
+    def rows_count(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+
+class SignalRenderer(BaseRenderer):
+    """Binar signal rendererlari uchun asos. SignalFrame bo‘lmagan javoblar (xatoliklar) JSON da."""
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, SignalFrame):
+            # Xatolik javobi binar sarlavha ostida emas, haqiqiy JSON bo‘lib boradi
+            response = (renderer_context or {}).get("response")
+            if response is not None:
+                response["Content-Type"] = "application/json"
+            return JSONRenderer().render(data, "application/json", renderer_context)
+        return self.render_frame(data)
+
+    def render_frame(self, frame: SignalFrame) -> bytes:
+        raise NotImplementedError
+
+
+class NpyRenderer(SignalRenderer):
+    """
+    application/x-npy — kanal nomlari maydon bo‘lgan strukturali massiv:
+    np.load(...)['LBBCL'] kanalni qaytaradi.
+    """
+    media_type = "application/x-npy"
+    format = "npy"
+
+    def render_frame(self, frame):
+        array = np.empty(
+            frame.rows_count, dtype=[(name, "<f4") for name in frame.columns]
+        )
+        for name, values in frame.columns.items():
+            array[name] = values
+        buffer = io.BytesIO()
+        np.lib.format.write_array(buffer, array, allow_pickle=False)
+        return buffer.getvalue()
+
+
+class ArrowStreamRenderer(SignalRenderer):
+    """application/vnd.apache.arrow.stream — Arrow IPC oqimi (bitta RecordBatch)."""
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+
+    def render_frame(self, frame):
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values) for values in frame.columns.values()],
+            names=list(frame.columns),
+        )
+        schema = batch.schema.with_metadata(
+            {"meta": json.dumps(frame.meta, default=str)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+        return sink.getvalue().to_pybytes()
+
+
+class MsgpackRenderer(SignalRenderer):
+    """
+    application/x-msgpack — {"meta", "dtype", "columns", "signals": {nom: bytes}}.
+    Har bir kanal little-endian float32 baytlari sifatida yuboriladi.
+    """
+    media_type = "application/x-msgpack"
+    format = "msgpack"
+
+    def render_frame(self, frame):
+        return msgpack.packb({
+            "meta": json.loads(json.dumps(frame.meta, default=str)),
+            "dtype": "<f4",
+            "columns": list(frame.columns),
+            "signals": {
+                name: values.tobytes() for name, values in frame.columns.items()
+            },
+        })
+
+
+# JSON standart bo‘lib qoladi; mavjud binar formatlar uning ortidan
+SIGNAL_RENDERERS = [NpyRenderer]
+if pa is not None:
+    SIGNAL_RENDERERS.append(ArrowStreamRenderer)
+if msgpack is not None:
+    SIGNAL_RENDERERS.append(MsgpackRenderer)
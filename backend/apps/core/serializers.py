@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Athlete, AthleteParams, SportType, AthleteLevel, TrainingSession, Exercise, MuscleFatigue, Muscle
+from .models import Athlete, AthleteParams, SportType, AthleteLevel, TrainingSession, Exercise, MuscleFatigue, Muscle, ProcessingJob
 
 
 class SportTypeSerializer(serializers.ModelSerializer):
@@ -143,3 +143,9 @@ class ExerciseSerializer(serializers.ModelSerializer):
                 })
 
         return attrs
+
+
+class ProcessingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProcessingJob
+        fields = "__all__"
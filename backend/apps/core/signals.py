@@ -0,0 +1,142 @@
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from apps.utils.functions.muscle_index import invalidate_muscle_index
+from apps.utils.functions.signal_cache import remove_signal_cache
+from .features import source_key
+from .models import Exercise, ExerciseFeatureVector, Muscle, MuscleFatigue, TrainingSession
+from . import summaries
+
+
+@receiver(post_save, sender=Muscle)
+@receiver(post_delete, sender=Muscle)
+def reset_muscle_index(sender, **kwargs):
+    """
+    Mushak nomlari indeksini bekor qiladi: darhol (shu tranzaksiya ichida
+    ko‘rinishi uchun) va commit dan keyin (boshqa oqim eski ma'lumotdan
+    qurib ulgurgan indeks qolmasligi uchun).
+    """
+    invalidate_muscle_index()
+    transaction.on_commit(invalidate_muscle_index)
+
+
+@receiver(post_delete, sender=TrainingSession)
+def remove_training_signal_cache(sender, instance, **kwargs):
+    """Mashg‘ulot o‘chirilganda uning signal keshini ham o‘chiradi."""
+    remove_signal_cache(instance.id)
+
+
+@receiver(post_save, sender=TrainingSession)
+def update_training_summaries(sender, instance, created, **kwargs):
+    """Yurak urishi o‘zgargan bo‘lishi mumkin — k_adapt_load ni yangilaymiz."""
+    if not created:
+        summaries.refresh_k_adapt_load(instance)
+
+
+@receiver(post_save, sender=TrainingSession)
+def drop_stale_feature_vectors(sender, instance, created, **kwargs):
+    """EMT fayl almashtirilgan bo‘lsa, eski fayl xususiyatlari o‘chiriladi."""
+    if created or not instance.file_EMT or not instance.file_EMT.storage.exists(
+            instance.file_EMT.name):
+        return
+    ExerciseFeatureVector.objects.filter(training=instance).exclude(
+        source=source_key(instance)).delete()
+
+
+def _fatigue_key(fatigue: MuscleFatigue):
+    training_id = Exercise.objects.filter(
+        id=fatigue.exercise_id).values_list('training_id', flat=True).first()
+    return training_id, fatigue.muscle_id
+
+
+@receiver(pre_save, sender=MuscleFatigue)
+def remember_old_fatigue_key(sender, instance, **kwargs):
+    """Yozuv boshqa mashq/mushakka ko‘chirilsa, eski juftlikni ham yangilash uchun."""
+    instance._old_summary_key = None
+    if instance.pk:
+        old = MuscleFatigue.objects.filter(pk=instance.pk).first()
+        if old is not None:
+            instance._old_summary_key = _fatigue_key(old)
+
+
+@receiver(post_save, sender=MuscleFatigue)
+def update_fatigue_summary(sender, instance, **kwargs):
+    keys = {_fatigue_key(instance), getattr(instance, '_old_summary_key', None)}
+    for key in keys - {None}:
+        summaries.refresh_summary(*key)
+
+
+# O‘chirilgan yozuvlar juftliklari: kaskad (mashq/mashg‘ulot) o‘chirishda
+# har bir qator uchun emas, har bir (mashg‘ulot, mushak) uchun bir marta
+# commit dan keyin yangilanadi
+_deleted_keys = threading.local()
+
+
+def _refresh_deleted_summaries():
+    keys = getattr(_deleted_keys, 'keys', set())
+    _deleted_keys.keys = set()
+    if not keys:
+        return
+    existing = set(TrainingSession.objects.filter(
+        id__in={training_id for training_id, _ in keys}).values_list('id', flat=True))
+    for training_id, muscle_id in sorted(keys):
+        if training_id in existing:
+            summaries.refresh_summary(training_id, muscle_id)
+
+
+@receiver(pre_delete, sender=MuscleFatigue)
+def remember_deleted_fatigue_key(sender, instance, **kwargs):
+    if not hasattr(_deleted_keys, 'keys'):
+        _deleted_keys.keys = set()
+    _deleted_keys.keys.add(_fatigue_key(instance))
+    # Har safar ro‘yxatga olinadi: bekor qilingan tranzaksiyadan qolgan
+    # juftliklar keyingi commit da yangilanadi, takroriy chaqiruvlar bo‘sh o‘tadi
+    transaction.on_commit(_refresh_deleted_summaries)
+
+
+@receiver(pre_save, sender=Exercise)
+def remember_old_exercise_training(sender, instance, **kwargs):
+    instance._old_training_id = None
+    instance._old_window = None
+    instance._old_signal_length = None
+    if instance.pk:
+        old = Exercise.objects.filter(pk=instance.pk).values_list(
+            'training_id', 'first_count', 'last_count', 'signal_length').first()
+        if old is not None:
+            instance._old_training_id = old[0]
+            instance._old_window = old[:3]
+            instance._old_signal_length = old[3]
+
+
+@receiver(post_save, sender=Exercise)
+def drop_old_window_features(sender, instance, created, **kwargs):
+    """Mashq oynasi o‘zgarsa, eski oyna xususiyatlari endi kerak emas."""
+    old = getattr(instance, '_old_window', None)
+    if created or old is None:
+        return
+    if old != (instance.training_id, instance.first_count, instance.last_count):
+        ExerciseFeatureVector.objects.filter(
+            training_id=old[0], first_count=old[1], last_count=old[2]).delete()
+
+
+@receiver(post_save, sender=Exercise)
+def update_exercise_summaries(sender, instance, created, **kwargs):
+    """
+    signal_length o‘zgarsa, mashg‘ulot yuklamasi ham o‘zgaradi; mashq boshqa
+    mashg‘ulotga ko‘chirilsa, ikkala mashg‘ulot yangilanadi.
+    """
+    old_training_id = getattr(instance, '_old_training_id', None)
+    if created or getattr(instance, '_old_window', None) is None:
+        return
+    moved = old_training_id != instance.training_id
+    if not moved and instance._old_signal_length == instance.signal_length:
+        return
+    muscle_ids = set(instance.muscle_fatigue.values_list('muscle_id', flat=True))
+    if not muscle_ids and not moved:
+        return
+    # Barcha juftliklar faqat mashq ko‘chirilganda yangilanadi
+    for training_id in {instance.training_id, old_training_id}:
+        summaries.refresh_training(training_id, muscle_ids or None)
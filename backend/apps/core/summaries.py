@@ -0,0 +1,88 @@
+import numpy as np
+from django.db.models import F
+
+from .models import MuscleFatigue, TrainingMuscleSummary, TrainingSession
+
+
+def _models(apps=None):
+    """Joriy modellar yoki (migratsiyada) tarixiy modellar."""
+    if apps is None:
+        return MuscleFatigue, TrainingMuscleSummary, TrainingSession
+    return (apps.get_model('core', 'MuscleFatigue'),
+            apps.get_model('core', 'TrainingMuscleSummary'),
+            apps.get_model('core', 'TrainingSession'))
+
+
+def _k_adapt_load(total_load: float, training: TrainingSession):
+    dHR = training.post_heart_rate - training.pre_heart_rate
+    return total_load / dHR if dHR else None
+
+
+def refresh_summary(training_id, muscle_id, apps=None) -> None:
+    """
+    Bitta (mashg‘ulot, mushak) juftligi uchun ko‘rsatkichlarni qayta hisoblaydi.
+    Faqat shu juftlikning MuscleFatigue qatorlari o‘qiladi.
+    apps: migratsiyadagi tarixiy modellar registri (ixtiyoriy)
+    """
+    MuscleFatigue, TrainingMuscleSummary, TrainingSession = _models(apps)
+    rows = MuscleFatigue.objects.filter(
+        exercise__training_id=training_id, muscle_id=muscle_id
+    ).order_by('id').values_list('exercise__signal_length', 'fatigue')
+    if not rows:
+        TrainingMuscleSummary.objects.filter(
+            training_id=training_id, muscle_id=muscle_id).delete()
+        return
+
+    times, fatigues = zip(*rows)
+    v_time = np.array(times, dtype=int)
+    v_fatigue = np.array(fatigues, dtype=float)
+    total_load = float(np.sum(v_fatigue * (v_time / np.max(v_time))))
+    training = TrainingSession.objects.get(id=training_id)
+
+    values = {
+        'avg_fatigue': float(np.mean(v_fatigue)),
+        'total_load': total_load,
+        'k_adapt_load': _k_adapt_load(total_load, training),
+        'exercise_count': len(rows),
+    }
+    updated = TrainingMuscleSummary.objects.filter(
+        training_id=training_id, muscle_id=muscle_id
+    ).update(version=F('version') + 1, **values)
+    if not updated:
+        TrainingMuscleSummary.objects.create(
+            training_id=training_id, muscle_id=muscle_id, version=1, **values)
+
+
+def refresh_training(training_id, muscle_ids=None, apps=None) -> None:
+    """Mashg‘ulotning (yoki berilgan mushaklarning) barcha juftliklarini yangilaydi."""
+    MuscleFatigue, TrainingMuscleSummary, _ = _models(apps)
+    if muscle_ids is None:
+        muscle_ids = set(MuscleFatigue.objects.filter(
+            exercise__training_id=training_id
+        ).values_list('muscle_id', flat=True))
+        muscle_ids |= set(TrainingMuscleSummary.objects.filter(
+            training_id=training_id).values_list('muscle_id', flat=True))
+    for muscle_id in muscle_ids:
+        refresh_summary(training_id, muscle_id, apps)
+
+
+def refresh_k_adapt_load(training: TrainingSession) -> None:
+    """Yurak urishi o‘zgarganda faqat k_adapt_load ni (total_load dan) qayta hisoblaydi."""
+    for summary in TrainingMuscleSummary.objects.filter(training=training):
+        k = _k_adapt_load(summary.total_load, training)
+        if k != summary.k_adapt_load:
+            TrainingMuscleSummary.objects.filter(id=summary.id).update(
+                k_adapt_load=k, version=F('version') + 1)
+
+
+def rebuild_all(training_ids=None, apps=None) -> int:
+    """Jadvalni noldan quradi; yangilangan mashg‘ulotlar sonini qaytaradi."""
+    _, _, TrainingSession = _models(apps)
+    trainings = TrainingSession.objects.all()
+    if training_ids is not None:
+        trainings = trainings.filter(id__in=training_ids)
+    count = 0
+    for training_id in trainings.values_list('id', flat=True):
+        refresh_training(training_id, apps=apps)
+        count += 1
+    return count
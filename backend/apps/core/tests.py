@@ -1,3 +1,974 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.utils.emg_features import FEATURE_NAMES, signal_features
+from apps.utils.functions.common import best_muscle_match_id
+from apps.utils.functions.signal_cache import open_signal_cache
+from apps.utils.functions.muscle_index import (
+    VERSION_KEY as MUSCLE_INDEX_VERSION_KEY,
+    get_muscle_index,
+)
+from .features import DATASET_COLUMNS, load_signal_features, model_estimator
+from .jobs import claim_next_job, enqueue, requeue_stale_jobs, run_job
+from .models import (
+    Athlete,
+    AthleteLevel,
+    AthleteParams,
+    Exercise,
+    ExerciseFeatureVector,
+    JobKind,
+    JobStatus,
+    Muscle,
+    MuscleFatigue,
+    ProcessingJob,
+    SportType,
+    TrainingMuscleSummary,
+    TrainingSession,
+)
+
+
+def make_athlete_trainings(n_trainings=3, n_exercises=9, seed=0):
+    """Test uchun sportchi, mashg‘ulotlar, mashqlar va charchoq yozuvlari."""
+    rng = np.random.default_rng(seed)
+    level = AthleteLevel.objects.create(name="L1", number=1)
+    athlete = Athlete.objects.create(
+        firstname="Ali", lastname="Valiyev", level=level, birth_year=2000)
+    sport_type = SportType.objects.create(name="Boks")
+    muscles = [
+        Muscle.objects.create(name=name, title=name, shortname=short,
+                              model_url=f"model_{short}.keras")
+        for name, short in [("Biceps brachii L", "LBBCL"),
+                            ("Pectoralis major R", "RPM")]
+    ]
+    trainings = []
+    for i in range(n_trainings):
+        training = TrainingSession.objects.create(
+            title=f"T{i}", athlete=athlete, sport_type=sport_type,
+            pre_heart_rate=70, post_heart_rate=140 + i)
+        trainings.append(training)
+        for j in range(n_exercises):
+            exercise = Exercise.objects.create(
+                training=training, first_count=j * 100 + 1,
+                last_count=j * 100 + 50,
+                signal_length=int(rng.integers(500, 5000)))
+            for muscle in muscles:
+                MuscleFatigue.objects.create(
+                    exercise=exercise, muscle=muscle,
+                    fatigue=float(rng.random()))
+    # charchoq yozuvlarisiz mashg‘ulot
+    trainings.append(TrainingSession.objects.create(
+        title="Bo‘sh", athlete=athlete, sport_type=sport_type,
+        pre_heart_rate=70, post_heart_rate=120))
+    return athlete, trainings, muscles
+
+
+def make_emt_text(signals: np.ndarray, names, fs=1000) -> str:
+    """BTS EMT formatidagi matn: 10 qator metama'lumot, so‘ng header va qatorlar."""
+    lines = [f"META {i}\tqiymat" for i in range(10)]
+    lines.append("\t".join(["Frame", "Time", *names]) + "\t")
+    for i, row in enumerate(signals.T):
+        values = "\t".join(f"{v:.6f}" for v in row)
+        lines.append(f"{i + 1}\t{i / fs:.3f}\t{values}\t")
+    return "\n".join(lines) + "\n"
+
+
+class MediaRootTestCase(TestCase):
+    """MEDIA_ROOT vaqtinchalik papkaga yo‘naltiriladi."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def attach_emt(self, training, n=3000, seed=0):
+        """Mashg‘ulotga tasodifiy EMG signalli EMT fayl biriktiradi."""
+        names = [m.name for m in self.muscles]
+        signals = np.random.default_rng(seed).normal(
+            0, 0.05, size=(len(names), n))
+        training.file_EMT.save(
+            "session.emt", ContentFile(make_emt_text(signals, names)))
+        return signals
+
+
+class KAdaptLoadTest(TestCase):
+    def setUp(self):
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings()
+
+    def reference_k_adapt_load(self, training, muscle_shortname):
+        """Avvalgi (har bir mashg‘ulot uchun alohida so‘rovli) hisoblash."""
+        muscle_fatigues = MuscleFatigue.objects.filter(
+            muscle__shortname=muscle_shortname, exercise__training=training
+        ).order_by('id')
+        if muscle_fatigues.count() == 0:
+            return 0
+        v_time = np.array(muscle_fatigues.values_list(
+            'exercise__signal_length', flat=True), dtype=int)
+        v_fatigue = np.array(
+            muscle_fatigues.values_list('fatigue', flat=True), dtype=float)
+        L_total = np.sum(v_fatigue * (v_time / np.max(v_time)))
+        dHR = training.post_heart_rate - training.pre_heart_rate
+        return (L_total / dHR).tolist()
+
+    def test_matches_per_training_values(self):
+        with self.assertNumQueries(1):
+            k_loads = TrainingSession.calculate_k_adapt_loads(
+                self.trainings, "LBBCL")
+        for training in self.trainings:
+            self.assertEqual(
+                k_loads[training.id],
+                self.reference_k_adapt_load(training, "LBBCL"))
+        self.assertEqual(k_loads[self.trainings[-1].id], 0)
+
+
+class FatigueByTrainingGraphTest(TestCase):
+    def setUp(self):
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings()
+
+    def test_all_muscles_in_one_request(self):
+        response = self.client.get(
+            f"/api/athletes/{self.athlete.id}/fatigue_by_training_muscles_graph/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["columns"], ["LBBCL", "RPM"])
+        for muscle in body["columns"]:
+            expected = [
+                t.calculate_avg_fatigue(muscle)['fatigue_avg']
+                for t in self.trainings
+            ]
+            np.testing.assert_allclose(
+                np.array(body["signals"]["fatigue_avg"][muscle][:-1]),
+                np.array(expected[:-1]))
+            self.assertIsNone(body["signals"]["fatigue_avg"][muscle][-1])
+
+
+class TrainingMuscleSummaryTest(TestCase):
+    def setUp(self):
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings()
+
+    def assert_summary_matches(self, training, muscle):
+        summary = TrainingMuscleSummary.objects.get(
+            training=training, muscle=muscle)
+        k_load = TrainingSession.calculate_k_adapt_loads(
+            [training], muscle.shortname)[training.id]
+        self.assertAlmostEqual(summary.k_adapt_load, k_load)
+        self.assertAlmostEqual(
+            summary.avg_fatigue,
+            training.calculate_avg_fatigue(muscle.shortname)['fatigue_avg'])
+
+    def test_maintained_on_write(self):
+        training, muscle = self.trainings[0], self.muscles[0]
+        self.assert_summary_matches(training, muscle)
+
+        fatigue = MuscleFatigue.objects.filter(
+            exercise__training=training, muscle=muscle).first()
+        fatigue.fatigue = 0.99
+        fatigue.save()
+        self.assert_summary_matches(training, muscle)
+
+        exercise = training.execise.first()
+        exercise.signal_length = 9000
+        exercise.save()
+        self.assert_summary_matches(training, muscle)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            exercise.delete()
+        self.assert_summary_matches(training, muscle)
+
+        training.post_heart_rate = 180
+        training.save()
+        self.assert_summary_matches(training, muscle)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MuscleFatigue.objects.filter(
+                exercise__training=training, muscle=muscle).delete()
+        self.assertFalse(TrainingMuscleSummary.objects.filter(
+            training=training, muscle=muscle).exists())
+
+    def test_unchanged_exercise_save_skips_refresh(self):
+        training = self.trainings[0]
+        exercise = training.execise.first()
+        bare = Exercise.objects.create(
+            training=training, first_count=1, last_count=50, signal_length=100)
+        with mock.patch("apps.core.summaries.refresh_summary") as refresh:
+            exercise.save(update_fields=["first_count"])
+            bare.signal_length = 200
+            bare.save()
+        refresh.assert_not_called()
+
+        with mock.patch("apps.core.summaries.refresh_summary") as refresh:
+            exercise.signal_length += 1
+            exercise.save()
+        self.assertEqual(
+            sorted(c.args[:2] for c in refresh.call_args_list),
+            [(training.id, m.id) for m in self.muscles])
+
+        # ko‘chirilgan mashq — ikkala mashg‘ulot ham yangilanadi
+        exercise.training = self.trainings[1]
+        exercise.save()
+        for t in self.trainings[:2]:
+            for muscle in self.muscles:
+                self.assert_summary_matches(t, muscle)
+
+    def test_bulk_delete_refreshes_each_pair_once(self):
+        training = self.trainings[0]
+        with mock.patch("apps.core.summaries.refresh_summary") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                training.execise.all().delete()
+        self.assertEqual(
+            sorted(c.args for c in refresh.call_args_list),
+            [(training.id, m.id) for m in self.muscles])
+
+        with mock.patch("apps.core.summaries.refresh_summary") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.trainings[1].delete()
+        refresh.assert_not_called()
+
+    def test_backfill_migration(self):
+        TrainingMuscleSummary.objects.all().delete()
+        migration = importlib.import_module(
+            "apps.core.migrations.0008_backfill_training_summaries")
+        migration.backfill_summaries(django_apps, None)
+        for training in self.trainings[:-1]:
+            for muscle in self.muscles:
+                self.assert_summary_matches(training, muscle)
+
+    def test_rebuild_command(self):
+        TrainingMuscleSummary.objects.all().delete()
+        call_command("rebuild_training_summaries", stdout=StringIO())
+        for training in self.trainings[:-1]:
+            for muscle in self.muscles:
+                self.assert_summary_matches(training, muscle)
+
+
+class ProcessingJobQueueTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+
+    def post_training(self):
+        names = [m.name for m in self.muscles]
+        signals = np.random.default_rng(0).normal(0, 0.05, size=(2, 500))
+        return self.client.post("/api/training-sessions/", {
+            "title": "Yangi", "athlete": self.athlete.id,
+            "sport_type": self.training.sport_type_id,
+            "pre_heart_rate": 70, "post_heart_rate": 140,
+            "file_EMT": ContentFile(make_emt_text(signals, names).encode(), name="s.emt"),
+        })
+
+    @override_settings(JOBS_ASYNC=True)
+    def test_async_create_returns_202_and_blocks_signal_endpoints(self):
+        response = self.post_training()
+        self.assertEqual(response.status_code, 202)
+        training_id = response.json()["training_session"]["id"]
+        self.assertEqual(response.json()["job"]["status"], JobStatus.PENDING)
+
+        response = self.client.get(f"/api/training-sessions/{training_id}/emtData/")
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post("/api/exercises/", {
+            "training": training_id, "first_count": 1, "last_count": 99})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Exercise.objects.filter(training_id=training_id).exists())
+
+        call_command("process_jobs", "--once", stdout=StringIO())
+        self.assertEqual(ProcessingJob.objects.get().status, JobStatus.DONE)
+        self.assertEqual(TrainingSession.objects.get(id=training_id).duration, 500)
+        response = self.client.get(f"/api/training-sessions/{training_id}/emtData/")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JOBS_ASYNC=False)
+    def test_sync_create_returns_201(self):
+        response = self.post_training()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["job"]["status"], JobStatus.DONE)
+
+    @override_settings(JOBS_ASYNC=False)
+    def test_failed_sync_ingest_is_not_requeued(self):
+        with mock.patch("apps.core.jobs.ingest_training",
+                        side_effect=RuntimeError("buzuq fayl")) as ingest:
+            response = self.post_training()
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()["job"]["status"], JobStatus.FAILED)
+            job = ProcessingJob.objects.get()
+            self.assertEqual((job.attempts, job.not_before), (1, None))
+            self.assertIn("buzuq fayl", job.error)
+            # vazifa navbatda qolmaydi — signal so‘rovlari 409 bilan to‘silmaydi
+            self.assertFalse(job.training.ingest_in_progress())
+
+            ingest.side_effect = None
+            response = self.client.post(f"/api/jobs/{job.id}/retry/")
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["status"], JobStatus.DONE)
+        self.assertEqual(ingest.call_count, 2)
+
+    @override_settings(JOBS_ASYNC=True, JOBS_STALE_AFTER=600)
+    def test_retry_resets_waiting_and_stale_jobs(self):
+        job = enqueue(JobKind.INGEST_TRAINING, self.training)
+        ProcessingJob.objects.filter(id=job.id).update(
+            attempts=2, not_before=timezone.now() + timedelta(hours=1))
+        response = self.client.post(f"/api/jobs/{job.id}/retry/")
+        self.assertEqual(response.json()["attempts"], 0)
+        self.assertEqual(claim_next_job().id, job.id)
+
+        # hozirgina boshlangan vazifaga tegilmaydi, to‘xtab qolganiga — ha
+        self.client.post(f"/api/jobs/{job.id}/retry/")
+        self.assertEqual(ProcessingJob.objects.get(id=job.id).status, JobStatus.RUNNING)
+        ProcessingJob.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(hours=1))
+        response = self.client.post(f"/api/jobs/{job.id}/retry/")
+        self.assertEqual(response.json()["status"], JobStatus.PENDING)
+
+    @override_settings(JOBS_ASYNC=True, JOBS_RETRY_DELAY=30)
+    def test_failed_job_backs_off_then_fails(self):
+        # EMT fayli yo‘q — ingest xatolik beradi
+        job = enqueue(JobKind.INGEST_TRAINING, self.training)
+        self.assertEqual(claim_next_job().id, job.id)
+        job = run_job(ProcessingJob.objects.get(id=job.id))
+        self.assertEqual(job.status, JobStatus.PENDING)
+        self.assertIsNotNone(job.error)
+        delay = (job.not_before - job.finished_at).total_seconds()
+        self.assertAlmostEqual(delay, 30, delta=1)
+        # kechikish tugamaguncha vazifa olinmaydi
+        self.assertIsNone(claim_next_job())
+
+        job = run_job(job)
+        self.assertAlmostEqual(
+            (job.not_before - job.finished_at).total_seconds(), 60, delta=1)
+        job = run_job(job)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+
+        ProcessingJob.objects.filter(id=job.id).update(
+            status=JobStatus.PENDING, not_before=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_next_job().id, job.id)
+
+    @override_settings(INFERENCE_PRELOAD=True)
+    def test_worker_preloads_models_at_startup(self):
+        with mock.patch("apps.utils.ai.calculate_fatigue.preload_models",
+                        return_value=[]) as preload:
+            call_command("process_jobs", "--once", stdout=StringIO())
+        preload.assert_called_once()
+
+    @override_settings(JOBS_ASYNC=True)
+    def test_requeue_stale_jobs(self):
+        job = enqueue(JobKind.INGEST_TRAINING, self.training)
+        claim_next_job()
+        ProcessingJob.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        self.assertEqual(ProcessingJob.objects.get(id=job.id).status, JobStatus.PENDING)
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 0)
+
+
+class EmtDataTransportTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+
+    def test_npy_transport(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/",
+            HTTP_ACCEPT="application/x-npy")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-npy")
+        array = np.load(io.BytesIO(response.content))
+        self.assertEqual(array.dtype.names, ("LBBCL", "RPM"))
+        np.testing.assert_allclose(array["LBBCL"], self.signals[0], atol=1e-6)
+
+    def test_arrow_transport(self):
+        import pyarrow as pa
+
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/",
+            HTTP_ACCEPT="application/vnd.apache.arrow.stream")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/vnd.apache.arrow.stream")
+        table = pa.ipc.open_stream(response.content).read_all()
+        self.assertEqual(table.column_names, ["LBBCL", "RPM"])
+        np.testing.assert_allclose(
+            table.column("RPM").to_numpy(), self.signals[1], atol=1e-6)
+
+    def test_msgpack_transport(self):
+        import msgpack
+
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/",
+            HTTP_ACCEPT="application/x-msgpack")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-msgpack")
+        body = msgpack.unpackb(response.content)
+        self.assertEqual(body["columns"], ["LBBCL", "RPM"])
+        self.assertEqual(body["meta"]["rows_count"], 3000)
+        np.testing.assert_allclose(
+            np.frombuffer(body["signals"]["LBBCL"], dtype=body["dtype"]),
+            self.signals[0], atol=1e-6)
+
+    def test_binary_error_is_json(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/",
+            {"points": 100}, HTTP_ACCEPT="application/x-npy")
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("message", response.json())
+
+    def test_json_remains_default(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rows_count"], 3000)
+
+    def test_json_values_keep_source_precision(self):
+        body = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/").json()
+        expected = [float(f"{v:.6f}") for v in self.signals[0, :200]]
+        self.assertEqual(body["signals"]["LBBCL"][:200], expected)
+
+        body = self.client.get(
+            f"/api/training-sessions/{self.training.id}/emtData/",
+            {"points": 100}).json()
+        index = body["index"]["RPM"][:10]
+        self.assertEqual(body["signals"]["RPM"][:10],
+                         [float(f"{self.signals[1, i]:.6f}") for i in index])
+
+    def test_downsampled_points_are_validated(self):
+        url = f"/api/training-sessions/{self.training.id}/emtData/"
+        for points in (0, 1, -5):
+            response = self.client.get(url, {"points": points})
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(url, {"points": 2, "method": "lttb"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["index"]["RPM"], [0, 2999])
+
+    def test_downsampled_zero_to_is_empty_range(self):
+        url = f"/api/training-sessions/{self.training.id}/emtData/"
+        body = self.client.get(url, {"points": 100, "to": 0}).json()
+        self.assertEqual((body["from"], body["to"]), (0, 0))
+        self.assertEqual(body["signals"]["RPM"], [])
+
+        body = self.client.get(url, {"points": 100, "from": 10, "to": ""}).json()
+        self.assertEqual((body["from"], body["to"]), (10, 3000))
+
+
+class SignalCacheTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+
+    def test_rebuild_replaces_directory_atomically(self):
+        old = self.training.signal_cache()
+        old_data = old.channel("LBBCL")
+        signals = self.attach_emt(self.training, seed=1)
+
+        new = self.training.signal_cache()
+        self.assertEqual(new.directory, old.directory)
+        np.testing.assert_allclose(new.channel("LBBCL"), signals[0], atol=1e-6)
+        # eski memmap o‘chirilgan fayldan o‘qishda davom etadi
+        np.testing.assert_allclose(old_data, self.signals[0], atol=1e-6)
+        # vaqtinchalik va eski papkalar qolmaydi
+        root = os.path.dirname(new.directory)
+        self.assertEqual(os.listdir(root), [str(self.training.id)])
+
+    def test_rebuilt_when_source_changes(self):
+        cache = self.training.signal_cache()
+        self.assertIsNotNone(open_signal_cache(self.training.id, self.training.file_EMT.path))
+        # bir xil nom, boshqa mazmun — imzo (hajm/mtime) o‘zgaradi
+        signals = self.signals.copy()
+        signals[0, :10] = 1.0
+        with open(self.training.file_EMT.path, "w") as f:
+            f.write(make_emt_text(signals, [m.name for m in self.muscles]) + "\n")
+        self.assertIsNone(open_signal_cache(self.training.id, self.training.file_EMT.path))
+
+        rebuilt = self.training.signal_cache()
+        self.assertNotEqual(rebuilt.header["source"], cache.header["source"])
+        np.testing.assert_allclose(rebuilt.channel("LBBCL")[:10], 1.0)
+        # EMG kanallari uchun prefiks fayllari yozilmaydi
+        self.assertFalse([name for name in os.listdir(rebuilt.directory)
+                          if name.endswith(".prefix.f64")])
+
+    def test_removed_with_session(self):
+        directory = self.training.signal_cache().directory
+        self.assertTrue(os.path.isdir(directory))
+        self.training.delete()
+        self.assertFalse(os.path.exists(directory))
+
+
+class SignalWindowTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+
+    def test_time_range_and_channels(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/signal/",
+            {"channels": "RPM", "from": 500, "to": 750})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["from"], body["to"]), (500, 750))
+        self.assertEqual(body["columns"], ["RPM"])
+        np.testing.assert_allclose(
+            body["signals"]["RPM"], self.signals[1, 500:750], atol=1e-6)
+
+    def test_non_finite_range_is_rejected(self):
+        url = f"/api/training-sessions/{self.training.id}/signal/"
+        for params in [{"from": "nan"}, {"to": "inf"}, {"from": "-inf", "to": 100}]:
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+    def test_npy_window(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/signal/",
+            {"channels": "LBBCL,RPM", "from": 2900, "to": 10_000},
+            HTTP_ACCEPT="application/x-npy")
+        array = np.load(io.BytesIO(response.content))
+        self.assertEqual(len(array), 100)
+        np.testing.assert_allclose(array["LBBCL"], self.signals[0, 2900:], atol=1e-6)
+
+    def test_unknown_channel(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/signal/",
+            {"channels": "XYZ"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SignalTilesEndpointTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = np.random.default_rng(0).normal(0, 0.05, size=(2, 3000))
+        # bo‘sh (o‘qilmagan) namunalar
+        self.signals[1, 100:110] = np.nan
+        self.training.file_EMT.save("session.emt", ContentFile(
+            make_emt_text(self.signals, [m.name for m in self.muscles])))
+        self.url = f"/api/training-sessions/{self.training.id}/signal-tiles/"
+
+    def test_raw_level_with_missing_samples(self):
+        response = self.client.get(
+            self.url, {"channel": "RPM", "level": 0, "from": 90, "to": 120})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["level"], body["index"][0]), (0, 90))
+        self.assertEqual(body["min"][10:20], [0.0] * 10)
+        np.testing.assert_allclose(body["mean"][:10], self.signals[1, 90:100], atol=1e-6)
+
+    def test_level_is_chosen_from_points(self):
+        response = self.client.get(self.url, {"channel": "RPM", "points": 100})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        # 3000 namuna — faqat bitta (2×) daraja quriladi
+        self.assertEqual((body["levels"], body["level"]), (1, 1))
+        self.assertEqual(len(body["min"]), 1500)
+        # NaN namunalar bo‘lagi (100, 101) — 0
+        self.assertEqual(body["max"][50], 0.0)
+
+    def test_unknown_channel_is_rejected(self):
+        response = self.client.get(self.url, {"channel": "XYZ"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SpectrogramEndpointTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+
+    def test_spectrogram(self):
+        response = self.client.get(
+            f"/api/training-sessions/{self.training.id}/spectrogram/",
+            {"channels": "RPM", "window": 1000, "hop": 500})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["rows_count"], 5)
+        self.assertEqual(body["time"][:2], [0.5, 1.0])
+        self.assertEqual(set(body["signals"]["RPM"]), {"mdf", "mnf", "rms", "band_ratio"})
+        self.assertAlmostEqual(
+            body["signals"]["RPM"]["rms"][0],
+            np.sqrt(np.mean(self.signals[1, :1000] ** 2)), places=4)
+        # faqat standart (1000/250) variant diskka keshlanadi
+        directory = self.training.signal_cache().directory
+        self.assertFalse(any(n.startswith("spectrogram_w1000_h500")
+                             for n in os.listdir(directory)))
+
+    def test_parameter_limits(self):
+        url = f"/api/training-sessions/{self.training.id}/spectrogram/"
+        for params in [{"window": 600000}, {"window": 10}, {"hop": 1},
+                       {"hop": 600000}]:
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertIn("spectrogram_w1000_h250.json",
+                      os.listdir(self.training.signal_cache().directory))
+
+
+class ExerciseWindowTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+
+    def test_window_without_signal_cache(self):
+        # signal keshi qurilmagan — oyna matn fayldan satrlar indeksi orqali o‘qiladi
+        window = self.training.emt_channel_window("RPM", 1500, 1600)
+        np.testing.assert_allclose(window, self.signals[1, 1500:1600], atol=1e-6)
+        self.assertEqual(self.training.emt_line_index().rows, 3000)
+
+
+class ExerciseFeatureVectorTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 2)
+        self.training = self.trainings[0]
+        self.signals = self.attach_emt(self.training)
+        self.windows = [(0, 999), (1000, 2499)]
+
+    def test_vectors_are_stored_and_reused(self):
+        first = load_signal_features(self.training, self.windows, self.muscles)
+        self.assertEqual(first.shape, (2, 2, len(FEATURE_NAMES)))
+        self.assertEqual(ExerciseFeatureVector.objects.count(), 4)
+        np.testing.assert_allclose(
+            first[1, 0], signal_features(
+                np.round(self.signals[0, 1000:2500], 6).astype(np.float32),
+                fs=1000)[0],
+            rtol=1e-5)
+
+        with self.assertNumQueries(1):
+            again = load_signal_features(self.training, self.windows, self.muscles)
+        np.testing.assert_array_equal(first, again)
+
+    def test_estimator_is_part_of_the_key(self):
+        fft = load_signal_features(self.training, self.windows, self.muscles)
+        welch = load_signal_features(
+            self.training, self.windows, self.muscles, estimator="welch")
+        self.assertEqual(ExerciseFeatureVector.objects.count(), 8)
+        self.assertEqual(
+            set(ExerciseFeatureVector.objects.values_list("estimator", flat=True)),
+            {"fft", "welch:256:0.5"})
+        rms = FEATURE_NAMES.index("RMS")
+        np.testing.assert_allclose(fft[..., rms], welch[..., rms])
+
+    def test_duplicate_windows_get_features(self):
+        windows = [self.windows[0], self.windows[1], self.windows[0]]
+        features = load_signal_features(self.training, windows, self.muscles)
+        self.assertFalse(np.isnan(features).any())
+        np.testing.assert_array_equal(features[0], features[2])
+        self.assertEqual(ExerciseFeatureVector.objects.count(), 4)
+
+    def test_flat_channel_features_are_stored(self):
+        # o‘lik (nol) kanal: spektral nisbatlar 0/0 — NaN
+        self.signals[0] = 0.0
+        self.training.file_EMT.save("session.emt", ContentFile(
+            make_emt_text(self.signals, [m.name for m in self.muscles])))
+        first = load_signal_features(self.training, self.windows, self.muscles)
+        self.assertTrue(np.isnan(first[:, 0]).any())
+        self.assertFalse(np.isnan(first[:, 1]).any())
+        self.assertEqual(ExerciseFeatureVector.objects.count(), 4)
+
+        with self.assertNumQueries(1):
+            again = load_signal_features(self.training, self.windows, self.muscles)
+        np.testing.assert_array_equal(first, again)
+
+    def test_changed_emt_invalidates_vectors(self):
+        load_signal_features(self.training, self.windows[:1], self.muscles)
+        self.attach_emt(self.training, seed=1)
+        self.assertFalse(ExerciseFeatureVector.objects.exists())
+
+    def test_changed_window_drops_old_vectors(self):
+        exercise = self.training.execise.order_by('id').first()
+        load_signal_features(
+            self.training, [(exercise.first_count, exercise.last_count)],
+            self.muscles)
+        exercise.last_count += 10
+        exercise.save()
+        self.assertFalse(ExerciseFeatureVector.objects.exists())
+
+
+class MuscleIndexCacheTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.attach_emt(self.training, n=100)
+
+    def test_channel_resolution_without_queries(self):
+        get_muscle_index()
+        with self.assertNumQueries(0):
+            channels, fs = self.training._parse_emt()
+            self.assertEqual(best_muscle_match_id("EMG Pectoralis major R"),
+                             self.muscles[1].id)
+        self.assertEqual([c['shortname'] for c in channels], ["LBBCL", "RPM"])
+
+    def test_muscle_changes_invalidate_index(self):
+        self.assertEqual(get_muscle_index().shortname("Biceps brachii L"), "LBBCL")
+        muscle = self.muscles[0]
+        muscle.shortname = "LBB"
+        muscle.save()
+        self.assertEqual(get_muscle_index().shortname("Biceps brachii L"), "LBB")
+        muscle.delete()
+        self.assertIsNone(get_muscle_index().shortname("Biceps brachii L"))
+
+    def test_changes_from_other_processes(self):
+        get_muscle_index()
+        # boshqa jarayondagi o‘zgarish: bu jarayonda signal kelmaydi
+        Muscle.objects.filter(id=self.muscles[1].id).update(shortname="RPM2")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_muscle_index().shortname("Pectoralis major R"), "RPM")
+        cache.set(MUSCLE_INDEX_VERSION_KEY, "boshqa-jarayon")
+        self.assertEqual(get_muscle_index().shortname("Pectoralis major R"), "RPM2")
+
+        Muscle.objects.filter(id=self.muscles[1].id).update(shortname="RPM3")
+        with override_settings(MUSCLE_INDEX_TTL=0):
+            self.assertEqual(get_muscle_index().shortname("Pectoralis major R"), "RPM3")
+
+    def test_rename_rebuilds_signal_cache(self):
+        self.assertEqual(self.training.signal_cache().columns, ["LBBCL", "RPM"])
+        muscle = self.muscles[1]
+        muscle.shortname = "RPMJ"
+        muscle.save()
+        self.assertEqual(self.training.signal_cache().columns, ["LBBCL", "RPMJ"])
+
+
+class HeartRateTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.attach_emt(self.training, n=1001)
+        self.exercise = Exercise.objects.create(
+            training=self.training, first_count=0, last_count=499)
+
+    def test_ramp_without_ecg_file(self):
+        # 70 -> 140 bpm, 1001 namuna: birinchi yarmi o‘rtachasi 87.465
+        self.assertEqual(self.exercise.calculate_hrate(), 87)
+        self.assertFalse(self.training.file_ECG)
+
+    def test_device_ecg_file_is_used(self):
+        values = "\n".join(["100"] * 500 + ["60"] * 501) + "\n"
+        self.training.file_ECG.save("device_ecg.txt", ContentFile(values))
+        self.assertEqual(self.exercise.calculate_hrate(), 100)
+
+
+class ModelEstimatorTest(SimpleTestCase):
+    @override_settings(FEATURE_ESTIMATOR="welch")
+    def test_inference_uses_the_models_estimator(self):
+        self.assertEqual(model_estimator(), "fft")
+        self.assertEqual(model_estimator("fft"), "fft")
+        with self.assertRaises(ValueError):
+            model_estimator("welch")
+
+    @override_settings(MODEL_FEATURE_ESTIMATOR="welch")
+    def test_declared_estimator(self):
+        self.assertEqual(model_estimator("welch:256:0.5"), "welch:256:0.5")
+        with self.assertRaises(ValueError):
+            model_estimator("fft")
+
+
+class RescoreFatigueCommandTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(3, 1)
+        TrainingSession.objects.filter(
+            id__in=[t.id for t in self.trainings[:3]]).update(file_EMT="s.emt")
+        self.ids = [t.id for t in self.trainings[:3]]
+        self.checkpoint = os.path.join(settings.MEDIA_ROOT, "checkpoint.json")
+
+    def rescore(self, *args, fail=()):
+        calls = []
+
+        def fake_rescore(training, **kwargs):
+            calls.append(training.id)
+            if training.id in fail:
+                raise RuntimeError("model xatosi")
+            return 1
+
+        with mock.patch("apps.utils.ai.calculate_fatigue.rescore_training", fake_rescore):
+            call_command("rescore_fatigue", "--checkpoint", self.checkpoint,
+                         *args, stdout=StringIO())
+        return calls
+
+    def test_checkpoint_resume(self):
+        self.assertEqual(self.rescore(fail={self.ids[1]}), self.ids)
+        with open(self.checkpoint, encoding="utf-8") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["done"], [self.ids[0], self.ids[2]])
+        self.assertEqual(saved["params"]["muscle"], None)
+
+        # faqat xatolik bergan mashg‘ulot qayta ishlanadi, so‘ng checkpoint o‘chadi
+        self.assertEqual(self.rescore(), [self.ids[1]])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_restart_and_changed_params_ignore_checkpoint(self):
+        self.rescore(fail={self.ids[1]})
+        self.assertEqual(self.rescore("--restart", fail={self.ids[1]}), self.ids)
+        # boshqa parametrlar bilan eski checkpoint ishlatilmaydi
+        self.assertEqual(self.rescore("--muscle", "LBBCL"), self.ids)
+
+    def test_rejects_estimator_models_were_not_trained_on(self):
+        with self.assertRaises(CommandError):
+            self.rescore("--estimator", "welch")
+
+    def test_locked_database_is_retried(self):
+        from django.db import OperationalError
+
+        calls = []
+
+        def locked_once(training, **kwargs):
+            calls.append(training.id)
+            if calls.count(training.id) == 1:
+                raise OperationalError("database is locked")
+            return 1
+
+        with mock.patch("apps.utils.ai.calculate_fatigue.rescore_training", locked_once), \
+                mock.patch("apps.core.management.commands.rescore_fatigue.LOCK_RETRY_DELAY", 0):
+            call_command("rescore_fatigue", "--checkpoint", self.checkpoint,
+                         stdout=StringIO())
+        self.assertEqual(calls, [i for i in self.ids for _ in range(2)])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+
+def fake_predict(model_path, X, expect_timeseries=True, backend=None):
+    """Model o‘rniga: qator va model nomiga bog‘liq deterministik qiymat."""
+    return X[:, 0] * 0.1 + len(os.path.basename(model_path)) * 0.01
+
+
+class PredictExerciseFatiguesTest(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.athlete, self.trainings, self.muscles = make_athlete_trainings(1, 1)
+        self.training = self.trainings[0]
+        self.attach_emt(self.training)
+        AthleteParams.objects.create(
+            athlete=self.athlete, bmi=22.5, weight=70, height=175)
+        self.exercise = Exercise.objects.create(
+            training=self.training, first_count=1000, last_count=1999,
+            signal_length=1000, hrate=120)
+        self.cache = self.training.signal_cache()
+
+    def test_one_batched_pass(self):
+        from apps.core import summaries
+        from apps.utils.ai.calculate_fatigue import predict_exercise_fatigues
+
+        with mock.patch("apps.utils.ai.batching.predict",
+                        side_effect=fake_predict) as predict, \
+                mock.patch.object(TrainingSession, "signal_cache", autospec=True,
+                                  return_value=self.cache) as load, \
+                mock.patch("apps.utils.ai.calculate_fatigue.refresh_training",
+                           wraps=summaries.refresh_training) as refresh:
+            with self.assertNumQueries(11) as queries:
+                created = predict_exercise_fatigues(self.exercise)
+
+        load.assert_called_once()
+        # har bir model guruhi uchun bitta predict
+        self.assertEqual(predict.call_count, len(self.muscles))
+        inserts = [q["sql"] for q in queries.captured_queries
+                   if q["sql"].startswith('INSERT INTO "core_musclefatigue"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual([f.muscle_id for f in created], [m.id for m in self.muscles])
+        refresh.assert_called_once_with(self.training.id, [m.id for m in self.muscles])
+        for muscle in self.muscles:
+            summary = TrainingMuscleSummary.objects.get(
+                training=self.training, muscle=muscle)
+            self.assertEqual(summary.exercise_count, 2)
+
+    def test_matches_per_muscle_prediction(self):
+        from apps.utils.ai.calculate_fatigue import (
+            predict_exercise_fatigues,
+            predict_fatigue,
+        )
+
+        with mock.patch("apps.utils.ai.batching.predict", side_effect=fake_predict):
+            batched = predict_exercise_fatigues(self.exercise)
+            single = [predict_fatigue(m.shortname, self.exercise) for m in self.muscles]
+        np.testing.assert_allclose([f.fatigue for f in batched], single, rtol=1e-12)
+        self.assertEqual({f.estimator for f in batched}, {"fft"})
+
+
+class BuildFeatureDatasetTest(MediaRootTestCase):
+    def test_dataset_from_exercise_windows(self):
+        athlete, trainings, self.muscles = make_athlete_trainings(2, 3)
+        self.attach_emt(trainings[0])
+        output = os.path.join(settings.MEDIA_ROOT, "dataset.npz")
+
+        call_command("build_feature_dataset", output, stdout=StringIO())
+        data = np.load(output)
+        # EMT fayli faqat birinchi mashg‘ulotda: 3 mashq × 2 mushak
+        self.assertEqual(data["X"].shape, (6, len(FEATURE_NAMES) + 3))
+        self.assertEqual(list(data["columns"][-3:]), ["bmi", "signal_length", "hrate"])
+        self.assertEqual(str(data["estimator"]), "fft")
+
+        rows = MuscleFatigue.objects.filter(
+            exercise__training=trainings[0]).order_by("exercise_id", "muscle_id")
+        np.testing.assert_allclose(data["y"], [r.fatigue for r in rows])
+        np.testing.assert_array_equal(data["muscle"], [r.muscle_id for r in rows])
+        exercise = rows[0].exercise
+        expected = load_signal_features(
+            trainings[0], [(exercise.first_count, exercise.last_count)], self.muscles)
+        np.testing.assert_allclose(data["X"][0, :len(FEATURE_NAMES)], expected[0, 0])
+
+    def test_rescore_uses_the_same_feature_matrix(self):
+        from apps.utils.ai.calculate_fatigue import rescore_training
+        from .features import training_dataset
+
+        athlete, trainings, self.muscles = make_athlete_trainings(1, 3)
+        self.attach_emt(trainings[0])
+        AthleteParams.objects.create(athlete=athlete, bmi=21.0, weight=70, height=182)
+        dataset = training_dataset(trainings[0])
+
+        with mock.patch("apps.utils.ai.calculate_fatigue.predict_feature_matrix",
+                        side_effect=lambda feats, muscles, *a: feats[:, 0]) as predict:
+            self.assertEqual(rescore_training(trainings[0]), 3)
+        np.testing.assert_array_equal(predict.call_args.args[0], dataset["X"])
+        self.assertEqual(dataset["X"][0, DATASET_COLUMNS.index("bmi")], 21.0)
+
+
+class ImportTimeTest(SimpleTestCase):
+    """project.urls import qilinganda bashorat steki (TensorFlow) yuklanmasligi kerak."""
+    HEAVY = ("tensorflow", "keras", "joblib", "sklearn")
+
+    def test_urls_do_not_import_inference_stack(self):
+        code = (
+            "import django; django.setup(); import project.urls"
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "project.settings"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+
+        # "import time: self [us] | cumulative | package"
+        modules = [
+            line.rsplit("|", 1)[1].strip()
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:") and "|" in line
+        ]
+        heavy = [m for m in modules if m.split(".")[0] in self.HEAVY]
+        self.assertEqual(heavy, [], "project.urls og‘ir modullarni yukladi")
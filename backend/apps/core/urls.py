@@ -6,7 +6,8 @@ from .views import (
     ExercisesViewSet,
     AthleteLevelViewSet,
     AthleteParamsViewSet,
-    MuscleViewSet
+    MuscleViewSet,
+    ProcessingJobViewSet,
 )
 
 router = DefaultRouter()
@@ -17,5 +18,6 @@ router.register(r'sport-types', SportTypeViewSet)
 router.register(r'training-sessions', TrainingSessionViewSet)
 router.register(r'exercises', ExercisesViewSet)
 router.register(r'muscles', MuscleViewSet)
+router.register(r'jobs', ProcessingJobViewSet)
 
 urlpatterns = router.urls
@@ -1,9 +1,12 @@
-from django.db import transaction
+import math
+
+import numpy as np
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.settings import api_settings
 from .models import (
     Athlete,
     SportType,
@@ -12,7 +15,11 @@ from .models import (
     Muscle,
     AthleteLevel,
     AthleteParams,
-    MuscleFatigue
+    MuscleFatigue,
+    TrainingMuscleSummary,
+    ProcessingJob,
+    JobKind,
+    JobStatus,
 )
 from .serializers import (
     AthleteSerializer,
@@ -22,10 +29,22 @@ from .serializers import (
     AthleteParamsSerializer,
     ExerciseSerializer,
     MuscleFatigueSerializer,
-    MuscleSerializer
+    MuscleSerializer,
+    ProcessingJobSerializer,
+)
+from .jobs import enqueue, retry_job
+from .renderers import SIGNAL_RENDERERS, SignalFrame, SignalRenderer
+from apps.utils.functions.downsample import (
+    METHODS as DOWNSAMPLE_METHODS,
+    MIN_POINTS as DOWNSAMPLE_MIN_POINTS,
+    downsample,
 )
-from apps.utils.functions.extract_ecg_file import extract_ecg_file
-from apps.utils.ai.calculate_fatigue import predict_fatigue
+from apps.utils.functions.spectrogram import (
+    DEFAULT_HOP_MS,
+    DEFAULT_WINDOW_MS,
+    validate_params as validate_spectrogram_params,
+)
+from apps.utils.ai.calculate_fatigue import predict_exercise_fatigues
 
 
 class CustomPagination(PageNumberPagination):
@@ -84,11 +103,14 @@ class AthleteViewSet(viewsets.ModelViewSet):
             'datetimes': [],
             'titles': [],
         }
+        # Oldindan hisoblangan ko‘rsatkichlar (TrainingMuscleSummary) dan
+        k_loads = dict(TrainingMuscleSummary.objects.filter(
+            training__athlete=instance, muscle__shortname=muscle_shortname
+        ).values_list('training_id', 'k_adapt_load'))
         for t in trainings:
-            d = t.calculate_k_adapt_load(muscle_shortname)
-            data['k_adapt_load'].append(d['k_adapt_load'])
-            data['datetimes'].append(d['created_at'])
-            data['titles'].append(d['name'])
+            data['k_adapt_load'].append(k_loads.get(t.id, 0))
+            data['datetimes'].append(t.created_at)
+            data['titles'].append(t.title)
 
         return Response(
             {
@@ -104,29 +126,81 @@ class AthleteViewSet(viewsets.ModelViewSet):
     def fatigue_by_training_graph(self, request, pk=None):
         instance: Athlete = self.get_object()
         muscle_shortname = request.query_params.get('muscle')
-        trainings = TrainingSession.objects.filter(
-            athlete=instance).order_by('id')
+        trainings = list(TrainingSession.objects.filter(
+            athlete=instance).order_by('id'))
+        averages = self._avg_fatigue_by_training(instance, [muscle_shortname])
         data = {
             'fatigue_avg': [],
             'datetimes': [],
             'titles': [],
         }
         for t in trainings:
-            d = t.calculate_avg_fatigue(muscle_shortname)
-            data['fatigue_avg'].append(d['fatigue_avg'])
-            data['datetimes'].append(d['created_at'])
-            data['titles'].append(d['name'])
+            data['fatigue_avg'].append(
+                averages.get((t.id, muscle_shortname)))
+            data['datetimes'].append(t.created_at)
+            data['titles'].append(t.title)
 
         return Response(
             {
                 "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
-                "rows_count": trainings.count(),
+                "rows_count": len(trainings),
                 "columns": ['fatigue_avg'],
                 "signals": data,  # har bir kanal uchun massiv
             },
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=True, methods=["get"])
+    def fatigue_by_training_muscles_graph(self, request, pk=None):
+        """
+        Har bir (mashg‘ulot, mushak) juftligi uchun o‘rtacha charchoq —
+        bitta so‘rov bilan. Ixtiyoriy: ?muscles=LBBCL,RPM
+        """
+        instance: Athlete = self.get_object()
+        muscles_param = request.query_params.get('muscles')
+        muscles = muscles_param.split(',') if muscles_param else None
+        trainings = list(TrainingSession.objects.filter(
+            athlete=instance).order_by('id'))
+
+        averages = self._avg_fatigue_by_training(instance, muscles)
+        if muscles is None:
+            muscles = sorted({muscle for _, muscle in averages})
+
+        data = {
+            'fatigue_avg': {
+                m: [averages.get((t.id, m)) for t in trainings]
+                for m in muscles
+            },
+            'datetimes': [t.created_at for t in trainings],
+            'titles': [t.title for t in trainings],
+        }
+
+        return Response(
+            {
+                "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
+                "rows_count": len(trainings),
+                "columns": muscles,
+                "signals": data,  # har bir mushak uchun massiv
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @staticmethod
+    def _avg_fatigue_by_training(athlete, muscles=None) -> dict:
+        """
+        {(training_id, muscle_shortname): o‘rtacha charchoq} — bitta so‘rov,
+        oldindan hisoblangan TrainingMuscleSummary jadvalidan.
+        """
+        queryset = TrainingMuscleSummary.objects.filter(training__athlete=athlete)
+        if muscles is not None:
+            queryset = queryset.filter(muscle__shortname__in=muscles)
+        rows = queryset.values_list(
+            'training_id', 'muscle__shortname', 'avg_fatigue')
+        return {
+            (training_id, muscle): avg_fatigue
+            for training_id, muscle, avg_fatigue in rows
+        }
+
 
 class AthleteLevelViewSet(viewsets.ModelViewSet):
     queryset = AthleteLevel.objects.all()
@@ -172,6 +246,19 @@ class AthleteParamsViewSet(viewsets.ModelViewSet):
         return queryset
 
 
+def ingest_conflict(training: TrainingSession):
+    """
+    Mashg‘ulot fayli hali qayta ishlanayotgan bo‘lsa — 409 javobi, aks holda None.
+    Kesh worker tomonidan qurilayotganda web jarayon uni parallel qurmasligi kerak.
+    """
+    if training.ingest_in_progress():
+        return Response(
+            {"message": "Mashg‘ulot fayli hali qayta ishlanmoqda, keyinroq urinib ko‘ring."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return None
+
+
 class TrainingSessionViewSet(viewsets.ModelViewSet):
     queryset = TrainingSession.objects.select_related(
         "athlete", "sport_type").all()
@@ -189,23 +276,19 @@ class TrainingSessionViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(athlete_id=athlete_id)
         return queryset
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """
         Custom create method:
         - JSON yoki form-data dan ma’lumot qabul qiladi
         - Fayl yuborilgan bo‘lsa, uni saqlaydi
-        - Qaytgan javobni boyitadi (athlete_fullname, sport_type_name)
+        - Faylni qayta ishlash (kesh, ECG, davomiylik) fon vazifasiga beriladi:
+          javob 202 va vazifa ID si bilan qaytadi
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         instance: TrainingSession = serializer.save()
-        df = instance.emt_muscles_to_df()
-        rows_count = df.shape[0]
-        extract_ecg_file(instance)
-        # 🔹 Qo‘shimcha logika(masalan, avtomatik field o‘zgartirish)
-        instance.duration = rows_count or 0
-        instance.save(update_fields=["duration"])
+        job = enqueue(JobKind.INGEST_TRAINING, instance)
+        instance.refresh_from_db()
 
         headers = self.get_success_headers(serializer.data)
         data = TrainingSessionSerializer(instance).data
@@ -213,29 +296,73 @@ class TrainingSessionViewSet(viewsets.ModelViewSet):
         return Response(
             {
                 "message": "Mashg‘ulot muvaffaqiyatli qo‘shildi ✅",
-                "training_session": data
+                "training_session": data,
+                "job": ProcessingJobSerializer(job).data,
             },
-            status=status.HTTP_201_CREATED,
+            status=(
+                status.HTTP_202_ACCEPTED
+                if job.status in (JobStatus.PENDING, JobStatus.RUNNING)
+                else status.HTTP_201_CREATED
+            ),
             headers=headers,
         )
     # 🔹 Qo‘shimcha metod: GET /api/training-sessions/<id>/emt-data/
 
-    @action(detail=True, methods=["get"])
+    @action(
+        detail=True, methods=["get"],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, *SIGNAL_RENDERERS],
+    )
     def emtData(self, request, pk=None):
         """
         Har bir ustunni (signal kanalini) alohida massiv sifatida yuboradi.
         Plotly uchun qulay format.
+        Accept: application/x-npy, application/vnd.apache.arrow.stream yoki
+        application/x-msgpack bo‘lsa — float32 ustunlar binar ko‘rinishda.
         """
         instance = self.get_object()
-        df = instance.emt_muscles_to_df().dropna(how="all")
+        conflict = ingest_conflict(instance)
+        if conflict is not None:
+            return conflict
+        binary = isinstance(request.accepted_renderer, SignalRenderer)
+        if request.query_params.get("points"):
+            if binary:
+                return Response(
+                    {"message": "Kamaytirilgan (points) javob faqat JSON formatida."},
+                    status=status.HTTP_406_NOT_ACCEPTABLE,
+                )
+            return self._emt_data_downsampled(request, instance)
+
+        if binary:
+            cache = instance.signal_cache()
+            # JSON javob bilan bir xil: hamma kanali NaN bo‘lgan qatorlar
+            # tashlanadi, so‘ng bo‘sh nomli ustun olib tashlanadi
+            keep = np.zeros(cache.rows, dtype=bool)
+            for col in cache.columns:
+                keep |= ~np.isnan(cache.channel(col))
+            columns = [col for col in cache.columns if col != ""]
+            return Response(
+                SignalFrame(
+                    {col: np.nan_to_num(cache.channel(col)[keep], nan=0.0)
+                     for col in columns},
+                    meta={"rows_count": int(keep.sum()), "fs": cache.fs},
+                ),
+                status=status.HTTP_200_OK,
+            )
+
+        # To‘liq aniqlikdagi (eksport uchun) javob
+        cache = instance.signal_cache()
+        df = cache.to_dataframe().dropna(how="all")
         # 🔹 Bo‘sh nomli ustunlarni olib tashlash
         if "" in df.columns:
             df = df.drop(columns=[""])
         # None/NaN yo‘qotish
         df = df.fillna(0)
 
-        # Har bir ustunni alohida massivga ajratamiz
-        data = {col: df[col].tolist() for col in df.columns}
+        # Har bir ustunni alohida massivga ajratamiz (manba aniqligida)
+        data = {
+            col: cache.to_source_precision(col, df[col].to_numpy()).tolist()
+            for col in df.columns
+        }
 
         return Response(
             {
@@ -247,6 +374,225 @@ class TrainingSessionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def _emt_data_downsampled(self, request, instance):
+        """
+        ?points=N&from=&to=&method=minmax|lttb — har bir kanal [from, to)
+        oralig‘ida N nuqtagacha kamaytiriladi (from/to — namuna indeksi).
+        """
+        cache = instance.signal_cache()
+        params = request.query_params
+        try:
+            points = int(params.get("points"))
+            # to=0 — bo‘sh oraliq; faqat parametr berilmasa butun signal
+            start = int(params.get("from") or 0)
+            stop = int(params["to"]) if params.get("to", "") != "" else cache.rows
+        except ValueError:
+            return Response(
+                {"message": "points, from va to butun son bo‘lishi kerak."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if points < DOWNSAMPLE_MIN_POINTS:
+            return Response(
+                {"message": f"points kamida {DOWNSAMPLE_MIN_POINTS} bo‘lishi kerak."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        method = request.query_params.get("method", "minmax")
+        if method not in DOWNSAMPLE_METHODS:
+            return Response(
+                {"message": f"Noma'lum usul: {method}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        stop = max(0, min(stop, cache.rows))
+        start = max(0, min(start, stop))
+
+        index, signals = {}, {}
+        for col in cache.columns:
+            idx, values = downsample(cache.window(col, start, stop), points, method)
+            index[col] = (idx + start).tolist()
+            signals[col] = cache.to_source_precision(col, values).tolist()
+
+        return Response(
+            {
+                "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
+                "rows_count": cache.rows,
+                "columns": cache.columns,
+                "from": start,
+                "to": stop,
+                "method": method,
+                "index": index,  # har bir nuqtaning namuna indeksi
+                "signals": signals,  # har bir kanal uchun massiv
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=True, methods=["get"],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, *SIGNAL_RENDERERS],
+    )
+    def signal(self, request, pk=None):
+        """
+        GET /api/training-sessions/<id>/signal/?channels=LBBCL,RPM&from=<ms>&to=<ms>
+        Keshdan faqat so‘ralgan kanallar va [from, to) vaqt oralig‘i o‘qiladi —
+        javob hajmi mashg‘ulot uzunligiga emas, oyna uzunligiga bog‘liq.
+        """
+        instance = self.get_object()
+        conflict = ingest_conflict(instance)
+        if conflict is not None:
+            return conflict
+        cache = instance.signal_cache()
+
+        channels = request.query_params.get("channels")
+        channels = [c.strip() for c in channels.split(",") if c.strip()] \
+            if channels else cache.columns
+        missing = [c for c in channels if c not in cache]
+        if missing:
+            return Response(
+                {"message": f"Kanal topilmadi: {', '.join(missing)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            from_ms = float(request.query_params.get("from") or 0)
+            to_ms = request.query_params.get("to")
+            to_ms = float(to_ms) if to_ms else None
+            # nan/inf ham float() dan o‘tadi — namuna indeksiga aylanmaydi
+            if not all(math.isfinite(v) for v in (from_ms, to_ms) if v is not None):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"message": "from va to millisekundlarda son bo‘lishi kerak."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # millisekund -> namuna indeksi
+        start = min(max(int(from_ms * cache.fs // 1000), 0), cache.rows)
+        stop = cache.rows if to_ms is None else int(-(-to_ms * cache.fs // 1000))
+        stop = min(max(stop, start), cache.rows)
+
+        meta = {
+            "rows_count": stop - start,
+            "fs": cache.fs,
+            "from": start,
+            "to": stop,
+        }
+        windows = {
+            col: np.nan_to_num(cache.window(col, start, stop), nan=0.0)
+            for col in channels
+        }
+        if isinstance(request.accepted_renderer, SignalRenderer):
+            return Response(SignalFrame(windows, meta=meta), status=status.HTTP_200_OK)
+
+        return Response(
+            {
+                "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
+                **meta,
+                "columns": channels,
+                "signals": {
+                    col: cache.to_source_precision(col, values).tolist()
+                    for col, values in windows.items()
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"], url_path="signal-tiles")
+    def signal_tiles(self, request, pk=None):
+        """
+        GET /api/training-sessions/<id>/signal-tiles/?channel=&level=&from=&to=
+        Oldindan qurilgan piramidadan faqat ko‘rinib turgan bo‘laklar
+        (min/max/mean) qaytariladi. level berilmasa — ?points (standart 2000)
+        ga mos daraja tanlanadi.
+        """
+        instance = self.get_object()
+        conflict = ingest_conflict(instance)
+        if conflict is not None:
+            return conflict
+        pyramid = instance.signal_pyramid()
+        channel = request.query_params.get("channel")
+        if channel not in pyramid.cache.columns:
+            return Response(
+                {"message": f"Kanal topilmadi: {channel}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = int(request.query_params.get("from") or 0)
+            stop = int(request.query_params.get("to") or pyramid.cache.rows)
+            points = int(request.query_params.get("points") or 2000)
+            level = request.query_params.get("level")
+            level = int(level) if level else pyramid.choose_level(
+                start, stop, points)
+        except ValueError:
+            return Response(
+                {"message": "level, from, to va points butun son bo‘lishi kerak."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tile = pyramid.tile(channel, level, start, stop)
+        return Response(
+            {
+                "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
+                "rows_count": pyramid.cache.rows,
+                "levels": pyramid.levels,
+                **tile,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"])
+    def spectrogram(self, request, pk=None):
+        """
+        GET /api/training-sessions/<id>/spectrogram/?channels=LBBCL,RPM&window=1000&hop=250
+        Mashg‘ulot davomida charchoq trendi: har bir oyna (window, hop — ms)
+        uchun MDF, MNF, RMS va 20–60/60–500 Hz quvvat nisbati.
+        """
+        instance = self.get_object()
+        conflict = ingest_conflict(instance)
+        if conflict is not None:
+            return conflict
+        try:
+            window_ms = int(request.query_params.get("window") or DEFAULT_WINDOW_MS)
+            hop_ms = int(request.query_params.get("hop") or DEFAULT_HOP_MS)
+        except ValueError:
+            return Response(
+                {"message": "window va hop millisekundlarda butun son bo‘lishi kerak."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        cache = instance.signal_cache()
+        try:
+            validate_spectrogram_params(window_ms, hop_ms, cache.rows, cache.fs)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        spec = instance.spectrogram(window_ms, hop_ms)
+        channels = request.query_params.get("channels")
+        channels = [c.strip() for c in channels.split(",") if c.strip()] \
+            if channels else spec.channels
+        missing = [c for c in channels if c not in spec.channels]
+        if missing:
+            return Response(
+                {"message": f"Kanal topilmadi: {', '.join(missing)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def to_list(values):
+            # NaN (masalan, 60–500 Hz quvvati 0) JSON da null bo‘ladi
+            return [None if np.isnan(v) else v for v in values.astype(float).tolist()]
+
+        return Response(
+            {
+                "message": "Signal ma’lumotlari muvaffaqiyatli olindi ✅",
+                "window": window_ms,
+                "hop": hop_ms,
+                "rows_count": spec.header["windows"],
+                "time": spec.times().tolist(),  # oyna markazlari, sekund
+                "columns": channels,
+                "signals": {
+                    col: {k: to_list(v) for k, v in spec.channel(col).items()}
+                    for col in channels
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["get"])
     def muscleFatigueGraph(self, request, pk=None):
         """
@@ -295,7 +641,17 @@ class ExercisesViewSet(viewsets.ModelViewSet):
         Custom create method:
         - JSON yoki form-data dan ma’lumot qabul qiladi
         - Fayl yuborilgan bo‘lsa, uni saqlaydi
+        - Mashg‘ulot fayli hali qayta ishlanayotgan bo‘lsa — 409
         """
+        # Fayl hali qayta ishlanayotgan bo‘lsa, davomiylik (duration) ham
+        # tayyor emas — validatsiyadan oldin 409 qaytariladi
+        training_id = str(request.data.get("training", ""))
+        training = TrainingSession.objects.filter(
+            id=training_id).first() if training_id.isdigit() else None
+        conflict = ingest_conflict(training) if training is not None else None
+        if conflict is not None:
+            return conflict
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -305,19 +661,8 @@ class ExercisesViewSet(viewsets.ModelViewSet):
         instance.hrate = instance.calculate_hrate()
         instance.save(update_fields=["signal_length", "hrate"])
 
-        df = instance.training.emt_muscles_to_df()
-        muscles = df.columns.tolist()
-        print(muscles)
-        for muscle in muscles:
-            m = Muscle.objects.filter(shortname=muscle).first()
-            if not m:
-                continue
-            fatigue = predict_fatigue(muscle, instance)
-            MuscleFatigue.objects.create(
-                fatigue=fatigue,
-                muscle=Muscle.objects.get(shortname=muscle),
-                exercise=instance
-            )
+        # Barcha mushaklar uchun bitta paketda bashorat
+        predict_exercise_fatigues(instance)
 
         headers = self.get_success_headers(serializer.data)
         data = ExerciseSerializer(instance).data
@@ -330,3 +675,34 @@ class ExercisesViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
+
+
+class ProcessingJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ProcessingJob.objects.all()
+    serializer_class = ProcessingJobSerializer
+    pagination_class = CustomPagination
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action == "list":  # faqat GET list uchun filterlash
+            training_id = self.request.query_params.get("training_id")
+            job_status = self.request.query_params.get("status")
+            if training_id:
+                queryset = queryset.filter(training_id=training_id)
+            if job_status:
+                queryset = queryset.filter(status=job_status)
+        return queryset
+
+    @action(detail=True, methods=["post"])
+    def retry(self, request, pk=None):
+        """
+        Xatolik bilan tugagan, kechikishda kutayotgan yoki to‘xtab qolgan
+        vazifani qayta navbatga qo‘yadi.
+        """
+        job: ProcessingJob = self.get_object()
+        retry_job(job)
+        return Response(
+            ProcessingJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
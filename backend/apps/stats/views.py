@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from apps.core.models import TrainingSession, Athlete
+from apps.core.models import TrainingSession, Athlete, TrainingMuscleSummary
 
 
 class AdatationLoadStatsAPI(APIView):
@@ -13,13 +13,20 @@ class AdatationLoadStatsAPI(APIView):
         athlete = Athlete.objects.get(id=athlete_id)
 
         trs = TrainingSession.objects.filter(athlete=athlete)
+        k_loads = dict(TrainingMuscleSummary.objects.filter(
+            training__athlete=athlete, muscle__shortname=muscle_shortname
+        ).values_list('training_id', 'k_adapt_load'))
         stats = []
         for tr in trs:
-            stat = tr.calculate_k_adapt_load(muscle_shortname)
+            stat = {
+                'k_adapt_load': k_loads.get(tr.id, 0),
+                'name': tr.title,
+                'created_at': tr.created_at
+            }
             stats.append({
                 'id': tr.id,
                 'title': tr.title,
-                'athlete': tr.athlete.id,
+                'athlete': tr.athlete_id,
                 'stat': stat
             })
         return Response(data=stats)
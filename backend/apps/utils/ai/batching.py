@@ -0,0 +1,176 @@
+"""
+Jarayon ichidagi mikro-paketlash: parallel so‘rovlardagi kichik bashoratlar
+`max_wait_ms` davomida (yoki `max_batch_size` qatorgacha) yig‘iladi va har
+bir model uchun bitta predict bilan bajariladi. Natijalar Future orqali
+qaytariladi.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+
+from . import inference
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        log_interval: float = 60.0,
+    ):
+        """log_interval: paket ko‘rsatkichlari INFO logga yoziladigan oraliq (sekund, 0 — o‘chiq)."""
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.log_interval = log_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._batch_sizes: Counter = Counter()
+        self._last_log = time.monotonic()
+        self._logged_batches = 0
+
+    def submit(
+        self,
+        model_path: str,
+        X: np.ndarray,
+        expect_timeseries: bool = True,
+        backend: str = None,
+    ) -> Future:
+        """X (n, n_features) ni navbatga qo‘yadi; Future natijasi — (n,) massiv."""
+        future = Future()
+        key = (model_path, expect_timeseries, inference.get_backend(backend))
+        self._ensure_started()
+        self._queue.put((key, np.asarray(X, dtype=float), future))
+        return future
+
+    def predict(self, model_path, X, expect_timeseries=True, backend=None) -> np.ndarray:
+        return self.submit(model_path, X, expect_timeseries, backend).result()
+
+    def stats(self) -> dict:
+        """Erishilgan paket o‘lchamlari (qatorlar soni) bo‘yicha ko‘rsatkichlar."""
+        with self._lock:
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        rows = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "max_batch_size": max(sizes, default=0),
+            "histogram": sizes,
+        }
+
+    def log_stats(self) -> None:
+        """Oxirgi logdan beri yangi paketlar bo‘lsa, ko‘rsatkichlarni INFO logga yozadi."""
+        stats = self.stats()
+        if stats["batches"] == self._logged_batches:
+            return
+        self._logged_batches = stats["batches"]
+        logger.info(
+            "Mikro-paketlash: %d paket, %d qator, o‘rtacha %.1f, maksimal %d qator",
+            stats["batches"], stats["rows"], stats["mean_batch_size"],
+            stats["max_batch_size"])
+
+    def _maybe_log_stats(self):
+        if self.log_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.log_stats()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list:
+        """Birinchi so‘rovni kutadi, so‘ng muddat yoki hajm to‘lguncha yig‘adi."""
+        items = [self._queue.get()]
+        rows = len(items[0][1])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[1])
+        return items
+
+    def _run(self):
+        while True:
+            groups: dict[tuple, list] = {}
+            for key, X, future in self._collect():
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(key, []).append((X, future))
+            for key, requests in groups.items():
+                self._predict_group(key, requests)
+            self._maybe_log_stats()
+
+    def _predict_group(self, key, requests):
+        model_path, expect_timeseries, backend = key
+        try:
+            X = np.vstack([X for X, _ in requests])
+            y = inference.predict(model_path, X, expect_timeseries, backend)
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._batch_sizes[len(X)] += 1
+        logger.debug("Paket: %s — %d so‘rov, %d qator",
+                     model_path, len(requests), len(X))
+        start = 0
+        for X_part, future in requests:
+            future.set_result(y[start:start + len(X_part)])
+            start += len(X_part)
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """settings.INFERENCE_BATCHING yoqilgan bo‘lsa — umumiy MicroBatcher, aks holda None."""
+    global _batcher
+    if not getattr(settings, "INFERENCE_BATCHING", False):
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                max_batch_size=getattr(settings, "INFERENCE_BATCH_MAX_SIZE", 64),
+                max_wait_ms=getattr(settings, "INFERENCE_BATCH_MAX_WAIT_MS", 5.0),
+                log_interval=getattr(settings, "INFERENCE_BATCH_LOG_INTERVAL", 60.0),
+            )
+    return _batcher
+
+
+def predict(
+    model_path: str,
+    X: np.ndarray,
+    expect_timeseries: bool = True,
+    backend: str = None,
+) -> np.ndarray:
+    """inference.predict bilan bir xil; paketlash yoqilgan bo‘lsa — MicroBatcher orqali."""
+    batcher = get_batcher()
+    if batcher is None:
+        return inference.predict(model_path, X, expect_timeseries, backend)
+    return batcher.predict(model_path, X, expect_timeseries, backend)
@@ -1,26 +1,28 @@
+import logging
 import os
 from django.conf import settings
-from functools import lru_cache
+from django.db import DatabaseError
 from typing import Optional
 import numpy as np
-import joblib
-from tensorflow import keras
-import tensorflow as tf
-from keras.saving import register_keras_serializable
-from apps.core.models import Muscle, Exercise
-import os
+from apps.core.models import Muscle, Exercise, MuscleFatigue
+from apps.core.summaries import refresh_training
+from apps.core.features import (
+    fatigue_rows,
+    feature_matrix,
+    load_signal_features,
+    model_estimator,
+)
+from . import batching, inference
+# TensorFlow faqat birinchi bashoratda yuklanadi (inference.py)
+from .inference import (  # noqa: F401
+    flat_sigmoid_k,
+    flat_sigmoid_k60,
+    load_model_cached,
+    load_scaler_cached,
+)
 
 current_dir = os.path.join(settings.BASE_DIR, 'apps', 'utils', 'ai')
-
-# Custom sigmoid funksiyalar
-
-
-def flat_sigmoid_k(x, k=0.6):
-    return 1 / (1 + tf.exp(-k * x))
-
-
-@register_keras_serializable()
-def flat_sigmoid_k60(x): return flat_sigmoid_k(x, 0.60)
+logger = logging.getLogger(__name__)
 
 
 def predict_fatigue(
@@ -30,13 +32,18 @@ def predict_fatigue(
     scaler_path: str = os.path.join(
         current_dir, "scaler_2025_10_04.pkl"
     ),
-    expect_timeseries: bool = True
+    expect_timeseries: bool = True,
+    backend: Optional[str] = None,
+    estimator: Optional[str] = None
 ) -> Optional[float]:
     """
     Har bir mushak ID uchun mos modelni yuklab, fatigue ni bashorat qiladi.
     - Features: calculate_emg_features(signal, bmi, uzun, hrate, fs)
     - Scaler: diskdan yuklanadi va faqat transform qilinadi (fit EMAS!)
     - Input shape: agar model vaqt qatorini kutsa, (batch, 1, n_features) reshaped qilinadi.
+    - backend: 'keras' yoki 'numpy' (None — settings.INFERENCE_BACKEND)
+    - estimator: spektral baholovchi (None — modellar o‘qitilgan baholovchi,
+      settings.MODEL_FEATURE_ESTIMATOR; boshqasi berilsa ValueError)
 
     Qaytadi: float fatigue yoki None (noma'lum muscle_id bo‘lsa)
     """
@@ -50,7 +57,8 @@ def predict_fatigue(
     uzun, hrate = exercise.signal_length, exercise.hrate
 
     # 1) Xususiyatlar
-    feats = exercise.calculate_emg_features(muscle_shortname=mid, fs=fs)
+    feats = exercise.calculate_emg_features(
+        muscle_shortname=mid, fs=fs, estimator=model_estimator(estimator))
     feats = _as_2d(np.asarray(feats))  # (n_samples, n_features)
 
     # 2) Scaler (faqat transform!)
@@ -61,18 +69,8 @@ def predict_fatigue(
     model_path = os.path.join(os.path.join(current_dir, muscle.model_url))
 
     try:
-        model = load_model_cached(model_path)
-        # 4) Shape moslash (agar model timeseries kutsa)
-        if expect_timeseries:
-            # (batch, timesteps=1, n_features)
-            X_in = X.reshape((X.shape[0], 1, X.shape[1]))
-        else:
-            # (batch, n_features)
-            X_in = X
-
-        # 5) Bashorat
-        y = model.predict(X_in, verbose=0)
-        y = np.asarray(y).ravel()
+        # 4) Shape moslash (timeseries bo‘lsa (batch, 1, n_features)) va 5) bashorat
+        y = batching.predict(model_path, X, expect_timeseries, backend)
         if y.size == 0:
             # Model chiqishi bo‘sh bo‘lsa, fallback
             return _fallback_formula(mid, bmi, uzun, hrate)
@@ -85,20 +83,166 @@ def predict_fatigue(
         return _fallback_formula(mid, bmi, uzun, hrate)
 
 
-@lru_cache(maxsize=1)
-def load_scaler_cached(scaler_path: str):
-    """Fitted scaler’ni diskdan o‘qib, cache’laydi."""
-    if not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"Scaler topilmadi: {scaler_path}")
-    return joblib.load(scaler_path)
+def predict_exercise_fatigues(
+    exercise: Exercise,
+    fs: int = 1000,
+    scaler_path: str = os.path.join(
+        current_dir, "scaler_2025_10_04.pkl"
+    ),
+    expect_timeseries: bool = True,
+    backend: Optional[str] = None,
+    estimator: Optional[str] = None
+) -> list[MuscleFatigue]:
+    """
+    Mashqdagi barcha mushaklar uchun fatigue ni bitta paketda hisoblaydi.
+    - Signal keshi va BMI bir marta o‘qiladi
+    - Signal xususiyatlari ExerciseFeatureVector jadvalidan olinadi
+    - Barcha mushaklar uchun features matritsasi quriladi, scaler bitta chaqiruv
+    - Qatorlar modellar bo‘yicha guruhlanadi: har bir model uchun bitta predict
+    - Natijalar bitta bulk_create bilan yoziladi (baholovchi bilan birga)
 
+    Qaytadi: yaratilgan MuscleFatigue obyektlari ro‘yxati
+    """
+    cache = exercise.training.signal_cache()
+    muscles = sorted(
+        Muscle.objects.filter(shortname__in=cache.columns),
+        key=lambda m: cache.columns.index(m.shortname)
+    )
+    if not muscles:
+        return []
 
-@lru_cache(maxsize=128)
-def load_model_cached(model_path: str):
-    """Keras modelni cache bilan yuklaydi."""
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model topilmadi: {model_path}")
-    return keras.models.load_model(model_path)
+    bmi = exercise.training.athlete.params.last().bmi
+    estimator = model_estimator(estimator)
+
+    # 1) Xususiyatlar matritsasi (n_muscles, n_features) — saqlangan vektorlardan,
+    # yetishmaganlari bitta vektorli chaqiruv bilan hisoblanadi
+    signal_feats = load_signal_features(
+        exercise.training, [(exercise.first_count, exercise.last_count)],
+        muscles, fs=fs, cache=cache, estimator=estimator,
+    )[0]
+    extra = [bmi, exercise.signal_length, exercise.hrate]
+    feats = np.hstack([
+        signal_feats,
+        np.tile(np.asarray(extra, dtype=float), (len(muscles), 1)),
+    ])
+
+    # 2-3) Scaler va modellar bo‘yicha guruhlangan bashorat
+    fatigues = predict_feature_matrix(
+        feats, muscles, scaler_path, expect_timeseries, backend)
+
+    # 4) Saqlash (bulk_create signal yubormaydi — ko‘rsatkichlarni o‘zimiz yangilaymiz)
+    created = MuscleFatigue.objects.bulk_create([
+        MuscleFatigue(exercise=exercise, muscle=m, fatigue=float(f),
+                      estimator=estimator)
+        for m, f in zip(muscles, fatigues)
+    ])
+    refresh_training(exercise.training_id, [m.id for m in muscles])
+    return created
+
+
+def predict_feature_matrix(
+    feats: np.ndarray,
+    muscles: list,
+    scaler_path: str = os.path.join(
+        current_dir, "scaler_2025_10_04.pkl"
+    ),
+    expect_timeseries: bool = True,
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """
+    Tayyor xususiyatlar matritsasi (n, 18) bo‘yicha fatigue bashorati.
+    muscles[i] — i-qator uchun mushak. Scaler bitta chaqiruv, har bir
+    model uchun bitta predict (INFERENCE_BATCHING yoqilgan bo‘lsa, boshqa
+    so‘rovlar bilan bitta paketga birlashtiriladi).
+    """
+    scaler = load_scaler_cached(scaler_path)
+    X = scaler.transform(feats)
+
+    groups: dict[str, list[int]] = {}
+    for i, m in enumerate(muscles):
+        groups.setdefault(m.model_url, []).append(i)
+
+    fatigues = np.zeros(len(muscles), dtype=float)
+    for model_url, rows in groups.items():
+        model_path = os.path.join(current_dir, model_url)
+        try:
+            fatigues[rows] = batching.predict(
+                model_path, X[rows], expect_timeseries, backend)
+        except Exception as e:
+            names = ", ".join(sorted({muscles[i].shortname for i in rows}))
+            raise Exception(f"[WARN] {names} modeli bilan muammo: {e}")
+    return fatigues
+
+
+def rescore_training(
+    training,
+    muscle_shortnames: Optional[list[str]] = None,
+    fs: int = 1000,
+    scaler_path: str = os.path.join(
+        current_dir, "scaler_2025_10_04.pkl"
+    ),
+    expect_timeseries: bool = True,
+    batch_size: int = 1000,
+    backend: Optional[str] = None,
+    estimator: Optional[str] = None,
+) -> int:
+    """
+    Mashg‘ulotdagi mavjud MuscleFatigue yozuvlarini joriy model va scaler
+    bilan qayta hisoblaydi. Xususiyatlar ExerciseFeatureVector dan o‘qiladi,
+    natijalar bulk_update bilan `batch_size` bo‘laklarda yoziladi.
+
+    Qaytadi: qayta hisoblangan mashqlar soni
+    """
+    rows = fatigue_rows(training, muscle_shortnames)
+    if not rows:
+        return 0
+
+    estimator = model_estimator(estimator)
+    feats = feature_matrix(
+        training, rows, fs=fs, estimator=estimator,
+        bmi=training.athlete.params.last().bmi)
+    fatigues = predict_feature_matrix(
+        feats, [r.muscle for r in rows], scaler_path, expect_timeseries, backend)
+
+    for r, f in zip(rows, fatigues):
+        r.fatigue = float(f)
+        r.estimator = estimator
+    # bulk_update signal yubormaydi — ko‘rsatkichlarni o‘zimiz yangilaymiz
+    MuscleFatigue.objects.bulk_update(
+        rows, ['fatigue', 'estimator'], batch_size=batch_size)
+    refresh_training(training.id, list(dict.fromkeys(r.muscle_id for r in rows)))
+    return len({r.exercise_id for r in rows})
+
+
+def preload_models(
+    scaler_path: str = os.path.join(
+        current_dir, "scaler_2025_10_04.pkl"
+    ),
+    backend: Optional[str] = None
+) -> list[dict]:
+    """Muscle.model_url dagi barcha modellar va scaler ni yuklab, qizdiradi."""
+    model_urls = sorted(set(
+        Muscle.objects.exclude(model_url="").values_list("model_url", flat=True)))
+    return inference.warm_up(
+        [os.path.join(current_dir, url) for url in model_urls], scaler_path, backend)
+
+
+def preload_inference() -> None:
+    """
+    settings.INFERENCE_PRELOAD yoqilgan bo‘lsa, modellarni server jarayoni
+    ishga tushganda (wsgi/asgi, process_jobs) yuklab, qizdiradi. AppConfig.ready
+    da emas — migrate, shell va boshqa buyruqlar modellarni yuklamaydi.
+    """
+    if not getattr(settings, "INFERENCE_PRELOAD", False):
+        return
+    try:
+        timings = preload_models()
+    except DatabaseError as e:
+        # masalan, migrate dan oldin — jadvallar hali yo‘q
+        logger.warning("Modellarni oldindan yuklab bo‘lmadi: %s", e)
+        return
+    total = sum(t["load_ms"] + t["warmup_ms"] for t in timings)
+    logger.info("%d ta model oldindan yuklandi (%.1f ms)", len(timings), total)
 
 
 def _as_2d(X: np.ndarray) -> np.ndarray:
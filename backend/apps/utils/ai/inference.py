@@ -0,0 +1,124 @@
+"""
+Bashorat (inference) steki uchun yupqa qatlam.
+
+TensorFlow, Keras va joblib faqat birinchi murojaatda yuklanadi — migrate,
+shell, admin va faqat o‘qiydigan API workerlari ularni import qilmaydi.
+"""
+import logging
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+
+from .numpy_model import load_numpy_model_cached, npz_path_for
+
+BACKENDS = ("keras", "numpy")
+
+logger = logging.getLogger(__name__)
+
+
+def flat_sigmoid_k(x, k=0.6):
+    import tensorflow as tf
+
+    return 1 / (1 + tf.exp(-k * x))
+
+
+def flat_sigmoid_k60(x): return flat_sigmoid_k(x, 0.60)
+
+
+@lru_cache(maxsize=1)
+def _keras():
+    """Keras ni yuklaydi va maxsus aktivatsiyalarni ro‘yxatdan o‘tkazadi."""
+    from tensorflow import keras
+    from keras.saving import register_keras_serializable
+
+    register_keras_serializable()(flat_sigmoid_k60)
+    return keras
+
+
+@lru_cache(maxsize=1)
+def load_scaler_cached(scaler_path: str):
+    """Fitted scaler’ni diskdan o‘qib, cache’laydi."""
+    import joblib
+
+    if not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"Scaler topilmadi: {scaler_path}")
+    return joblib.load(scaler_path)
+
+
+@lru_cache(maxsize=128)
+def load_model_cached(model_path: str):
+    """Keras modelni cache bilan yuklaydi."""
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model topilmadi: {model_path}")
+    return _keras().models.load_model(model_path)
+
+
+def get_backend(backend: str = None) -> str:
+    """Tanlangan backend: argument yoki settings.INFERENCE_BACKEND (standart 'keras')."""
+    backend = backend or getattr(settings, "INFERENCE_BACKEND", "keras")
+    if backend not in BACKENDS:
+        raise ValueError(f"Noma'lum backend: {backend}. Mavjud: {', '.join(BACKENDS)}")
+    return backend
+
+
+def predict(
+    model_path: str,
+    X: np.ndarray,
+    expect_timeseries: bool = True,
+    backend: str = None,
+) -> np.ndarray:
+    """
+    X (n, n_features) bo‘yicha bashorat; qaytadi: (n,) massiv (birinchi chiqish).
+    Model vaqt qatorini kutsa, kirish (n, 1, n_features) ga keltiriladi.
+    backend='numpy' — model_*.npz dan NumPy bilan (TensorFlow siz).
+    """
+    if get_backend(backend) == "numpy":
+        model = load_numpy_model_cached(npz_path_for(model_path))
+        return model.predict(X).reshape(X.shape[0], -1)[:, 0].astype(float)
+
+    model = load_model_cached(model_path)
+    X_in = X.reshape((X.shape[0], 1, X.shape[1])) if expect_timeseries else X
+    y = np.asarray(model.predict(X_in, verbose=0)).reshape(X.shape[0], -1)
+    return y[:, 0]
+
+
+def warm_up(model_paths, scaler_path: str, backend: str = None) -> list[dict]:
+    """
+    Scaler va modellarni oldindan yuklaydi hamda har bir model uchun bitta
+    soxta bashorat qiladi (Keras grafigi shu yerda quriladi). Birinchi
+    haqiqiy so‘rov barqaror holatdagi kabi tez bajariladi.
+
+    Qaytadi: [{"model", "load_ms", "warmup_ms"}] — har bir model uchun vaqtlar
+    """
+    backend = get_backend(backend)
+    started = time.perf_counter()
+    scaler = load_scaler_cached(scaler_path)
+    X = scaler.transform(np.zeros((1, scaler.n_features_in_)))
+    logger.info("Scaler yuklandi: %s (%.1f ms)", os.path.basename(scaler_path),
+                (time.perf_counter() - started) * 1000)
+
+    timings = []
+    for model_path in model_paths:
+        started = time.perf_counter()
+        try:
+            if backend == "numpy":
+                load_numpy_model_cached(npz_path_for(model_path))
+            else:
+                load_model_cached(model_path)
+            loaded = time.perf_counter()
+            predict(model_path, X, backend=backend)
+        except Exception as e:
+            logger.warning("Model yuklanmadi: %s — %s", model_path, e)
+            continue
+        timing = {
+            "model": os.path.basename(model_path),
+            "load_ms": (loaded - started) * 1000,
+            "warmup_ms": (time.perf_counter() - loaded) * 1000,
+        }
+        timings.append(timing)
+        logger.info("Model tayyor [%s]: %s — yuklash %.1f ms, warm-up %.1f ms",
+                    backend, timing["model"], timing["load_ms"], timing["warmup_ms"])
+    return timings
@@ -0,0 +1,123 @@
+"""
+Keras modellarining faqat NumPy bilan ishlaydigan nusxasi.
+
+Mushak modellari kichik Dense tarmoqlar (18 -> 64 -> 16 -> 1): og‘irliklar
+`.npz` faylga eksport qilinadi va bashorat matritsa ko‘paytmalari bilan
+bajariladi — TensorFlow yuklanmaydi.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+NPZ_FORMAT = 1
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def _flat_sigmoid_k(x, k=0.6):
+    return 1 / (1 + np.exp(-k * x))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "flat_sigmoid_k60": lambda x: _flat_sigmoid_k(x, 0.60),
+}
+
+
+def npz_path_for(model_path: str) -> str:
+    """model_LBBCL.keras -> model_LBBCL.npz"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def _activation_name(activation) -> str:
+    # Dense(activation=Activation(...)) — ichidagi funksiyani olamiz
+    inner = getattr(activation, "activation", None)
+    if inner is not None and inner is not activation:
+        return _activation_name(inner)
+    name = getattr(activation, "__name__", None)
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Qo‘llab-quvvatlanmaydigan aktivatsiya: {activation}")
+    return name
+
+
+def export_model(model, npz_path: str) -> dict:
+    """
+    Keras modelini (Flatten, Dense, Activation qatlamlari) .npz ga yozadi.
+    Qaytadi: qatlamlar tavsifi (nomi va o‘lchamlari).
+    """
+    arrays, activations, layers = {}, [], []
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind in ("Flatten", "InputLayer", "Dropout"):
+            continue
+        if kind == "Activation":
+            if not activations:
+                raise ValueError("Activation qatlami Dense dan oldin kelmasligi kerak")
+            if activations[-1] != "linear":
+                raise ValueError("Dense dan keyin ikkinchi aktivatsiya qo‘llab-quvvatlanmaydi")
+            activations[-1] = _activation_name(layer.activation)
+            continue
+        if kind != "Dense":
+            raise ValueError(f"Qo‘llab-quvvatlanmaydigan qatlam: {kind}")
+
+        weights = layer.get_weights()
+        W = np.asarray(weights[0], dtype=np.float32)
+        b = (np.asarray(weights[1], dtype=np.float32) if layer.use_bias
+             else np.zeros(W.shape[1], dtype=np.float32))
+        i = len(activations)
+        arrays[f"W{i}"], arrays[f"b{i}"] = W, b
+        activations.append(_activation_name(layer.activation))
+        layers.append({"units": W.shape[1], "activation": activations[-1]})
+
+    np.savez(
+        npz_path,
+        format=np.int64(NPZ_FORMAT),
+        activations=np.array(activations),
+        **arrays,
+    )
+    return {"layers": layers}
+
+
+class NumpyModel:
+    """Eksport qilingan Dense tarmoq: predict(X) -> (n, units) massiv."""
+
+    def __init__(self, weights: list[tuple[np.ndarray, np.ndarray]], activations: list[str]):
+        self.weights = weights
+        self.activations = [ACTIVATIONS[a] for a in activations]
+
+    @classmethod
+    def load(cls, npz_path: str) -> "NumpyModel":
+        with np.load(npz_path, allow_pickle=False) as data:
+            if int(data["format"]) != NPZ_FORMAT:
+                raise ValueError(f"Noma'lum .npz formati: {npz_path}")
+            activations = [str(a) for a in data["activations"]]
+            weights = [(data[f"W{i}"], data[f"b{i}"]) for i in range(len(activations))]
+        return cls(weights, activations)
+
+    def predict(self, X) -> np.ndarray:
+        # Flatten: (n, 1, n_features) -> (n, n_features)
+        x = np.asarray(X, dtype=np.float32)
+        x = x.reshape(x.shape[0], -1)
+        with np.errstate(over="ignore"):  # exp toshishi sigmoid da 0/1 beradi
+            for (W, b), activation in zip(self.weights, self.activations):
+                x = activation(x @ W + b)
+        return x
+
+
+@lru_cache(maxsize=128)
+def load_numpy_model_cached(npz_path: str) -> NumpyModel:
+    """NumPy modelini cache bilan yuklaydi."""
+    if not os.path.exists(npz_path):
+        raise FileNotFoundError(
+            f"Model topilmadi: {npz_path} (manage.py export_numpy_models bilan yarating)")
+    return NumpyModel.load(npz_path)
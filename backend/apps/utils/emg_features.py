@@ -0,0 +1,166 @@
+import numpy as np
+
+# Xususiyatlarni hisoblash algoritmi o‘zgarsa, versiyani oshiring —
+# saqlangan xususiyat vektorlari (ExerciseFeatureVector) qayta hisoblanadi
+FEATURE_VERSION = 1
+
+# Spektral baholovchilar: "fft" (butun oyna bo‘yicha bitta rfft) yoki
+# "welch[:segment[:overlap]]" (segmentlar bo‘yicha o‘rtachalangan PSD)
+ESTIMATORS = ("fft", "welch")
+WELCH_SEGMENT = 256
+WELCH_OVERLAP = 0.5
+# Welch da bir vaqtda rfft qilinadigan segmentlar soni (xotira chegarasi)
+WELCH_BLOCK = 256
+
+# calculate_emg_features natijasidagi signal xususiyatlari tartibi
+# (oxiriga bmi, uzun (signal uzunligi), hrate qo‘shiladi)
+FEATURE_NAMES = [
+    "MDF", "MNF", "spectral_centroid", "spectral_variance", "bandwidth",
+    "slope", "band_power_ratio", "RMS", "MAV", "var", "WL", "SSC", "ZCR",
+    "MAD", "WAMP",
+]
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray, fill=0.0) -> np.ndarray:
+    """den == 0 bo‘lgan joylarda `fill` qaytaradi."""
+    out = np.full(np.shape(num), fill, dtype=float)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def parse_estimator(estimator: str = "fft") -> tuple[str, int, float]:
+    """'welch:512:0.5' -> ('welch', 512, 0.5); 'fft' -> ('fft', 0, 0.0)."""
+    name, *params = (estimator or "fft").split(":")
+    if name not in ESTIMATORS:
+        raise ValueError(
+            f"Noma'lum baholovchi: {name}. Mavjud: {', '.join(ESTIMATORS)}")
+    if name == "fft":
+        return name, 0, 0.0
+    segment = int(params[0]) if params else WELCH_SEGMENT
+    overlap = float(params[1]) if len(params) > 1 else WELCH_OVERLAP
+    if segment < 2 or not 0 <= overlap < 1:
+        raise ValueError(f"Welch parametrlari noto‘g‘ri: {estimator}")
+    return name, segment, overlap
+
+
+def estimator_key(estimator: str = "fft") -> str:
+    """Baholovchining to‘liq (saqlash uchun) yozuvi: 'fft' yoki 'welch:256:0.5'."""
+    name, segment, overlap = parse_estimator(estimator)
+    return name if name == "fft" else f"{name}:{segment}:{overlap:g}"
+
+
+def _welch_psd(x: np.ndarray, fs: int, segment: int, overlap: float):
+    """
+    Segmentlar (Hann oynasi) bo‘yicha o‘rtachalangan PSD.
+    Segmentlar nusxasiz (strided view) olinadi va bloklab yig‘iladi —
+    xotira oyna uzunligiga emas, segment uzunligiga bog‘liq.
+    """
+    n_rows, N = x.shape
+    segment = min(segment, N)
+    step = max(int(segment * (1 - overlap)), 1)
+    taper = np.hanning(segment) if segment > 2 else np.ones(segment)
+    frames = np.lib.stride_tricks.sliding_window_view(x, segment, axis=1)[:, ::step]
+    n_frames = frames.shape[1]
+
+    psd = np.zeros((n_rows, segment // 2 + 1))
+    for start in range(0, n_frames, WELCH_BLOCK):
+        block = frames[:, start:start + WELCH_BLOCK]
+        block = (block - block.mean(axis=2, keepdims=True)) * taper
+        psd += np.sum(np.abs(np.fft.rfft(block, axis=2)) ** 2, axis=1)
+    psd /= n_frames * np.sum(taper ** 2)
+    return np.fft.rfftfreq(segment, d=1.0/fs), psd, segment
+
+
+def signal_features(signals, fs: int = 1000, estimator: str = "fft") -> np.ndarray:
+    """
+    EMG signal xususiyatlarini NumPy massiv amallari bilan hisoblaydi.
+
+    signals: 1-D (samples) yoki 2-D (kanallar × samples / oynalar × samples)
+    estimator: "fft" yoki "welch[:segment[:overlap]]" (parse_estimator)
+    Qaytadi: (n, len(FEATURE_NAMES)) o‘lchamli xususiyatlar matritsasi
+    """
+    x = np.asarray(signals, dtype=float)
+    if x.ndim == 1:
+        x = x.reshape(1, -1)
+    n_rows, N = x.shape
+    name, segment, overlap = parse_estimator(estimator)
+
+    # ======= FREQUENCY FEATURES =======
+    if name == "welch" and N >= 2:
+        # spektr nuqtalari soni segment uzunligi bilan chegaralangan
+        freqs, PSD_fft, n_spec = _welch_psd(x, fs, segment, overlap)
+        amplitude = np.sqrt(PSD_fft)
+    else:
+        X = np.fft.rfft(x, axis=1)
+        freqs = np.fft.rfftfreq(N, d=1.0/fs)
+        amplitude = np.abs(X)
+        PSD_fft = amplitude**2 / N
+        n_spec = N
+
+    m0 = np.sum(PSD_fft, axis=1)
+    MNF = _safe_div(np.sum(freqs * PSD_fft, axis=1), m0)
+    amp_sum = np.sum(amplitude, axis=1)
+    spectral_centroid = _safe_div(np.sum(freqs * amplitude, axis=1), amp_sum)
+
+    cumulative_power = np.cumsum(PSD_fft, axis=1)
+    MDF_idx = np.argmax(cumulative_power >= (m0 / 2.0)[:, None], axis=1)
+    MDF = freqs[MDF_idx]
+
+    spectral_variance = _safe_div(
+        np.sum(((freqs - MNF[:, None])**2) * PSD_fft, axis=1), m0)
+    spectral_variance = spectral_variance / (n_spec - 1)
+    bandwidth = np.sqrt(spectral_variance)
+
+    # log10(amplitude) ning chastotaga nisbatan chiziqli regressiya qiyaligi
+    eps = 1e-8
+    valid = freqs > 0
+    if np.sum(valid) > 0:
+        f = freqs[valid]
+        y = np.log10(amplitude[:, valid] + eps)
+        f_c = f - f.mean()
+        slope = (y - y.mean(axis=1, keepdims=True)) @ f_c / np.sum(f_c**2)
+    else:
+        slope = np.zeros(n_rows)
+
+    low_band = (freqs >= 20) & (freqs < 60)
+    high_band = (freqs >= 60) & (freqs <= 500)
+    low_power = np.sum(PSD_fft[:, low_band], axis=1)
+    high_power = np.sum(PSD_fft[:, high_band], axis=1)
+    band_power_ratio = _safe_div(low_power, high_power, fill=np.nan)
+
+    # ======= AMPLITUDE FEATURES =======
+    RMS = np.sqrt(np.mean(x**2, axis=1))
+    MAV = np.mean(np.abs(x), axis=1)
+    var_val = np.var(x, axis=1)
+    d = np.diff(x, axis=1)
+    abs_d = np.abs(d)
+    WL = np.sum(abs_d, axis=1)
+
+    # Dinamik threshold
+    signal_range = np.ptp(x, axis=1)
+    threshold_ssc = np.where(signal_range > 0, 0.01 * signal_range, 0.01)
+    thr = threshold_ssc[:, None]
+
+    # Slope sign changes — ketma-ket ayirmalar ishorasi almashgan joylar
+    d1, d2 = d[:, :-1], d[:, 1:]
+    ssc_mask = (d1 * d2 < 0) & ((abs_d[:, :-1] > thr) | (abs_d[:, 1:] > thr))
+    ssc = np.sum(ssc_mask, axis=1) / (N - 1)
+
+    ZCR = np.count_nonzero(np.diff(np.sign(x), axis=1), axis=1)
+
+    MAD = np.median(np.abs(x - np.median(x, axis=1, keepdims=True)), axis=1)
+    wamp = np.sum(abs_d > thr, axis=1)
+
+    return np.column_stack([
+        MDF, MNF, spectral_centroid, spectral_variance, bandwidth, slope,
+        band_power_ratio, RMS, MAV, var_val, WL, ssc, ZCR, MAD, wamp,
+    ])
+
+
+def emg_features(signal, bmi, uzun, hrate, fs: int = 1000, estimator: str = "fft") -> list:
+    """
+    Bitta signal uchun modelga kiradigan 18 ta xususiyat ro‘yxati:
+    FEATURE_NAMES + [bmi, uzun, hrate].
+    """
+    feats = signal_features(signal, fs=fs, estimator=estimator)[0]
+    return [*feats.tolist(), bmi, uzun, hrate]
@@ -0,0 +1,90 @@
+import numpy as np
+
+# Kamida birinchi va oxirgi nuqta qaytadi
+MIN_POINTS = 2
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    """[0, n) oralig‘ini n_buckets ta teng bo‘lakka bo‘luvchi chegaralar."""
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def _first_in_bucket(mask: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    """Har bir bo‘lakda mask True bo‘lgan birinchi indeks."""
+    idx = np.flatnonzero(mask)
+    b = bucket[idx]
+    return idx[np.r_[True, b[1:] != b[:-1]]]
+
+
+def minmax_downsample(y, n_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max bo‘laklar: har bir bo‘lakdan eng kichik va eng katta nuqta
+    (vaqt tartibida) olinadi — cho‘qqilar yo‘qolmaydi.
+    Qaytadi: (indekslar, qiymatlar), uzunligi <= n_points.
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float), nan=0.0)
+    n = len(y)
+    if n <= n_points or n_points < MIN_POINTS:
+        return np.arange(n), y
+
+    n_buckets = n_points // 2
+    edges = _bucket_edges(n, n_buckets)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    mins = np.minimum.reduceat(y, edges[:-1])
+    maxs = np.maximum.reduceat(y, edges[:-1])
+    i_min = _first_in_bucket(y == mins[bucket], bucket)
+    i_max = _first_in_bucket(y == maxs[bucket], bucket)
+
+    idx = np.sort(np.stack([i_min, i_max], axis=1), axis=1).ravel()
+    idx = idx[np.r_[True, idx[1:] != idx[:-1]]]
+    return idx, y[idx]
+
+
+def lttb_downsample(y, n_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets: shaklni saqlaydigan kamaytirish.
+    Bo‘lak ichidagi uchburchak yuzalari vektorli hisoblanadi, tashqi
+    sikl faqat bo‘laklar soni (n_points) bo‘yicha.
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float), nan=0.0)
+    n = len(y)
+    if n <= n_points or n_points < MIN_POINTS:
+        return np.arange(n), y
+    if n_points == MIN_POINTS:
+        idx = np.array([0, n - 1])
+        return idx, y[idx]
+
+    edges = _bucket_edges(n - 2, n_points - 2) + 1
+    x = np.arange(n, dtype=float)
+    # Har bir bo‘lakning o‘rtacha nuqtasi (keyingi bo‘lak uchun tayanch)
+    sums = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_y = np.r_[sums / counts, y[-1]]
+    avg_x = np.r_[(edges[:-1] + edges[1:] - 1) / 2.0, n - 1]
+
+    idx = np.empty(n_points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx, y[idx]
+
+
+METHODS = {
+    "minmax": minmax_downsample,
+    "lttb": lttb_downsample,
+}
+
+
+def downsample(y, n_points: int, method: str = "minmax") -> tuple[np.ndarray, np.ndarray]:
+    """Signalni `method` ('minmax' yoki 'lttb') bilan n_points gacha kamaytiradi."""
+    if method not in METHODS:
+        raise ValueError(f"Noma'lum usul: {method}. Mavjud: {', '.join(METHODS)}")
+    if n_points < MIN_POINTS:
+        raise ValueError(f"n_points kamida {MIN_POINTS} bo‘lishi kerak.")
+    return METHODS[method](y, n_points)
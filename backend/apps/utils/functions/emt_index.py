@@ -0,0 +1,202 @@
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .emt_parser import (
+    ENCODING,
+    EMTData,
+    _names,
+    _read_kwargs,
+    _select,
+    estimate_fs,
+    is_header_line,
+)
+from .signal_cache import (
+    CACHE_VERSION,
+    _read_header,
+    _write_header,
+    cache_dir,
+    source_signature,
+)
+
+LINES_HEADER_NAME = "emt.lines.json"
+LINES_OFFSETS_NAME = "emt.lines.i64"
+# Har K-chi ma'lumot satrining bayt ofseti saqlanadi
+DEFAULT_EVERY = 1024
+BLOCK_SIZE = 1 << 24
+NEWLINE = ord("\n")
+CR = ord("\r")
+SPACE = ord(" ")
+
+
+class EMTLineIndex:
+    """
+    EMT matn faylidagi satrlar indeksi: header joyi va har `every`-chi
+    ma'lumot satrining bayt ofseti. Istalgan namunaga `seek` qilib, faqat
+    kerakli satrlarni o‘qish imkonini beradi.
+    """
+
+    def __init__(self, header: dict, offsets: np.ndarray):
+        self.header = header
+        self.offsets = offsets
+
+    @property
+    def every(self) -> int:
+        return self.header["every"]
+
+    @property
+    def rows(self) -> int:
+        return self.header["rows"]
+
+    @property
+    def names(self) -> list[str]:
+        return self.header["names"]
+
+    def seek(self, f, row: int) -> None:
+        """Fayl ko‘rsatkichini `row`-namuna satri boshiga qo‘yadi."""
+        row = max(0, min(row, self.rows))
+        if not len(self.offsets):
+            f.seek(self.header["data_offset"])
+            return
+        block = min(row // self.every, len(self.offsets) - 1)
+        f.seek(int(self.offsets[block]))
+        skip = row - block * self.every
+        while skip > 0:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip(b" \r\n"):
+                skip -= 1
+
+    def read_window(
+        self,
+        path: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        channels: Optional[list[str]] = None,
+        dtype=np.float32,
+    ) -> EMTData:
+        """[start, stop) namunalarini o‘qiydi — vaqt oyna uzunligiga bog‘liq."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        start = max(0, min(start, stop))
+        usecols = _select(self.names, channels)
+        if "Frame" in usecols:
+            usecols.remove("Frame")
+
+        if stop == start:
+            columns = {c: np.empty(0, dtype=dtype) for c in usecols if c != "Time"}
+            return EMTData(columns=columns, time=np.empty(0), fs=self.header["fs"])
+
+        with open(path, "rb") as f:
+            self.seek(f, start)
+            df = pd.read_csv(
+                f, nrows=stop - start, **_read_kwargs(self.names, usecols, dtype))
+
+        time = df.pop("Time").to_numpy() if "Time" in df.columns else None
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        return EMTData(columns=columns, time=time, fs=self.header["fs"])
+
+
+def _data_end(f, size: int) -> int:
+    """Fayl oxiridagi bo‘sh satrlar/probellarni hisobga olmagan holda tugash joyi."""
+    tail = min(size, 4096)
+    f.seek(size - tail)
+    return size - tail + len(f.read(tail).rstrip())
+
+
+def _keep_rows(kept: list, starts: np.ndarray, rows: int, every: int) -> int:
+    """Bo‘sh bo‘lmagan satr boshlaridan har `every`-chisini saqlaydi; yangi sonni qaytaradi."""
+    numbers = np.arange(rows, rows + len(starts))
+    kept.append(starts[numbers % every == 0])
+    return rows + len(starts)
+
+
+def build_line_index(path: str, every: int = DEFAULT_EVERY):
+    """
+    Faylni bloklab o‘qib, yangi satr belgilarini numpy bilan topadi.
+    Qaytadi: (header, offsets) — offsets[i] = (i*every)-namuna satri ofseti.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while True:
+            header_offset = f.tell()
+            raw = f.readline()
+            if not raw:
+                raise RuntimeError(
+                    "Header ('Frame','Time') topilmadi — format o‘zgargan bo‘lishi mumkin.")
+            line = raw.decode(ENCODING, errors="replace")
+            if is_header_line(line):
+                break
+        names = _names([c.strip() for c in line.rstrip("\r\n").split("\t")])
+        data_offset = f.tell()
+        end = _data_end(f, size)
+
+        # Satr boshlari bloklab topiladi, faqat har `every`-chisi saqlanadi.
+        # Bo‘sh satrlar (faqat probel/CR) read_emt kabi hisobga olinmaydi.
+        kept, rows, position = [np.empty(0, dtype=np.int64)], 0, data_offset
+        carry, carry_solid = data_offset, 0
+        f.seek(data_offset)
+        while position < end:
+            block = f.read(min(BLOCK_SIZE, end - position))
+            buf = np.frombuffer(block, dtype=np.uint8)
+            solid = np.concatenate(([0], np.cumsum(
+                (buf != NEWLINE) & (buf != CR) & (buf != SPACE))))
+            newlines = np.flatnonzero(buf == NEWLINE)
+            if len(newlines):
+                lows = np.concatenate(([0], newlines[:-1] + 1))
+                content = solid[newlines] - solid[lows]
+                content[0] += carry_solid
+                starts = np.concatenate(
+                    ([carry], newlines[:-1].astype(np.int64) + position + 1))
+                rows = _keep_rows(kept, starts[content > 0], rows, every)
+                carry = int(newlines[-1]) + position + 1
+                carry_solid = int(solid[-1] - solid[newlines[-1] + 1])
+            else:
+                carry_solid += int(solid[-1])
+            position += len(block)
+        # Oxirgi satr yangi satr belgisisiz tugashi mumkin
+        if carry < end and carry_solid:
+            rows = _keep_rows(kept, np.array([carry], dtype=np.int64), rows, every)
+
+    # fs ni birinchi satrlardan aniqlaymiz
+    fs = None
+    if rows:
+        with open(path, "rb") as f:
+            f.seek(data_offset)
+            head = pd.read_csv(
+                f, nrows=min(rows, 1000), **_read_kwargs(names, ["Time"], np.float32))
+        fs = estimate_fs(head["Time"].to_numpy())
+
+    header = {
+        "version": CACHE_VERSION,
+        "source": source_signature(path),
+        "every": int(every),
+        "header_offset": int(header_offset),
+        "data_offset": int(data_offset),
+        "rows": int(rows),
+        "fs": fs or estimate_fs(None),
+        "names": names,
+    }
+    return header, np.concatenate(kept)
+
+
+def open_line_index(session_id, source_path: str) -> Optional[EMTLineIndex]:
+    """Satrlar indeksini ochadi; yo‘q yoki EMT fayl o‘zgargan bo‘lsa None."""
+    directory = cache_dir(session_id)
+    header = _read_header(os.path.join(directory, LINES_HEADER_NAME), source_path)
+    if header is None:
+        return None
+    offsets = np.fromfile(os.path.join(directory, LINES_OFFSETS_NAME), dtype="<i8")
+    return EMTLineIndex(header, offsets)
+
+
+def write_line_index(session_id, source_path: str, every: int = DEFAULT_EVERY) -> EMTLineIndex:
+    """EMT fayl uchun satrlar indeksini quradi va kesh papkasiga yozadi."""
+    directory = cache_dir(session_id)
+    os.makedirs(directory, exist_ok=True)
+    header, offsets = build_line_index(source_path, every)
+    offsets.astype("<i8").tofile(os.path.join(directory, LINES_OFFSETS_NAME))
+    _write_header(os.path.join(directory, LINES_HEADER_NAME), header)
+    return EMTLineIndex(header, offsets)
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import IO, Optional
+
+import numpy as np
+import pandas as pd
+
+ENCODING = "latin1"
+DEFAULT_FS = 1000
+
+
+@dataclass
+class EMTData:
+    """EMT fayldan o‘qilgan raqamli ma'lumot."""
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+    time: Optional[np.ndarray] = None
+    fs: int = DEFAULT_FS
+
+    @property
+    def rows(self) -> int:
+        if self.time is not None:
+            return len(self.time)
+        return len(next(iter(self.columns.values()), []))
+
+
+def is_header_line(line: str) -> bool:
+    return "Frame" in line and "Time" in line and "\t" in line
+
+
+def find_header(f: IO[bytes], encoding: str = ENCODING) -> list[str]:
+    """
+    Faylni satrma-satr o‘qib, header ('Frame', 'Time') ni topadi.
+    Qaytgandan so‘ng fayl ko‘rsatkichi birinchi ma'lumot satrida turadi.
+    """
+    while True:
+        raw = f.readline()
+        if not raw:
+            raise RuntimeError(
+                "Header ('Frame','Time') topilmadi — format o‘zgargan bo‘lishi mumkin.")
+        line = raw.decode(encoding, errors="replace")
+        if is_header_line(line):
+            return [c.strip() for c in line.rstrip("\r\n").split("\t")]
+
+
+def _names(header: list[str]) -> list[str]:
+    """Bo‘sh header nomlariga (oxiridagi tab) vaqtinchalik nom beradi."""
+    return [name or f"_unnamed_{i}" for i, name in enumerate(header)]
+
+
+def _read_kwargs(
+    names: list[str], usecols: list[str], dtype, encoding: str = ENCODING
+) -> dict:
+    return dict(
+        sep="\t",
+        header=None,
+        names=names,
+        usecols=usecols,
+        dtype={c: (np.float64 if c == "Time" else dtype) for c in usecols},
+        engine="c",
+        encoding=encoding,
+        skip_blank_lines=True,
+    )
+
+
+def _select(names: list[str], channels: Optional[list[str]]) -> list[str]:
+    usecols = [n for n in names if not n.startswith("_unnamed_")]
+    if channels is not None:
+        wanted = set(channels) | {"Time"}
+        usecols = [n for n in usecols if n in wanted]
+    return usecols
+
+
+def estimate_fs(time: Optional[np.ndarray], default: int = DEFAULT_FS) -> int:
+    """'Time' ustunidan (sekund) diskretlash chastotasini aniqlaydi."""
+    if time is None or len(time) < 2:
+        return default
+    step = float(np.median(np.diff(time)))
+    return int(round(1.0 / step)) if step > 0 else default
+
+
+def read_emt(
+    path: str,
+    channels: Optional[list[str]] = None,
+    dtype=np.float32,
+    keep_frame: bool = False,
+) -> EMTData:
+    """
+    BTS EMT faylni bir marta oqim bilan o‘qiydi.
+    Header joyida topiladi, qolgan qism C engine bilan to‘g‘ridan-to‘g‘ri
+    raqamli (float32) ustunlarga o‘qiladi — satrlar ro‘yxati ham,
+    vaqtinchalik fayl ham yaratilmaydi.
+    """
+    with open(path, "rb") as f:
+        names = _names(find_header(f))
+        usecols = _select(names, channels)
+        if not keep_frame and "Frame" in usecols:
+            usecols.remove("Frame")
+        df = pd.read_csv(f, **_read_kwargs(names, usecols, dtype))
+
+    time = df.pop("Time").to_numpy() if "Time" in df.columns else None
+    columns = {col: df[col].to_numpy() for col in df.columns}
+    return EMTData(columns=columns, time=time, fs=estimate_fs(time))
+
+
+def read_emt_dataframe(path: str, encoding: str = ENCODING) -> pd.DataFrame:
+    """EMT faylni barcha ustunlari (Frame, Time bilan) DataFrame sifatida o‘qiydi."""
+    with open(path, "rb") as f:
+        names = _names(find_header(f, encoding))
+        usecols = _select(names, None)
+        return pd.read_csv(
+            f, **_read_kwargs(names, usecols, np.float32, encoding))
+
+
+def read_ecg(path: str, dtype=np.float32) -> np.ndarray:
+    """ECG fayl (headersiz, bitta ustun) ni raqamli massivga o‘qiydi."""
+    with open(path, "rb") as f:
+        df = pd.read_csv(
+            f, sep="\t", header=None, usecols=[0], dtype={0: dtype},
+            engine="c", encoding=ENCODING,
+        )
+    return df[0].to_numpy()
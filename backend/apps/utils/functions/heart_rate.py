@@ -0,0 +1,43 @@
+import numpy as np
+
+
+class HeartRateRamp:
+    """
+    Mashg‘ulot davomida pre -> post chiziqli yurak urishi rampasi.
+    Namunalar saqlanmaydi: istalgan [start, stop) oynasi yig‘indisi va
+    o‘rtachasi yopiq formula bilan (O(1)) hisoblanadi. Interfeys RangeIndex
+    bilan bir xil (rows, sum, mean) — qurilma ECG fayli o‘rnida ishlatiladi.
+    """
+
+    def __init__(self, pre: float, post: float, rows: int):
+        self.pre = float(pre)
+        self.post = float(post)
+        self._rows = int(rows)
+        # i-namuna: pre + slope * i, oxirgi namuna aynan post
+        self.slope = (self.post - self.pre) / (self._rows - 1) if self._rows > 1 else 0.0
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def _bounds(self, start, stop) -> tuple[int, int]:
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        return start, max(start, stop)
+
+    def values(self, start=None, stop=None) -> np.ndarray:
+        """Oyna namunalari (faqat kerak bo‘lganda hosil qilinadi)."""
+        start, stop = self._bounds(start, stop)
+        return self.pre + self.slope * np.arange(start, stop, dtype=float)
+
+    def sum(self, start=None, stop=None) -> float:
+        start, stop = self._bounds(start, stop)
+        n = stop - start
+        # arifmetik progressiya: n * (birinchi + oxirgi) / 2
+        return n * (self.pre + self.slope * (start + stop - 1) / 2) if n else 0.0
+
+    def mean(self, start=None, stop=None):
+        """Oyna o‘rtachasi; bo‘sh oyna uchun None."""
+        start, stop = self._bounds(start, stop)
+        if stop == start:
+            return None
+        return self.pre + self.slope * (start + stop - 1) / 2
@@ -0,0 +1,108 @@
+"""
+Jarayon darajasidagi mushak nomlari indeksi: EMT ustunlarini Muscle
+yozuvlariga moslash uchun bir marta quriladi va barcha o‘quvchilar
+(signal keshi, satrlar indeksi, ID larni aniqlash) tomonidan qayta
+ishlatiladi. Muscle saqlansa yoki o‘chirilsa, apps.core.signals indeksni
+bekor qiladi — keyingi murojaatda qayta quriladi.
+
+Boshqa jarayonlar (workerlar) o‘zgarishni ikki yo‘l bilan sezadi:
+Django cache dagi versiya kaliti (umumiy cache — Redis, Memcached,
+DB — sozlangan bo‘lsa, darhol) va settings.MUSCLE_INDEX_TTL (sekund)
+dan eski indeksni qayta qurish.
+"""
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "muscle_index:version"
+
+# Tokenlashda e'tiborsiz qoldiriladigan so‘zlar
+STOP_TOKENS = frozenset({"ch", "channel", "emg", "signal"})
+# Mos deb topilishi uchun kamida shuncha umumiy token kerak
+MIN_MATCH_TOKENS = 2
+
+
+def tokens(s: str) -> set:
+    """Matnni tokenlarga bo‘lish (moslik uchun)."""
+    return {w for w in re.findall(r"[a-z]+", s.lower()) if w not in STOP_TOKENS}
+
+
+class MuscleIndex:
+    """Mushak nomlari bo‘yicha lug‘atlar va token -> mushak ID lari indeksi."""
+
+    def __init__(self, muscles, version: str = None):
+        """muscles: id bo‘yicha tartiblangan (id, name, shortname) qatorlari."""
+        self.version = version
+        self.built_at = time.monotonic()
+        self.shortname_by_name: dict[str, str] = {}
+        self.name_by_shortname: dict[str, str] = {}
+        self.token_ids: dict[str, list[int]] = {}
+        self._order: dict[int, int] = {}
+        for pos, (muscle_id, name, shortname) in enumerate(muscles):
+            self.shortname_by_name[name.lower()] = shortname
+            self.name_by_shortname.setdefault(shortname, name)
+            self._order[muscle_id] = pos
+            for token in tokens(name):
+                self.token_ids.setdefault(token, []).append(muscle_id)
+
+    def shortname(self, column: str) -> Optional[str]:
+        """Ustun nomi (katta-kichik harfsiz) aynan mushak nomi bo‘lsa — uning shortname i."""
+        return self.shortname_by_name.get(column.lower())
+
+    def best_match_id(self, column: str) -> Optional[int]:
+        """
+        Ustun bilan eng ko‘p umumiy tokenga ega mushak ID si (kamida
+        MIN_MATCH_TOKENS ta). Teng bo‘lsa — birinchi (kichik ID li) mushak.
+        """
+        scores = Counter()
+        for token in tokens(column):
+            scores.update(self.token_ids.get(token, ()))
+        if not scores:
+            return None
+        best_id = max(scores, key=lambda i: (scores[i], -self._order[i]))
+        return best_id if scores[best_id] >= MIN_MATCH_TOKENS else None
+
+
+_index: Optional[MuscleIndex] = None
+_lock = threading.Lock()
+
+
+def _is_fresh(index: Optional[MuscleIndex], version) -> bool:
+    ttl = getattr(settings, "MUSCLE_INDEX_TTL", 60)
+    return (index is not None and index.version == version
+            and time.monotonic() - index.built_at < ttl)
+
+
+def get_muscle_index() -> MuscleIndex:
+    """
+    Umumiy indeks. Versiya kaliti o‘zgargan yoki TTL o‘tgan bo‘lsa, bitta
+    so‘rov bilan qayta quriladi; aks holda bazaga murojaat qilinmaydi.
+    """
+    global _index
+    version = cache.get(VERSION_KEY)
+    index = _index
+    if _is_fresh(index, version):
+        return index
+    from apps.core.models import Muscle
+
+    with _lock:
+        if not _is_fresh(_index, version):
+            _index = MuscleIndex(
+                Muscle.objects.order_by('id').values_list('id', 'name', 'shortname'),
+                version=version,
+            )
+        return _index
+
+
+def invalidate_muscle_index() -> None:
+    """Indeksni bekor qiladi: shu jarayonda va (versiya kaliti orqali) boshqalarida."""
+    global _index
+    with _lock:
+        _index = None
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
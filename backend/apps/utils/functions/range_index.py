@@ -0,0 +1,74 @@
+import numpy as np
+
+# Prefiks yig‘indilar tartibi (qatorlar)
+SUM, SUMSQ, ABS, ABSDIFF = range(4)
+DTYPE = "<f8"
+
+
+def build_prefix(x) -> np.ndarray:
+    """
+    Signal uchun (4, n+1) o‘lchamli prefiks yig‘indilar:
+    x, x², |x| va |diff(x)|. p[:, i] — birinchi i ta namunaning yig‘indisi.
+    """
+    x = np.nan_to_num(np.asarray(x, dtype=float), nan=0.0)
+    n = len(x)
+    p = np.zeros((4, n + 1), dtype=DTYPE)
+    np.cumsum(x, out=p[SUM, 1:])
+    np.cumsum(x * x, out=p[SUMSQ, 1:])
+    np.cumsum(np.abs(x), out=p[ABS, 1:])
+    if n > 1:
+        # p[ABSDIFF, i] = sum_{k < i-1} |x[k+1] - x[k]|  (x[:i] ning WL qiymati)
+        np.cumsum(np.abs(np.diff(x)), out=p[ABSDIFF, 2:])
+    return p
+
+
+class RangeIndex:
+    """
+    Prefiks yig‘indilar ustidagi indeks: istalgan [start, stop) oynasi
+    uchun statistikalar ikki marta o‘qish bilan (O(1)) hisoblanadi.
+    """
+
+    def __init__(self, prefix: np.ndarray):
+        self.prefix = prefix
+
+    @property
+    def rows(self) -> int:
+        return self.prefix.shape[1] - 1
+
+    def _bounds(self, start, stop) -> tuple[int, int]:
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        return start, max(start, stop)
+
+    def _range_sum(self, row: int, start: int, stop: int) -> float:
+        return float(self.prefix[row, stop] - self.prefix[row, start])
+
+    def sum(self, start=None, stop=None) -> float:
+        start, stop = self._bounds(start, stop)
+        return self._range_sum(SUM, start, stop)
+
+    def mean(self, start=None, stop=None):
+        """Oyna o‘rtachasi; bo‘sh oyna uchun None."""
+        start, stop = self._bounds(start, stop)
+        n = stop - start
+        if n == 0:
+            return None
+        return self._range_sum(SUM, start, stop) / n
+
+    def stats(self, start=None, stop=None) -> dict:
+        """Oyna uchun mean, RMS, MAV, var va WL (to‘lqin uzunligi)."""
+        start, stop = self._bounds(start, stop)
+        n = stop - start
+        if n == 0:
+            return {"n": 0, "mean": None, "rms": None, "mav": None,
+                    "var": None, "wl": None}
+        mean = self._range_sum(SUM, start, stop) / n
+        meansq = self._range_sum(SUMSQ, start, stop) / n
+        return {
+            "n": n,
+            "mean": mean,
+            "rms": float(np.sqrt(meansq)),
+            "mav": self._range_sum(ABS, start, stop) / n,
+            "var": max(meansq - mean * mean, 0.0),
+            "wl": float(self.prefix[ABSDIFF, stop] - self.prefix[ABSDIFF, start + 1])
+            if n > 1 else 0.0,
+        }
@@ -0,0 +1,271 @@
+import json
+import os
+import shutil
+import uuid
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from . import range_index
+from .muscle_index import get_muscle_index
+from .range_index import RangeIndex, build_prefix
+
+# Kesh formati o‘zgarsa, versiyani oshiring — eski keshlar qayta quriladi
+# (3: EMG kanallari uchun prefiks fayllari olib tashlandi;
+#  4: kanal manbasidagi kasr xonalari saqlanadi)
+CACHE_VERSION = 4
+CACHE_ROOT = "signal_cache"
+HEADER_NAME = "header.json"
+ECG_HEADER_NAME = "ecg.json"
+ECG_PREFIX_NAME = "ecg.prefix.f64"
+DTYPE = "<f4"
+# Manba aniqligi shu kasr xonalarigacha qidiriladi
+MAX_DECIMALS = 9
+# Aniqlik avval shuncha namunada taxmin qilinadi, so‘ng butun kanalda tekshiriladi
+DECIMALS_SAMPLE = 10_000
+
+
+def cache_dir(session_id) -> str:
+    """Mashg‘ulot uchun signal keshi papkasi (MEDIA_ROOT/signal_cache/<id>)."""
+    return os.path.join(settings.MEDIA_ROOT, CACHE_ROOT, str(session_id))
+
+
+def source_signature(path: str) -> dict:
+    """Manba faylning imzosi: nomi, hajmi va o‘zgartirilgan vaqti."""
+    st = os.stat(path)
+    return {
+        "name": os.path.basename(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+class SignalCache:
+    """
+    EMT signallarining ustunli binar keshi.
+    Har bir kanal alohida float32 fayl, `np.memmap` orqali ochiladi —
+    kesish (slice) nusxa olmasdan bajariladi.
+    """
+
+    def __init__(self, directory: str, header: dict):
+        self.directory = directory
+        self.header = header
+        self._arrays: dict = {}
+
+    @property
+    def fs(self) -> int:
+        return self.header["fs"]
+
+    @property
+    def rows(self) -> int:
+        return self.header["rows"]
+
+    @property
+    def columns(self) -> list[str]:
+        return [ch["name"] for ch in self.header["channels"]]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def channel(self, name: str) -> np.ndarray:
+        """Kanalni to‘liq (memmap) qaytaradi."""
+        if name not in self._arrays:
+            channels = {ch["name"]: ch for ch in self.header["channels"]}
+            if name not in channels:
+                raise KeyError(f"Kanal topilmadi: {name}")
+            path = os.path.join(self.directory, channels[name]["file"])
+            if self.rows == 0:
+                self._arrays[name] = np.empty(0, dtype=DTYPE)
+            else:
+                self._arrays[name] = np.memmap(
+                    path, dtype=DTYPE, mode="r", shape=(self.rows,)
+                )
+        return self._arrays[name]
+
+    def to_source_precision(self, name: str, values) -> np.ndarray:
+        """
+        float32 qiymatlarni manba fayldagi kasr xonalarigacha yaxlitlaydi —
+        JSON da float64 ga kengaytirilgan uzun sonlar (0.0062870001…) chiqmaydi.
+        """
+        values = np.asarray(values, dtype=float)
+        channels = {ch["name"]: ch for ch in self.header["channels"]}
+        decimals = channels[name].get("decimals")
+        return values if decimals is None else np.round(values, decimals)
+
+    def window(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Kanalning [start, stop) oralig‘ini nusxasiz qaytaradi."""
+        return self.channel(name)[start:stop]
+
+    def to_dataframe(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """Barcha kanallarni (yoki oraliqni) DataFrame ko‘rinishida qaytaradi."""
+        return pd.DataFrame(
+            {name: self.window(name, start, stop) for name in self.columns}
+        )
+
+
+def _read_header(header_path: str, source_path: str) -> Optional[dict]:
+    """Header ni o‘qiydi; versiya yoki manba imzosi mos kelmasa None."""
+    if not os.path.exists(header_path):
+        return None
+    try:
+        with open(header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if header.get("version") != CACHE_VERSION:
+        return None
+    if header.get("source") != source_signature(source_path):
+        return None
+    return header
+
+
+def _write_header(header_path: str, header: dict) -> None:
+    """Header ni atomar yozadi (vaqtinchalik fayl + os.replace)."""
+    tmp_path = header_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, header_path)
+
+
+def _channels_current(header: dict) -> bool:
+    """Saqlangan kanal -> shortname moslamasi joriy mushak nomlariga mosmi."""
+    muscles = get_muscle_index()
+    return all(
+        ch["shortname"] == muscles.shortname(ch["column"])
+        for ch in header["channels"]
+    )
+
+
+def open_signal_cache(session_id, source_path: str) -> Optional[SignalCache]:
+    """
+    Keshni ochadi. Kesh yo‘q, eskirgan, manba fayl o‘zgargan yoki mushak
+    nomlari o‘zgargan (kanal nomlari eskirgan) bo‘lsa None.
+    """
+    directory = cache_dir(session_id)
+    header = _read_header(os.path.join(directory, HEADER_NAME), source_path)
+    if header is None or not _channels_current(header):
+        return None
+    return SignalCache(directory, header)
+
+
+def source_decimals(data: np.ndarray) -> Optional[int]:
+    """
+    float32 qiymatlarni o‘zgartirmaydigan eng kam kasr xonalari — manba
+    fayldagi yozilish aniqligi. Topilmasa (MAX_DECIMALS dan ko‘p) None.
+    """
+    finite = data[np.isfinite(data)]
+    decimals = 0
+    for values in (finite[:DECIMALS_SAMPLE], finite):
+        wide = values.astype(float)
+        while decimals <= MAX_DECIMALS and not np.array_equal(
+                np.round(wide, decimals).astype(DTYPE), values):
+            decimals += 1
+    return decimals if decimals <= MAX_DECIMALS else None
+
+
+def _replace_dir(built: str, directory: str) -> None:
+    """
+    Tayyor papkani eski kesh o‘rniga qo‘yadi. Eski papka avval chetga
+    olinadi va keyin o‘chiriladi: uni memmap qilib turgan o‘quvchilar
+    o‘chirilgan fayllardan o‘qishda davom etadi, yarim yozilgan fayl ko‘rinmaydi.
+    """
+    stale = f"{directory}.old-{uuid.uuid4().hex}"
+    try:
+        os.rename(directory, stale)
+    except FileNotFoundError:
+        stale = None
+    try:
+        os.rename(built, directory)
+    except OSError:
+        # Parallel jarayon o‘zining (xuddi shu manbadan) keshini qo‘yib ulgurdi
+        shutil.rmtree(built, ignore_errors=True)
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def write_signal_cache(
+    session_id,
+    source_path: str,
+    channels: list[dict],
+    fs: int,
+) -> SignalCache:
+    """
+    Kanallarni diskka yozadi.
+    channels: [{"name", "column", "shortname", "data"}] ro‘yxati.
+    Kesh yonidagi vaqtinchalik papkada quriladi va tayyor bo‘lgach eski
+    kesh o‘rniga qo‘yiladi — parallel so‘rovlar yarim qurilgan keshni ko‘rmaydi.
+    """
+    directory = cache_dir(session_id)
+    built = f"{directory}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(built)
+    try:
+        rows = len(channels[0]["data"]) if channels else 0
+        meta = []
+        for i, ch in enumerate(channels):
+            data = np.asarray(ch["data"], dtype=DTYPE)
+            if len(data) != rows:
+                raise ValueError(
+                    f"Kanal uzunliklari mos emas: {ch['name']} ({len(data)} != {rows})")
+            file_name = f"ch_{i:02d}.f32"
+            data.tofile(os.path.join(built, file_name))
+            meta.append({
+                "name": ch["name"],
+                "column": ch["column"],
+                "shortname": ch["shortname"],
+                "file": file_name,
+                "decimals": source_decimals(data),
+            })
+
+        header = {
+            "version": CACHE_VERSION,
+            "source": source_signature(source_path),
+            "fs": int(fs),
+            "rows": int(rows),
+            "channels": meta,
+        }
+        _write_header(os.path.join(built, HEADER_NAME), header)
+    except BaseException:
+        shutil.rmtree(built, ignore_errors=True)
+        raise
+    _replace_dir(built, directory)
+
+    return SignalCache(directory, header)
+
+
+def _open_prefix(path: str, rows: int) -> np.ndarray:
+    return np.memmap(path, dtype=range_index.DTYPE, mode="r", shape=(4, rows + 1))
+
+
+def open_ecg_index(session_id, source_path: str) -> Optional[RangeIndex]:
+    """ECG prefiks indeksini ochadi; yo‘q yoki ECG fayl o‘zgargan bo‘lsa None."""
+    directory = cache_dir(session_id)
+    header = _read_header(os.path.join(directory, ECG_HEADER_NAME), source_path)
+    if header is None:
+        return None
+    return RangeIndex(
+        _open_prefix(os.path.join(directory, ECG_PREFIX_NAME), header["rows"])
+    )
+
+
+def write_ecg_index(session_id, source_path: str, values) -> RangeIndex:
+    """ECG qiymatlari bo‘yicha prefiks indeksini quradi va diskka yozadi."""
+    directory = cache_dir(session_id)
+    os.makedirs(directory, exist_ok=True)
+    prefix = build_prefix(values)
+    prefix.tofile(os.path.join(directory, ECG_PREFIX_NAME))
+
+    header = {
+        "version": CACHE_VERSION,
+        "source": source_signature(source_path),
+        "rows": len(values),
+    }
+    _write_header(os.path.join(directory, ECG_HEADER_NAME), header)
+    return RangeIndex(prefix)
+
+
+def remove_signal_cache(session_id) -> None:
+    """Mashg‘ulot keshini o‘chiradi (mavjud bo‘lmasa — hech narsa qilmaydi)."""
+    shutil.rmtree(cache_dir(session_id), ignore_errors=True)
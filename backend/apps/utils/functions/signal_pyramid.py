@@ -0,0 +1,146 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+from .signal_cache import DTYPE, SignalCache, _write_header
+
+PYRAMID_VERSION = 1
+PYRAMID_HEADER_NAME = "pyramid.json"
+# Eng yuqori darajadagi bo‘laklar soni shundan oshmaydi
+MIN_TOP_BUCKETS = 2048
+# Bitta tile javobidagi maksimal bo‘laklar soni
+MAX_TILE_BUCKETS = 4096
+# Qatorlar: min, max, mean
+MIN, MAX, MEAN = range(3)
+
+
+def _pair_reduce(mins, maxs, sums, counts):
+    """Qo‘shni ikki bo‘lakni bittaga birlashtiradi (oxirgi toq bo‘lak o‘zi qoladi)."""
+    n = len(mins)
+    starts = np.arange(0, n, 2)
+    return (
+        np.minimum.reduceat(mins, starts),
+        np.maximum.reduceat(maxs, starts),
+        np.add.reduceat(sums, starts),
+        np.add.reduceat(counts, starts),
+    )
+
+
+def level_count(rows: int) -> int:
+    """2×, 4×, … darajalar soni: eng yuqorisi MIN_TOP_BUCKETS dan oshmaydi."""
+    levels = 0
+    while int(np.ceil(rows / 2 ** levels)) > MIN_TOP_BUCKETS:
+        levels += 1
+    return levels
+
+
+class SignalPyramid:
+    """
+    Har bir kanal uchun min/max/mean piramidasi.
+    level=k darajada bitta bo‘lak 2**k namunani qamraydi (level=0 — xom signal).
+    """
+
+    def __init__(self, cache: SignalCache, header: dict):
+        self.cache = cache
+        self.header = header
+        self._arrays: dict[str, np.ndarray] = {}
+
+    @property
+    def levels(self) -> int:
+        return len(self.header["levels"])
+
+    def _level_array(self, channel: str, level: int) -> np.ndarray:
+        if channel not in self._arrays:
+            path = os.path.join(self.cache.directory, self.header["files"][channel])
+            self._arrays[channel] = np.memmap(path, dtype=DTYPE, mode="r")
+        meta = self.header["levels"][level - 1]
+        flat = self._arrays[channel][meta["offset"]:meta["offset"] + 3 * meta["buckets"]]
+        return flat.reshape(3, meta["buckets"])
+
+    def choose_level(self, start: int, stop: int, max_points: int) -> int:
+        """[start, stop) oynasini max_points bo‘lakdan oshirmaydigan eng past daraja."""
+        level = 0
+        while level < self.levels and (stop - start) / 2 ** level > max_points:
+            level += 1
+        return level
+
+    def tile(self, channel: str, level: int, start: int = 0, stop: Optional[int] = None) -> dict:
+        """
+        [start, stop) oynasiga tushgan bo‘laklarni qaytaradi.
+        Bo‘laklar soni MAX_TILE_BUCKETS dan oshsa, daraja avtomatik oshiriladi.
+        """
+        rows = self.cache.rows
+        stop = rows if stop is None else min(stop, rows)
+        start = max(0, min(start, stop))
+        level = max(0, min(level, self.levels))
+        level = max(level, self.choose_level(start, stop, MAX_TILE_BUCKETS))
+
+        bucket = 2 ** level
+        first, last = start // bucket, -(-stop // bucket)
+        if level == 0:
+            # Yuqori darajalar kabi NaN -> 0 (JSON NaN ni qabul qilmaydi)
+            values = np.nan_to_num(self.cache.window(channel, first, last), nan=0.0)
+            data = np.vstack([values, values, values])
+        else:
+            data = self._level_array(channel, level)[:, first:last]
+
+        return {
+            "channel": channel,
+            "level": level,
+            "bucket_size": bucket,
+            "from": start,
+            "to": stop,
+            "index": (np.arange(first, first + data.shape[1]) * bucket).tolist(),
+            "min": data[MIN].tolist(),
+            "max": data[MAX].tolist(),
+            "mean": data[MEAN].tolist(),
+        }
+
+
+def build_pyramid(cache: SignalCache) -> SignalPyramid:
+    """Barcha kanallar uchun piramidani quradi (bir marta, ingest paytida)."""
+    n_levels = level_count(cache.rows)
+    files, levels = {}, []
+    for i, channel in enumerate(cache.columns):
+        x = np.nan_to_num(np.asarray(cache.channel(channel), dtype=float), nan=0.0)
+        mins, maxs, sums, counts = x, x, x, np.ones(len(x))
+        chunks, offset = [], 0
+        for level in range(1, n_levels + 1):
+            mins, maxs, sums, counts = _pair_reduce(mins, maxs, sums, counts)
+            chunks.append(np.vstack([mins, maxs, sums / counts]).astype(DTYPE).ravel())
+            if i == 0:
+                levels.append({"level": level, "buckets": len(mins), "offset": offset})
+            offset += 3 * len(mins)
+
+        file_name = f"ch_{i:02d}.pyramid.f32"
+        (np.concatenate(chunks) if chunks else np.empty(0, dtype=DTYPE)).tofile(
+            os.path.join(cache.directory, file_name))
+        files[channel] = file_name
+
+    header = {
+        "version": PYRAMID_VERSION,
+        "source": cache.header["source"],
+        "levels": levels,
+        "files": files,
+    }
+    _write_header(os.path.join(cache.directory, PYRAMID_HEADER_NAME), header)
+    return SignalPyramid(cache, header)
+
+
+def open_pyramid(cache: SignalCache) -> Optional[SignalPyramid]:
+    """Piramidani ochadi; yo‘q yoki kesh bilan mos kelmasa None."""
+    path = os.path.join(cache.directory, PYRAMID_HEADER_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != PYRAMID_VERSION:
+        return None
+    if header.get("source") != cache.header["source"]:
+        return None
+    return SignalPyramid(cache, header)
@@ -0,0 +1,158 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .signal_cache import DTYPE, SignalCache, _write_header
+
+SPECTROGRAM_VERSION = 1
+# Qatorlar: median chastota, o‘rtacha chastota, RMS, 20–60 / 60–500 Hz nisbati
+FIELDS = ("mdf", "mnf", "rms", "band_ratio")
+# Bir vaqtda rfft qilinadigan namunalar soni (oynalar × oyna uzunligi) —
+# xotira chegarasi oyna uzunligiga bog‘liq emas (~64 MB kompleks spektr)
+SAMPLES_PER_BLOCK = 1 << 22
+
+# API parametrlari chegaralari (millisekund)
+DEFAULT_WINDOW_MS = 1000
+DEFAULT_HOP_MS = 250
+MIN_WINDOW_MS = 50
+MAX_WINDOW_MS = 10_000
+MIN_HOP_MS = 50
+# Bitta javobdagi oynalar soni chegarasi (kichik qadam × uzun mashg‘ulot)
+MAX_WINDOWS = 20_000
+
+
+def validate_params(window_ms: int, hop_ms: int, rows: int, fs: int) -> None:
+    """window/hop chegaralarini tekshiradi; mos kelmasa ValueError."""
+    if not MIN_WINDOW_MS <= window_ms <= MAX_WINDOW_MS:
+        raise ValueError(
+            f"window {MIN_WINDOW_MS}–{MAX_WINDOW_MS} ms oralig‘ida bo‘lishi kerak.")
+    if not MIN_HOP_MS <= hop_ms <= MAX_WINDOW_MS:
+        raise ValueError(
+            f"hop {MIN_HOP_MS}–{MAX_WINDOW_MS} ms oralig‘ida bo‘lishi kerak.")
+    windows = rows * 1000 // (hop_ms * fs) if fs else 0
+    if windows > MAX_WINDOWS:
+        raise ValueError(
+            f"Oynalar soni juda ko‘p ({windows} > {MAX_WINDOWS}), hop ni kattalashtiring.")
+
+
+def sliding_spectral_features(x, fs: int, window: int, hop: int) -> np.ndarray:
+    """
+    Signal bo‘ylab siljuvchi oynalar uchun MDF, MNF, RMS va diapazon nisbati.
+    Oynalar nusxasiz (strided view) olinadi, rfft bloklar bo‘yicha paketda.
+    Qaytadi: (len(FIELDS), n_windows) massiv.
+    """
+    x = np.nan_to_num(np.asarray(x, dtype=float), nan=0.0)
+    if len(x) < window or window < 2:
+        return np.empty((len(FIELDS), 0))
+
+    frames = sliding_window_view(x, window)[::hop]
+    freqs = np.fft.rfftfreq(window, d=1.0 / fs)
+    low_band = (freqs >= 20) & (freqs < 60)
+    high_band = (freqs >= 60) & (freqs <= 500)
+
+    out = np.empty((len(FIELDS), len(frames)))
+    per_block = max(SAMPLES_PER_BLOCK // window, 1)
+    for start in range(0, len(frames), per_block):
+        block = frames[start:start + per_block]
+        psd = np.abs(np.fft.rfft(block, axis=1)) ** 2 / window
+        m0 = psd.sum(axis=1)
+        cumulative = np.cumsum(psd, axis=1)
+        stop = start + len(block)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[0, start:stop] = freqs[np.argmax(cumulative >= (m0 / 2)[:, None], axis=1)]
+            out[1, start:stop] = np.where(m0 > 0, psd @ freqs / m0, 0.0)
+            high = psd[:, high_band].sum(axis=1)
+            out[3, start:stop] = np.where(
+                high > 0, psd[:, low_band].sum(axis=1) / high, np.nan)
+        out[2, start:stop] = np.sqrt(np.mean(block ** 2, axis=1))
+    return out
+
+
+class SessionSpectrogram:
+    """
+    Mashg‘ulot kanallari uchun siljuvchi oyna spektral ko‘rsatkichlari:
+    saqlangan (memmap) yoki keshlanmagan (data — xotiradagi massiv).
+    """
+
+    def __init__(self, directory: str, header: dict, data: np.ndarray = None):
+        self.directory = directory
+        self.header = header
+        self._data = data if data is not None else np.memmap(
+            os.path.join(directory, header["file"]), dtype=DTYPE, mode="r",
+            shape=(len(header["channels"]), len(FIELDS), header["windows"]),
+        ) if header["windows"] else np.empty(
+            (len(header["channels"]), len(FIELDS), 0), dtype=DTYPE)
+
+    @property
+    def channels(self) -> list[str]:
+        return self.header["channels"]
+
+    def times(self) -> np.ndarray:
+        """Har bir oyna markazining vaqti (sekund)."""
+        h = self.header
+        return (np.arange(h["windows"]) * h["hop"] + h["window"] / 2) / h["fs"]
+
+    def channel(self, name: str) -> dict:
+        """Kanal uchun {mdf, mnf, rms, band_ratio} massivlari."""
+        data = self._data[self.channels.index(name)]
+        return {field: data[i] for i, field in enumerate(FIELDS)}
+
+
+def _names(window: int, hop: int) -> tuple[str, str]:
+    base = f"spectrogram_w{window}_h{hop}"
+    return base + ".json", base + ".f32"
+
+
+def _compute(cache: SignalCache, window: int, hop: int, file_name: str = None):
+    data = np.stack([
+        sliding_spectral_features(cache.channel(name), cache.fs, window, hop)
+        for name in cache.columns
+    ]).astype(DTYPE) if cache.columns else np.empty((0, len(FIELDS), 0), dtype=DTYPE)
+    header = {
+        "version": SPECTROGRAM_VERSION,
+        "source": cache.header["source"],
+        "fs": cache.fs,
+        "window": window,
+        "hop": hop,
+        "windows": int(data.shape[2]),
+        "channels": cache.columns,
+        "fields": list(FIELDS),
+        "file": file_name,
+    }
+    return data, header
+
+
+def compute_spectrogram(cache: SignalCache, window: int, hop: int) -> SessionSpectrogram:
+    """Spektrogrammani diskka yozmasdan (keshlanmagan variant) hisoblaydi."""
+    data, header = _compute(cache, window, hop)
+    return SessionSpectrogram(cache.directory, header, data=data)
+
+
+def build_spectrogram(cache: SignalCache, window: int, hop: int) -> SessionSpectrogram:
+    """Barcha kanallar uchun spektrogramma ko‘rsatkichlarini hisoblab, diskka yozadi."""
+    header_name, file_name = _names(window, hop)
+    data, header = _compute(cache, window, hop, file_name)
+    data.tofile(os.path.join(cache.directory, file_name))
+    _write_header(os.path.join(cache.directory, header_name), header)
+    return SessionSpectrogram(cache.directory, header)
+
+
+def open_spectrogram(cache: SignalCache, window: int, hop: int) -> Optional[SessionSpectrogram]:
+    """Saqlangan spektrogrammani ochadi; yo‘q yoki kesh bilan mos kelmasa None."""
+    header_name, _ = _names(window, hop)
+    path = os.path.join(cache.directory, header_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != SPECTROGRAM_VERSION:
+        return None
+    if header.get("source") != cache.header["source"]:
+        return None
+    return SessionSpectrogram(cache.directory, header)
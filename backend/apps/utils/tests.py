@@ -0,0 +1,484 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from apps.utils.ai import inference
+from apps.utils.ai.batching import MicroBatcher
+from apps.utils.ai.numpy_model import NumpyModel, export_model, npz_path_for
+from apps.utils.emg_features import (
+    FEATURE_NAMES,
+    emg_features,
+    estimator_key,
+    signal_features,
+)
+from apps.utils.functions.downsample import downsample
+from apps.utils.functions.emt_index import open_line_index, write_line_index
+from apps.utils.functions.emt_parser import (
+    read_ecg,
+    read_emt,
+    read_emt_dataframe,
+)
+from apps.utils.functions.heart_rate import HeartRateRamp
+from apps.utils.functions.muscle_index import MuscleIndex
+from apps.utils.functions.range_index import RangeIndex, build_prefix
+from apps.utils.functions.signal_cache import write_signal_cache
+from apps.utils.functions.signal_pyramid import build_pyramid, open_pyramid
+from apps.utils.functions.spectrogram import sliding_spectral_features, validate_params
+
+
+def reference_features(signal, fs=1000):
+    """Vektorlashtirishdan oldingi (sikl bilan) calculate_emg_features nusxasi."""
+    signal = np.asarray(signal, dtype=float)
+    N = len(signal)
+    X = np.fft.rfft(signal)
+    freqs = np.fft.rfftfreq(N, d=1.0/fs)
+    PSD_fft = np.abs(X)**2 / N
+
+    m0 = np.sum(PSD_fft)
+    MNF = np.sum(freqs * PSD_fft) / m0 if m0 != 0 else 0
+    amplitude = np.abs(X)
+    spectral_centroid = np.sum(
+        freqs * amplitude) / np.sum(amplitude) if np.sum(amplitude) != 0 else 0
+
+    cumulative_power = np.cumsum(PSD_fft)
+    MDF_idx = np.where(cumulative_power >= m0 / 2.0)[0][0]
+    MDF = freqs[MDF_idx]
+
+    spectral_variance = np.sum(
+        ((freqs - MNF)**2) * PSD_fft) / m0 if m0 != 0 else 0
+    spectral_variance = spectral_variance / (len(signal) - 1)
+    bandwidth = np.sqrt(spectral_variance)
+
+    eps = 1e-8
+    valid = freqs > 0
+    slope, _ = np.polyfit(freqs[valid], np.log10(
+        amplitude[valid] + eps), 1) if np.sum(valid) > 0 else (0, 0)
+
+    low_band = (freqs >= 20) & (freqs < 60)
+    high_band = (freqs >= 60) & (freqs <= 500)
+    low_power = np.sum(PSD_fft[low_band])
+    high_power = np.sum(PSD_fft[high_band])
+    band_power_ratio = low_power / high_power if high_power != 0 else np.nan
+
+    RMS = np.sqrt(np.mean(signal**2))
+    MAV = np.mean(np.abs(signal))
+    var_val = np.var(signal)
+    WL = np.sum(np.abs(np.diff(signal)))
+
+    signal_range = np.ptp(signal)
+    threshold_ssc = 0.01 * signal_range if signal_range > 0 else 0.01
+
+    ssc = 0
+    for i in range(1, len(signal) - 1):
+        diff1 = signal[i] - signal[i - 1]
+        diff2 = signal[i + 1] - signal[i]
+        if diff1 * diff2 < 0 and (abs(diff1) > threshold_ssc or abs(diff2) > threshold_ssc):
+            ssc += 1
+    ssc = ssc / (len(signal) - 1)
+
+    zc = np.where(np.diff(np.sign(signal)))[0]
+    ZCR = len(zc)
+
+    MAD = np.median(np.abs(signal - np.median(signal)))
+    wamp = np.sum(np.abs(np.diff(signal)) > threshold_ssc)
+
+    return [
+        MDF, MNF, spectral_centroid, spectral_variance, bandwidth, slope,
+        band_power_ratio, RMS, MAV, var_val, WL, ssc, ZCR, MAD, wamp,
+    ]
+
+
+class EMTParserTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.x = np.round(np.random.default_rng(5).normal(size=(2, 300)), 6)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w", newline="") as f:
+            f.write(text)
+        return path
+
+    def emt(self, meta_lines=10, blank_every=None, newline="\r\n"):
+        lines = [f"META {i}\tqiymat" for i in range(meta_lines)]
+        lines.append("Frame\tTime\tBiceps brachii L\tRPM\t")
+        for i, (a, b) in enumerate(self.x.T):
+            if blank_every and i % blank_every == 0:
+                lines.append("")
+            lines.append(f"{i + 1}\t{i / 500:.3f}\t{a:.6f}\t{b:.6f}\t")
+        return self.write("s.emt", newline.join(lines) + newline * 3)
+
+    def test_header_at_any_line(self):
+        for meta_lines in (0, 3, 10, 25):
+            data = read_emt(self.emt(meta_lines))
+            self.assertEqual(list(data.columns), ["Biceps brachii L", "RPM"])
+            self.assertEqual((data.rows, data.fs), (300, 500))
+            np.testing.assert_allclose(data.columns["RPM"], self.x[1], atol=1e-6)
+
+    def test_blank_and_trailing_lines_are_skipped(self):
+        data = read_emt(self.emt(blank_every=7, newline="\n"))
+        self.assertEqual(data.rows, 300)
+        self.assertEqual(data.columns["RPM"].dtype, np.float32)
+        np.testing.assert_allclose(
+            data.columns["Biceps brachii L"], self.x[0], atol=1e-6)
+
+    def test_channel_selection_and_frame(self):
+        path = self.emt()
+        data = read_emt(path, channels=["RPM"], keep_frame=True)
+        self.assertEqual(list(data.columns), ["RPM"])
+        df = read_emt_dataframe(path)
+        self.assertEqual(list(df.columns), ["Frame", "Time", "Biceps brachii L", "RPM"])
+        np.testing.assert_array_equal(df["Frame"], np.arange(1, 301))
+
+    def test_missing_header_is_an_error(self):
+        path = self.write("bad.emt", "META\tqiymat\n1\t0.0\t0.5\n")
+        with self.assertRaises(RuntimeError):
+            read_emt(path)
+
+    def test_ecg_values(self):
+        path = self.write("s.ecg", "72\n73.5\t\n\n-1e-3\n\n")
+        values = read_ecg(path)
+        self.assertEqual(values.dtype, np.float32)
+        np.testing.assert_allclose(values, [72, 73.5, -1e-3], rtol=1e-6)
+
+
+class EMGFeaturesTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        t = np.arange(3000) / 1000.0
+        self.signals = rng.normal(0, 0.05, size=(4, 3000)) * (1 + np.sin(t))
+        self.signals[3] = 0.0  # tinch (nol) kanal
+
+    def test_matches_reference_implementation(self):
+        feats = signal_features(self.signals, fs=1000)
+        self.assertEqual(feats.shape, (4, len(FEATURE_NAMES)))
+        for row, signal in zip(feats, self.signals):
+            np.testing.assert_allclose(
+                row, reference_features(signal), rtol=1e-9, atol=1e-12)
+
+    def test_one_dimensional_input(self):
+        feats = signal_features(self.signals[0])
+        self.assertEqual(feats.shape, (1, len(FEATURE_NAMES)))
+
+    def test_emg_features_appends_athlete_values(self):
+        feats = emg_features(self.signals[0], 22.5, 3000, 120)
+        self.assertEqual(len(feats), 18)
+        self.assertEqual(feats[-3:], [22.5, 3000, 120])
+
+
+class WelchEstimatorTest(SimpleTestCase):
+    def test_estimator_key(self):
+        self.assertEqual(estimator_key("fft"), "fft")
+        self.assertEqual(estimator_key("welch"), "welch:256:0.5")
+        self.assertEqual(estimator_key("welch:512:0.25"), "welch:512:0.25")
+        with self.assertRaises(ValueError):
+            estimator_key("wavelet")
+
+    def test_welch_recovers_sine_frequency(self):
+        rng = np.random.default_rng(7)
+        t = np.arange(60_000) / 1000
+        signals = np.sin(2 * np.pi * 80 * t) + rng.normal(0, 0.1, size=(3, len(t)))
+        mdf = FEATURE_NAMES.index("MDF")
+
+        welch = signal_features(signals, fs=1000, estimator="welch:256:0.5")
+        np.testing.assert_allclose(welch[:, mdf], 80, atol=1000 / 256)
+        # Segmentdan qisqa signal ham chekli natija beradi
+        self.assertTrue(np.all(np.isfinite(
+            signal_features(signals[:, :100], fs=1000, estimator="welch"))))
+
+
+class RangeIndexTest(SimpleTestCase):
+    def test_window_stats_match_direct_computation(self):
+        x = np.random.default_rng(0).normal(size=1000)
+        index = RangeIndex(build_prefix(x))
+        for start, stop in [(0, 1000), (100, 101), (250, 731)]:
+            w = x[start:stop]
+            stats = index.stats(start, stop)
+            self.assertEqual(stats["n"], len(w))
+            self.assertAlmostEqual(stats["mean"], np.mean(w))
+            self.assertAlmostEqual(stats["rms"], np.sqrt(np.mean(w**2)))
+            self.assertAlmostEqual(stats["mav"], np.mean(np.abs(w)))
+            self.assertAlmostEqual(stats["var"], np.var(w))
+            self.assertAlmostEqual(stats["wl"], np.sum(np.abs(np.diff(w))))
+
+    def test_empty_window(self):
+        index = RangeIndex(build_prefix(np.arange(10)))
+        self.assertIsNone(index.mean(5, 5))
+        self.assertEqual(index.mean(0, 100), 4.5)
+
+
+class HeartRateRampTest(SimpleTestCase):
+    def test_closed_form_matches_sampled_ramp(self):
+        for pre, post in [(70, 150), (150, 70), (80, 80)]:
+            ramp = HeartRateRamp(pre, post, 10_000)
+            samples = np.linspace(pre, post, 10_000)
+            np.testing.assert_allclose(ramp.values(), samples)
+            for start, stop in [(0, 10_000), (1, 2), (2500, 7311), (9000, 20_000)]:
+                self.assertAlmostEqual(ramp.mean(start, stop), samples[start:stop].mean())
+                self.assertAlmostEqual(ramp.sum(start, stop), samples[start:stop].sum(),
+                                       places=6)
+
+    def test_empty_window(self):
+        ramp = HeartRateRamp(70, 140, 100)
+        self.assertIsNone(ramp.mean(50, 50))
+        self.assertEqual(ramp.sum(200, 300), 0.0)
+        self.assertEqual(HeartRateRamp(70, 140, 1).mean(), 70)
+
+
+class MuscleIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = MuscleIndex([
+            (1, "Biceps brachii L", "LBBCL"),
+            (2, "Biceps brachii R", "RBBCL"),
+            (3, "Pectoralis major R", "RPM"),
+        ])
+
+    def test_exact_name_resolution(self):
+        self.assertEqual(self.index.shortname("biceps BRACHII l"), "LBBCL")
+        self.assertIsNone(self.index.shortname("Biceps"))
+        self.assertEqual(self.index.name_by_shortname["RPM"], "Pectoralis major R")
+
+    def test_best_match_by_tokens(self):
+        self.assertEqual(self.index.best_match_id("EMG ch3 Pectoralis major"), 3)
+        # Teng ball — birinchi mushak (avvalgi to‘liq aylanish bilan bir xil)
+        self.assertEqual(self.index.best_match_id("biceps brachii"), 1)
+        self.assertEqual(self.index.best_match_id("Biceps brachii R"), 2)
+        self.assertIsNone(self.index.best_match_id("Biceps femoris"))
+        self.assertIsNone(self.index.best_match_id("Time"))
+
+
+class DownsampleTest(SimpleTestCase):
+    def setUp(self):
+        self.y = np.random.default_rng(1).normal(size=100_003)
+
+    def test_minmax_keeps_extremes(self):
+        idx, values = downsample(self.y, 1000, "minmax")
+        self.assertLessEqual(len(idx), 1000)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertEqual(values.max(), self.y.max())
+        self.assertEqual(values.min(), self.y.min())
+
+    def test_lttb_keeps_endpoints(self):
+        idx, values = downsample(self.y, 500, "lttb")
+        self.assertEqual(len(idx), 500)
+        self.assertEqual((idx[0], idx[-1]), (0, len(self.y) - 1))
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        np.testing.assert_array_equal(values, self.y[idx])
+
+    def test_short_signal_is_returned_as_is(self):
+        idx, values = downsample(self.y[:10], 100, "lttb")
+        np.testing.assert_array_equal(idx, np.arange(10))
+
+    def test_too_few_points_are_rejected(self):
+        with self.assertRaises(ValueError):
+            downsample(self.y, 1, "minmax")
+        idx, _ = downsample(self.y, 2, "lttb")
+        np.testing.assert_array_equal(idx, [0, len(self.y) - 1])
+
+
+class SignalPyramidTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        source = os.path.join(tmp.name, "session.emt")
+        open(source, "w").close()
+        self.x = np.random.default_rng(2).normal(size=20_001).astype(np.float32)
+        self.cache = write_signal_cache(1, source, [{
+            "name": "LBBCL", "column": "Biceps brachii L",
+            "shortname": "LBBCL", "data": self.x,
+        }], fs=1000)
+
+    def test_tile_buckets_match_raw_signal(self):
+        build_pyramid(self.cache)
+        pyramid = open_pyramid(self.cache)
+        self.assertEqual(pyramid.levels, 4)
+
+        tile = pyramid.tile("LBBCL", 3, 1000, 1100)
+        self.assertEqual(tile["bucket_size"], 8)
+        self.assertEqual(tile["index"][0], 1000)
+        for i, start in enumerate(tile["index"]):
+            window = self.x[start:start + 8]
+            self.assertAlmostEqual(tile["min"][i], window.min())
+            self.assertAlmostEqual(tile["max"][i], window.max())
+            self.assertAlmostEqual(tile["mean"][i], window.mean(), places=5)
+
+    def test_tile_size_is_bounded(self):
+        pyramid = build_pyramid(self.cache)
+        tile = pyramid.tile("LBBCL", 0)
+        self.assertLessEqual(len(tile["min"]), 4096)
+
+
+class EMTLineIndexTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.x = np.random.default_rng(3).normal(size=(2, 5000))
+        self.source = os.path.join(tmp.name, "session.emt")
+        with open(self.source, "w", newline="") as f:
+            f.write("ID\tsportchi\r\n\r\n")
+            f.write("Frame\tTime\tBiceps brachii L\tRPM\t\r\n")
+            for i, (a, b) in enumerate(self.x.T):
+                f.write(f"{i + 1}\t{i / 1000:.3f}\t{a:.6f}\t{b:.6f}\t\r\n")
+            f.write("\r\n")
+
+    def test_window_matches_full_read(self):
+        write_line_index(1, self.source, every=64)
+        index = open_line_index(1, self.source)
+        self.assertEqual((index.rows, index.header["fs"]), (5000, 1000))
+
+        full = read_emt(self.source)
+        for start, stop in [(0, 10), (63, 65), (1000, 1777), (4990, 6000)]:
+            window = index.read_window(self.source, start, stop, channels=["RPM"])
+            np.testing.assert_array_equal(
+                window.columns["RPM"], full.columns["RPM"][start:stop])
+            np.testing.assert_array_equal(window.time, full.time[start:stop])
+
+    def test_stale_index_is_ignored(self):
+        write_line_index(1, self.source)
+        with open(self.source, "a") as f:
+            f.write("5001\t5.000\t0.0\t0.0\t\r\n")
+        self.assertIsNone(open_line_index(1, self.source))
+
+    def test_blank_lines_are_not_counted(self):
+        with open(self.source, "w", newline="") as f:
+            f.write("Frame\tTime\tBiceps brachii L\tRPM\t\r\n")
+            for i, (a, b) in enumerate(self.x.T):
+                if i % 97 == 0:
+                    f.write("\r\n" if i % 2 else "  \n")
+                f.write(f"{i + 1}\t{i / 1000:.3f}\t{a:.6f}\t{b:.6f}\t\r\n")
+
+        full = read_emt(self.source)
+        # Kichik bloklar — bo‘sh satrlar blok chegarasiga ham tushadi
+        with mock.patch("apps.utils.functions.emt_index.BLOCK_SIZE", 1000):
+            write_line_index(1, self.source, every=64)
+        index = open_line_index(1, self.source)
+        self.assertEqual(index.rows, len(full.time))
+        for start, stop in [(0, 10), (95, 200), (1000, 1777), (4990, 6000)]:
+            window = index.read_window(self.source, start, stop, channels=["RPM"])
+            np.testing.assert_array_equal(
+                window.columns["RPM"], full.columns["RPM"][start:stop])
+
+
+class NumpyBackendParityTest(SimpleTestCase):
+    MODELS = ["model_LBBCL.keras", "model_LPM.keras",
+              "model_RBBCL.keras", "model_RPM.keras"]
+
+    def setUp(self):
+        self.ai_dir = os.path.join(os.path.dirname(__file__), "ai")
+        # Scaler chiqishiga o‘xshash kirishlar (standartlashtirilgan)
+        self.X = np.random.default_rng(4).normal(size=(256, 18))
+
+    def test_numpy_matches_keras(self):
+        for name in self.MODELS:
+            model_path = os.path.join(self.ai_dir, name)
+            with self.subTest(model=name):
+                expected = inference.predict(model_path, self.X, backend="keras")
+                actual = inference.predict(model_path, self.X, backend="numpy")
+                np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-6)
+
+    def test_export_reproduces_shipped_npz(self):
+        model_path = os.path.join(self.ai_dir, self.MODELS[0])
+        with tempfile.TemporaryDirectory() as tmp:
+            npz_path = os.path.join(tmp, "model.npz")
+            export_model(inference.load_model_cached(model_path), npz_path)
+            exported = NumpyModel.load(npz_path)
+        shipped = NumpyModel.load(npz_path_for(model_path))
+        for (W1, b1), (W2, b2) in zip(exported.weights, shipped.weights):
+            np.testing.assert_array_equal(W1, W2)
+            np.testing.assert_array_equal(b1, b2)
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_models_are_loaded_and_timed(self):
+        ai_dir = os.path.join(os.path.dirname(__file__), "ai")
+        paths = [os.path.join(ai_dir, name) for name in NumpyBackendParityTest.MODELS]
+        with self.assertLogs("apps.utils.ai.inference", level="INFO"):
+            timings = inference.warm_up(
+                paths + [os.path.join(ai_dir, "missing.keras")],
+                os.path.join(ai_dir, "scaler_2025_10_04.pkl"), backend="numpy")
+        self.assertEqual([t["model"] for t in timings], NumpyBackendParityTest.MODELS)
+        self.assertTrue(all(t["load_ms"] >= 0 and t["warmup_ms"] >= 0 for t in timings))
+
+
+class MicroBatcherTest(SimpleTestCase):
+    def setUp(self):
+        self.model_path = os.path.join(
+            os.path.dirname(__file__), "ai", NumpyBackendParityTest.MODELS[0])
+        self.X = np.random.default_rng(5).normal(size=(16, 18))
+
+    def test_concurrent_requests_are_batched(self):
+        batcher = MicroBatcher(max_batch_size=16, max_wait_ms=200)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(
+                lambda row: batcher.predict(
+                    self.model_path, row.reshape(1, -1), backend="numpy"),
+                self.X))
+
+        expected = inference.predict(self.model_path, self.X, backend="numpy")
+        np.testing.assert_allclose(np.concatenate(results), expected, rtol=1e-6)
+        stats = batcher.stats()
+        self.assertEqual(stats["rows"], 16)
+        self.assertLess(stats["batches"], 16)
+
+    def test_stats_are_logged_periodically(self):
+        batcher = MicroBatcher(max_wait_ms=1, log_interval=1e-9)
+        with self.assertLogs("apps.utils.ai.batching", level="INFO") as logs:
+            batcher.predict(self.model_path, self.X, backend="numpy")
+            # log predict natijasidan keyin yoziladi — oqimni kutamiz
+            for _ in range(100):
+                if logs.records:
+                    break
+                time.sleep(0.01)
+        self.assertIn("1 paket, 16 qator", logs.output[0])
+
+    def test_errors_are_returned_through_future(self):
+        batcher = MicroBatcher(max_wait_ms=1)
+        future = batcher.submit("missing.keras", self.X[:1], backend="numpy")
+        with self.assertRaises(FileNotFoundError):
+            future.result(timeout=5)
+
+
+class SlidingSpectralFeaturesTest(SimpleTestCase):
+    def test_matches_per_window_features(self):
+        x = np.random.default_rng(6).normal(size=5300)
+        out = sliding_spectral_features(x, fs=1000, window=1000, hop=250)
+        self.assertEqual(out.shape, (4, 18))
+
+        frames = np.stack([x[i * 250:i * 250 + 1000] for i in range(18)])
+        expected = signal_features(frames, fs=1000)
+        columns = [FEATURE_NAMES.index(n)
+                   for n in ("MDF", "MNF", "RMS", "band_power_ratio")]
+        np.testing.assert_allclose(out.T, expected[:, columns], rtol=1e-9)
+
+    def test_block_size_follows_window_length(self):
+        x = np.random.default_rng(6).normal(size=5300)
+        with mock.patch("apps.utils.functions.spectrogram.SAMPLES_PER_BLOCK", 3000):
+            blocked = sliding_spectral_features(x, fs=1000, window=1000, hop=250)
+        np.testing.assert_allclose(
+            blocked, sliding_spectral_features(x, fs=1000, window=1000, hop=250))
+
+    def test_parameter_limits(self):
+        validate_params(1000, 250, rows=3_600_000, fs=1000)
+        for window, hop, rows in [(600_000, 250, 1000), (1000, 10, 1000),
+                                  (1000, 50, 3_600_000)]:
+            with self.assertRaises(ValueError):
+                validate_params(window, hop, rows=rows, fs=1000)
+
+    def test_short_signal(self):
+        out = sliding_spectral_features(np.ones(10), fs=1000, window=1000, hop=250)
+        self.assertEqual(out.shape, (4, 0))
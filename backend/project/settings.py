@@ -92,6 +92,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Parallel yozuvchilar (rescore_fatigue --workers, fon worker)
+            # "database is locked" o‘rniga qulf bo‘shashini kutadi
+            'timeout': float(os.getenv('DB_TIMEOUT', '30')),
+        },
     }
 }
 
@@ -124,3 +129,53 @@ MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Fon vazifalari: True bo‘lsa `manage.py process_jobs` worker bajaradi,
+# False bo‘lsa vazifa so‘rov ichida darhol bajariladi
+JOBS_ASYNC = os.getenv('JOBS_ASYNC', 'True') == 'True'
+# Xatolikdan keyingi qayta urinish kechikishi (sekund): delay * 2^(urinish-1)
+JOBS_RETRY_DELAY = float(os.getenv('JOBS_RETRY_DELAY', '30'))
+# Shuncha sekunddan beri RUNNING bo‘lgan vazifa to‘xtab qolgan hisoblanadi
+JOBS_STALE_AFTER = int(os.getenv('JOBS_STALE_AFTER', '600'))
+# Mushak nomlari indeksi shu sekunddan eski bo‘lsa qayta quriladi (boshqa
+# workerlardagi o‘zgarishlar uchun; umumiy cache bo‘lsa darhol)
+MUSCLE_INDEX_TTL = float(os.getenv('MUSCLE_INDEX_TTL', '60'))
+
+# Charchoq modellari uchun bashorat backendi: 'keras' yoki 'numpy'
+# ('numpy' — manage.py export_numpy_models bilan yaratilgan .npz fayllardan)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'keras')
+
+# EMG xususiyatlari uchun spektral baholovchi: 'fft' (butun oyna) yoki
+# 'welch[:segment[:overlap]]', masalan 'welch:256:0.5' (uzun oynalar uchun).
+# Faqat xususiyatlar to‘plami (build_feature_dataset) uchun — bashorat
+# MODEL_FEATURE_ESTIMATOR bilan ishlaydi
+FEATURE_ESTIMATOR = os.getenv('FEATURE_ESTIMATOR', 'fft')
+# Joriy scaler va modellar qaysi baholovchi xususiyatlarida o‘qitilgan
+# (welch bilan qayta o‘qitilgan modellar joylanganda o‘zgartiriladi)
+MODEL_FEATURE_ESTIMATOR = os.getenv('MODEL_FEATURE_ESTIMATOR', 'fft')
+
+# True bo‘lsa, server jarayoni (wsgi/asgi) yoki process_jobs ishga tushganda
+# barcha modellar va scaler yuklanib, bitta soxta bashorat bilan qizdiriladi
+INFERENCE_PRELOAD = os.getenv('INFERENCE_PRELOAD', 'False') == 'True'
+
+# Mikro-paketlash: parallel so‘rovlardagi bashoratlar INFERENCE_BATCH_MAX_WAIT_MS
+# davomida yoki INFERENCE_BATCH_MAX_SIZE qatorgacha yig‘ilib, bitta predict bilan bajariladi
+INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'False') == 'True'
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv('INFERENCE_BATCH_MAX_SIZE', '64'))
+INFERENCE_BATCH_MAX_WAIT_MS = float(os.getenv('INFERENCE_BATCH_MAX_WAIT_MS', '5'))
+# Erishilgan paket o‘lchamlari shu oraliqda (sekund) INFO logga yoziladi (0 — o‘chiq)
+INFERENCE_BATCH_LOG_INTERVAL = float(os.getenv('INFERENCE_BATCH_LOG_INTERVAL', '60'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': os.getenv('APPS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
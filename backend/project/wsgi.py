@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_wsgi_application()
+
+# Bashorat modellari faqat server jarayonida oldindan yuklanadi (INFERENCE_PRELOAD)
+from apps.utils.ai.calculate_fatigue import preload_inference  # noqa: E402
+
+preload_inference()